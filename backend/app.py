@@ -1,25 +1,128 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+import click
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime, timedelta
+from functools import wraps
+from types import SimpleNamespace
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+import asyncio
+import atexit
+import base64
+import binascii
+import cProfile
+import hashlib
+import hmac
+import io
+import pstats
+import queue
+import sqlite3
+import threading
+import time
 import uuid
+import zlib
 import random
 import json
+import os
+import re
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; only needed for MITRA_MULTIPROCESS
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+from keyword_matcher import KeywordMatcher
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mitra.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///mitra.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'mitra-secret-key-2024'
 
+# SQLite storage profiles. 'tuned' uses WAL so readers never block the chat
+# writer, relaxes fsyncs to NORMAL (safe under WAL, may lose the last commits
+# on power loss but never corrupts), and sizes the page cache and mmap for a
+# single-node deployment. 'default' keeps SQLite's stock settings.
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,  # KiB, i.e. 64 MiB per connection
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,  # ms
+        'temp_store': 'MEMORY'
+    }
+}
+
+app.config['SQLITE_PROFILE'] = os.environ.get('MITRA_SQLITE_PROFILE', 'tuned')
+app.config['SQLITE_PRAGMAS'] = SQLITE_PROFILES[app.config['SQLITE_PROFILE']]
+
+if app.config['SQLALCHEMY_DATABASE_URI'] not in ('sqlite://', 'sqlite:///:memory:'):
+    # In-memory databases use a single static connection; file databases get a
+    # bounded pool sized for the worker's thread count.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('MITRA_DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('MITRA_DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 3600
+    }
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
 db = SQLAlchemy(app)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+class JSONText(db.TypeDecorator):
+    """JSON document stored as TEXT.
+
+    Values are encoded on write and decoded on read, so models and
+    serializers deal in lists and dicts and nothing calls json.loads on a
+    column. ``column.has_element(value)`` filters on an array element in
+    SQL through SQLite's JSON1 ``json_each``; tags and languages, which are
+    filtered on request paths, also have indexed element tables.
+    """
+    impl = db.Text
+    cache_ok = True
+
+    class comparator_factory(db.TypeDecorator.Comparator):
+        def has_element(self, value):
+            elements = db.func.json_each(self.expr).table_valued('value')
+            return db.select(elements.c.value).where(elements.c.value == value).exists()
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else json.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else json.loads(value)
 
 # Database Models
 class User(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer)
     gender = db.Column(db.String(20))
@@ -40,6 +143,10 @@ class User(db.Model):
     risk_level = db.Column(db.String(20), default='low')  # low, medium, high, crisis
     last_screening = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
+
 class Counselor(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
@@ -47,8 +154,8 @@ class Counselor(db.Model):
     specialization = db.Column(db.String(200))
     qualifications = db.Column(db.Text)
     experience_years = db.Column(db.Integer)
-    languages = db.Column(db.String(200))  # JSON string
-    availability = db.Column(db.Text)  # JSON string of available slots
+    languages = db.Column(JSONText)  # list of language names; see CounselorLanguage
+    availability = db.Column(JSONText)  # list of "Monday 9:00-17:00" windows; see CounselorSlot
     rating = db.Column(db.Float, default=4.5)
     total_sessions = db.Column(db.Integer, default=0)
     bio = db.Column(db.Text)
@@ -73,6 +180,61 @@ class Appointment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_appointment_student_scheduled', 'student_id', 'scheduled_datetime'),
+        db.Index('ix_appointment_counselor_scheduled', 'counselor_id', 'scheduled_datetime'),
+    )
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+AVAILABILITY_PATTERN = re.compile(r'^\s*(\w+)\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$')
+
+def parse_availability(availability):
+    """Parse Counselor.availability into ``(weekday, start_minute, end_minute)`` windows.
+
+    Entries look like ``"Monday 9:00-17:00"``; anything that does not parse
+    is ignored so free-text notes in the list never block a save.
+    """
+    windows = []
+    for entry in availability or []:
+        match = AVAILABILITY_PATTERN.match(str(entry))
+        if not match or match.group(1).lower() not in WEEKDAYS:
+            continue
+        day, start_h, start_m, end_h, end_m = match.groups()
+        start, end = int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m)
+        if 0 <= start < end <= 24 * 60:
+            windows.append((WEEKDAYS.index(day.lower()), start, end))
+    return windows
+
+class CounselorSlot(db.Model):
+    # Structured copy of Counselor.availability, kept in sync on every save
+    id = db.Column(db.Integer, primary_key=True)
+    counselor_id = db.Column(db.String(36), db.ForeignKey('counselor.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday
+    start_minute = db.Column(db.Integer, nullable=False)
+    end_minute = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_counselor_slot_counselor_weekday', 'counselor_id', 'weekday', 'start_minute'),
+    )
+
+def sync_counselor_slots(connection, counselor_id, availability):
+    connection.execute(db.delete(CounselorSlot).where(CounselorSlot.counselor_id == counselor_id))
+    windows = parse_availability(availability)
+    if windows:
+        connection.execute(db.insert(CounselorSlot), [
+            {'counselor_id': counselor_id, 'weekday': day, 'start_minute': start, 'end_minute': end}
+            for day, start, end in windows
+        ])
+
+@event.listens_for(Counselor, 'after_insert')
+def create_counselor_slots(mapper, connection, counselor):
+    sync_counselor_slots(connection, counselor.id, counselor.availability)
+
+@event.listens_for(Counselor, 'after_update')
+def refresh_counselor_slots(mapper, connection, counselor):
+    if db.inspect(counselor).attrs.availability.history.has_changes():
+        sync_counselor_slots(connection, counselor.id, counselor.availability)
+
 class ChatSession(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'))
@@ -81,8 +243,18 @@ class ChatSession(db.Model):
     ended_at = db.Column(db.DateTime)
     status = db.Column(db.String(20), default='active')  # active, ended, escalated
     crisis_detected = db.Column(db.Boolean, default=False)
-    sentiment_score = db.Column(db.Float, default=0.0)
-    topics = db.Column(db.Text)  # JSON string of detected topics
+    # Running aggregates kept by session_aggregate_update(); see chat-aggregates-rebuild
+    sentiment_score = db.Column(db.Float, default=0.0)  # exponentially weighted, -1 (negative) to 1 (positive)
+    topics = db.Column(JSONText)  # CHAT_TOPICS seen in the session
+    topic_counts = db.Column(JSONText)  # CHAT_TOPICS -> user messages that matched
+    message_count = db.Column(db.Integer, default=0)
+    archived_at = db.Column(db.DateTime)  # messages moved to the chat archive; see ChatArchive
+
+    __table_args__ = (
+        db.Index('ix_chat_session_started_at', 'started_at'),
+        db.Index('ix_chat_session_crisis_started_at', 'crisis_detected', 'started_at'),
+        db.Index('ix_chat_session_user_started_at_id', 'user_id', 'started_at', 'id'),
+    )
 
 class ChatMessage(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -92,9 +264,24 @@ class ChatMessage(db.Model):
     message = db.Column(db.Text, nullable=False)
     message_type = db.Column(db.String(20), default='text')  # text, resource, crisis_alert
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    crisis_keywords = db.Column(db.Text)  # JSON array of detected keywords
+    crisis_keywords = db.Column(JSONText)  # list of detected keywords, NULL when none
+    crisis_flag = db.Column(db.Boolean, nullable=False, default=False)
     sentiment = db.Column(db.String(20))  # positive, negative, neutral
 
+    __table_args__ = (
+        db.Index('ix_chat_message_session_timestamp_id', 'session_id', 'timestamp', 'id'),
+        # Crisis feed and alert replay; only flagged rows are indexed
+        db.Index('ix_chat_message_crisis_flag_timestamp', 'timestamp', 'id',
+                 sqlite_where=db.text('crisis_flag = 1')),
+    )
+
+def crisis_columns(crisis_keywords):
+    """``crisis_keywords``/``crisis_flag`` values for an AI message with the given keyword hits."""
+    return {
+        'crisis_keywords': list(crisis_keywords) if crisis_keywords else None,
+        'crisis_flag': bool(crisis_keywords)
+    }
+
 class Resource(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(200), nullable=False)
@@ -106,7 +293,7 @@ class Resource(db.Model):
     file_path = db.Column(db.String(500))
     duration = db.Column(db.Integer)  # for videos/audio in seconds
     difficulty_level = db.Column(db.String(20), default='beginner')  # beginner, intermediate, advanced
-    tags = db.Column(db.Text)  # JSON array
+    tags = db.Column(JSONText)  # list of tags; see ResourceTag
     view_count = db.Column(db.Integer, default=0)
     rating = db.Column(db.Float, default=0.0)
     created_by = db.Column(db.String(36), db.ForeignKey('user.id'))
@@ -114,13 +301,25 @@ class Resource(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_featured = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index('ix_resource_language_created_at', 'language', 'created_at'),
+        db.Index('ix_resource_language_category_created_at', 'language', 'category', 'created_at'),
+    )
+
+FORUM_PREVIEW_LENGTH = 500
+
+def forum_preview(content):
+    return content[:FORUM_PREVIEW_LENGTH] + '...' if len(content) > FORUM_PREVIEW_LENGTH else content
+
 class ForumPost(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     author_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
+    # Stored list-view excerpt so feeds never read full post bodies
+    preview = db.Column(db.Text, default=lambda ctx: forum_preview(ctx.get_current_parameters()['content']))
     category = db.Column(db.String(50))
-    tags = db.Column(db.Text)  # JSON array
+    tags = db.Column(JSONText)  # list of tags; see ForumPostTag
     upvotes = db.Column(db.Integer, default=0)
     downvotes = db.Column(db.Integer, default=0)
     view_count = db.Column(db.Integer, default=0)
@@ -132,6 +331,93 @@ class ForumPost(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_forum_post_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_forum_post_status_category_created_at_id', 'status', 'category', 'created_at', 'id'),
+    )
+
+@event.listens_for(ForumPost, 'before_update')
+def refresh_forum_preview(mapper, connection, post):
+    if db.inspect(post).attrs.content.history.has_changes():
+        post.preview = forum_preview(post.content)
+
+# Element tables: one row per tag or language of a JSON list column, so
+# "resources tagged X" and "counselors speaking Y" are index lookups.
+# Elements are stored trimmed and lower-cased; filter with element_filter().
+class CounselorLanguage(db.Model):
+    counselor_id = db.Column(db.String(36), db.ForeignKey('counselor.id'), primary_key=True)
+    language = db.Column(db.String(100), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_counselor_language_language', 'language', 'counselor_id'),
+    )
+
+class ResourceTag(db.Model):
+    resource_id = db.Column(db.String(36), db.ForeignKey('resource.id'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_resource_tag_tag', 'tag', 'resource_id'),
+    )
+
+class ForumPostTag(db.Model):
+    post_id = db.Column(db.String(36), db.ForeignKey('forum_post.id'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_forum_post_tag_tag', 'tag', 'post_id'),
+    )
+
+# (model, JSON list attribute) -> (owner column, element column)
+ELEMENT_TABLES = {
+    (Counselor, 'languages'): (CounselorLanguage.counselor_id, CounselorLanguage.language),
+    (Resource, 'tags'): (ResourceTag.resource_id, ResourceTag.tag),
+    (ForumPost, 'tags'): (ForumPostTag.post_id, ForumPostTag.tag),
+}
+
+def element_key(value):
+    return str(value).strip().lower()
+
+def element_rows(owner_column, element_column, owner_id, values):
+    keys = {element_key(value) for value in values or []} - {''}
+    return [{owner_column.key: owner_id, element_column.key: key} for key in sorted(keys)]
+
+def sync_elements(connection, owner_column, element_column, owner_id, values):
+    connection.execute(db.delete(owner_column.table).where(owner_column == owner_id))
+    rows = element_rows(owner_column, element_column, owner_id, values)
+    if rows:
+        connection.execute(db.insert(owner_column.table), rows)
+
+def rebuild_element_table(model, attribute, owner_column, element_column, batch_size=5000):
+    connection = db.session.connection()
+    connection.execute(db.delete(owner_column.table))
+    rows = []
+    for owner_id, values in db.session.execute(db.select(model.id, getattr(model, attribute))):
+        rows.extend(element_rows(owner_column, element_column, owner_id, values))
+        if len(rows) >= batch_size:
+            connection.execute(db.insert(owner_column.table), rows)
+            rows = []
+    if rows:
+        connection.execute(db.insert(owner_column.table), rows)
+
+def keep_elements_in_sync(model, attribute, owner_column, element_column):
+    @event.listens_for(model, 'after_insert')
+    def create_elements(mapper, connection, target):
+        sync_elements(connection, owner_column, element_column, target.id, getattr(target, attribute))
+
+    @event.listens_for(model, 'after_update')
+    def refresh_elements(mapper, connection, target):
+        if getattr(db.inspect(target).attrs, attribute).history.has_changes():
+            sync_elements(connection, owner_column, element_column, target.id, getattr(target, attribute))
+
+for (model, attribute), (owner_column, element_column) in ELEMENT_TABLES.items():
+    keep_elements_in_sync(model, attribute, owner_column, element_column)
+
+def element_filter(model, attribute, value):
+    """Criterion for ``model`` rows whose ``attribute`` list contains ``value``, ignoring case."""
+    owner_column, element_column = ELEMENT_TABLES[(model, attribute)]
+    return model.id.in_(db.select(owner_column).where(element_column == element_key(value)))
+
 class ForumReply(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     post_id = db.Column(db.String(36), db.ForeignKey('forum_post.id'), nullable=False)
@@ -149,21 +435,351 @@ class ScreeningResponse(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     screening_type = db.Column(db.String(20), nullable=False)  # phq9, gad7, ghq
-    responses = db.Column(db.Text, nullable=False)  # JSON of question-answer pairs
+    responses = db.Column(JSONText, nullable=False)  # question id -> answer score
     total_score = db.Column(db.Integer, nullable=False)
     risk_level = db.Column(db.String(20), nullable=False)
-    recommendations = db.Column(db.Text)  # JSON array of recommendations
+    recommendations = db.Column(JSONText)  # list of recommendations
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_screening_response_completed_at', 'completed_at'),
+        db.Index('ix_screening_response_user_completed_at', 'user_id', 'completed_at'),
+    )
+
 class Analytics(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     date = db.Column(db.Date, nullable=False)
     metric_type = db.Column(db.String(50), nullable=False)
     metric_name = db.Column(db.String(100), nullable=False)
     value = db.Column(db.Float, nullable=False)
-    additional_data = db.Column(db.Text)  # JSON additional data
+    additional_data = db.Column(JSONText)
+
+    __table_args__ = (
+        db.Index('ix_analytics_metric_day', 'date', 'metric_type', 'metric_name', unique=True),
+    )
+
+class SchemaMigration(db.Model):
+    id = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Schema migrations for existing databases. db.create_all() only creates
+# missing tables, so anything else (virtual tables, triggers, new columns,
+# backfills) is applied here once and recorded in SchemaMigration.
+MIGRATIONS = []
+
+def migration(name):
+    def register(fn):
+        MIGRATIONS.append((name, fn))
+        return fn
+    return register
+
+def upgrade_database():
+    db.create_all()
+    applied = {m.id for m in SchemaMigration.query.all()}
+    for name, fn in MIGRATIONS:
+        if name in applied:
+            continue
+        fn()
+        db.session.add(SchemaMigration(id=name))
+        db.session.commit()
+        print(f"Applied migration {name}")
+
+def add_column_if_missing(table, column, definition):
+    columns = {row[1] for row in db.session.execute(db.text(f'PRAGMA table_info("{table}")'))}
+    if column in columns:
+        return False
+    db.session.execute(db.text(f'ALTER TABLE "{table}" ADD COLUMN {column} {definition}'))
+    return True
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations."""
+    upgrade_database()
+
+# Full-text index over ChatMessage.message (SQLite FTS5, external content)
+CHAT_MESSAGE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_fts
+       USING fts5(message, content='chat_message', content_rowid='rowid')""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_insert AFTER INSERT ON chat_message BEGIN
+           INSERT INTO chat_message_fts(rowid, message) VALUES (new.rowid, new.message);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_delete AFTER DELETE ON chat_message BEGIN
+           INSERT INTO chat_message_fts(chat_message_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_update AFTER UPDATE OF message ON chat_message BEGIN
+           INSERT INTO chat_message_fts(chat_message_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+           INSERT INTO chat_message_fts(rowid, message) VALUES (new.rowid, new.message);
+       END"""
+]
+
+CHAT_TOPIC_TERMS = {
+    'anxiety': ['anxious', 'anxiety'],
+    'depression': ['depressed', 'depression']
+}
+
+@migration('0001_chat_message_fts')
+def create_chat_message_fts():
+    for statement in CHAT_MESSAGE_FTS_DDL:
+        db.session.execute(db.text(statement))
+    # Backfill the index from the rows already in chat_message
+    db.session.execute(db.text("INSERT INTO chat_message_fts(chat_message_fts) VALUES ('rebuild')"))
+
+def fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+def count_chat_messages_matching(terms):
+    # Prefix match on each term, e.g. "anxious"* OR "anxiety"*
+    query = ' OR '.join(fts_phrase(term) + '*' for term in terms)
+    return db.session.execute(
+        db.text("SELECT count(*) FROM chat_message_fts WHERE chat_message_fts MATCH :query"),
+        {'query': query}
+    ).scalar()
+
+def search_chat_messages(text, limit):
+    # Every word in ``text`` must appear; results are ranked by bm25
+    words = text.split()
+    if not words:
+        return []
+    query = ' AND '.join(fts_phrase(word) for word in words)
+    statement = db.select(ChatMessage).from_statement(db.text("""
+        SELECT chat_message.*
+        FROM chat_message_fts
+        JOIN chat_message ON chat_message.rowid = chat_message_fts.rowid
+        WHERE chat_message_fts MATCH :query
+        ORDER BY chat_message_fts.rank
+        LIMIT :limit
+    """))
+    return db.session.execute(statement, {'query': query, 'limit': limit}).scalars().all()
+
+# Analytics rollups. Each row holds one day's change for one metric, so
+# totals are a SUM over a few hundred rows instead of COUNT(*) over the raw
+# tables. Events record their delta in the same transaction as the write.
+def metric_upsert(metric_type, metric_name, delta=1, day=None):
+    statement = sqlite_insert(Analytics).values(
+        date=day or datetime.utcnow().date(),
+        metric_type=metric_type,
+        metric_name=metric_name,
+        value=delta
+    )
+    return statement.on_conflict_do_update(
+        index_elements=['date', 'metric_type', 'metric_name'],
+        set_={'value': Analytics.value + statement.excluded.value}
+    )
+
+def record_metric(metric_type, metric_name, delta=1, day=None):
+    db.session.execute(metric_upsert(metric_type, metric_name, delta, day))
+
+def record_risk_change(old_level, new_level):
+    if old_level == new_level:
+        return
+    if old_level:
+        record_metric('risk_level', old_level, -1)
+    if new_level:
+        record_metric('risk_level', new_level)
+
+def analytics_snapshot():
+    """Dashboard totals from the rollups.
+
+    Rollups are per day, so ``new_users_week`` counts today and the six days
+    before it rather than the last 7 x 24 hours the raw query used.
+    """
+    totals = {}
+    for metric_type, metric_name, value in db.session.query(
+        Analytics.metric_type, Analytics.metric_name, db.func.sum(Analytics.value)
+    ).group_by(Analytics.metric_type, Analytics.metric_name):
+        totals[(metric_type, metric_name)] = int(value)
+    
+    week_ago = (datetime.utcnow() - timedelta(days=7)).date()
+    new_users_week = db.session.query(db.func.sum(Analytics.value)).filter(
+        Analytics.metric_type == 'users',
+        Analytics.metric_name == 'registrations',
+        Analytics.date > week_ago
+    ).scalar()
+    
+    return {
+        'overview': {
+            'total_users': totals.get(('users', 'registrations'), 0),
+            'total_sessions': totals.get(('chat', 'sessions'), 0),
+            'crisis_sessions': totals.get(('chat', 'crisis_sessions'), 0),
+            'total_appointments': totals.get(('appointments', 'booked'), 0),
+            'new_users_week': int(new_users_week or 0)
+        },
+        'risk_distribution': {
+            name: value for (metric_type, name), value in totals.items()
+            if metric_type == 'risk_level' and value
+        },
+        'screenings': {
+            name: value for (metric_type, name), value in totals.items()
+            if metric_type == 'screening' and value
+        }
+    }
+
+def raw_rollup_counts():
+    """Per-day counts for every rollup metric, computed from the raw tables."""
+    day = db.func.date
+    queries = [
+        ('users', db.literal('registrations'), User.created_at, User.query),
+        ('risk_level', User.risk_level, User.created_at, User.query),
+        ('chat', db.literal('sessions'), ChatSession.started_at, ChatSession.query),
+        ('chat', db.literal('crisis_sessions'), ChatSession.started_at,
+         ChatSession.query.filter_by(crisis_detected=True)),
+        ('screening', ScreeningResponse.screening_type, ScreeningResponse.completed_at, ScreeningResponse.query),
+        ('appointments', db.literal('booked'), Appointment.created_at, Appointment.query)
+    ]
+    counts = {}
+    for metric_type, name_column, date_column, query in queries:
+        rows = query.with_entities(day(date_column), name_column, db.func.count()).group_by(
+            day(date_column), name_column
+        )
+        for date_value, metric_name, count in rows:
+            if date_value is None or metric_name is None:
+                continue
+            key = (datetime.strptime(date_value, '%Y-%m-%d').date(), metric_type, metric_name)
+            counts[key] = counts.get(key, 0) + count
+    return counts
+
+ROLLUP_METRIC_TYPES = ('users', 'risk_level', 'chat', 'screening', 'appointments')
+
+def rebuild_analytics():
+    Analytics.query.filter(Analytics.metric_type.in_(ROLLUP_METRIC_TYPES)).delete(synchronize_session=False)
+    rows = [{'date': date_value, 'metric_type': metric_type, 'metric_name': metric_name, 'value': count}
+            for (date_value, metric_type, metric_name), count in raw_rollup_counts().items()]
+    if rows:
+        db.session.execute(db.insert(Analytics), rows)
+    db.session.commit()
+    return len(rows)
+
+def check_analytics():
+    """Compare rollup totals with the raw tables; return a list of mismatches."""
+    expected = {}
+    for (_, metric_type, metric_name), count in raw_rollup_counts().items():
+        expected[(metric_type, metric_name)] = expected.get((metric_type, metric_name), 0) + count
+    
+    actual = {}
+    for metric_type, metric_name, value in db.session.query(
+        Analytics.metric_type, Analytics.metric_name, db.func.sum(Analytics.value)
+    ).filter(Analytics.metric_type.in_(ROLLUP_METRIC_TYPES)).group_by(Analytics.metric_type, Analytics.metric_name):
+        actual[(metric_type, metric_name)] = int(value)
+    
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        if expected.get(key, 0) != actual.get(key, 0):
+            mismatches.append((key, expected.get(key, 0), actual.get(key, 0)))
+    return mismatches
+
+@migration('0002_analytics_rollups')
+def backfill_analytics_rollups():
+    for index in Analytics.__table__.indexes:
+        index.create(db.session.connection(), checkfirst=True)
+    rebuild_analytics()
+
+def create_indexes(*names):
+    # CREATE INDEX only; existing rows are untouched. Each migration names its
+    # indexes, since the current metadata may index columns a later migration adds
+    connection = db.session.connection()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in names:
+                index.create(connection, checkfirst=True)
+    db.session.execute(db.text('ANALYZE'))
+
+@migration('0003_secondary_indexes')
+def create_secondary_indexes():
+    create_indexes(
+        'ix_user_created_at_id',
+        'ix_appointment_student_scheduled', 'ix_appointment_counselor_scheduled',
+        'ix_chat_session_started_at', 'ix_chat_session_crisis_started_at',
+        'ix_resource_language_created_at', 'ix_resource_language_category_created_at',
+        'ix_screening_response_completed_at', 'ix_screening_response_user_completed_at'
+    )
+
+@migration('0004_forum_post_preview')
+def add_forum_post_preview():
+    add_column_if_missing('forum_post', 'preview', 'TEXT')
+    db.session.execute(db.text("""
+        UPDATE forum_post SET preview = CASE
+            WHEN length(content) > :size THEN substr(content, 1, :size) || '...'
+            ELSE content
+        END
+        WHERE preview IS NULL
+    """), {'size': FORUM_PREVIEW_LENGTH})
+    # Feed keyset order is (created_at, id); replace the indexes without id
+    db.session.execute(db.text('DROP INDEX IF EXISTS ix_forum_post_status_created_at'))
+    db.session.execute(db.text('DROP INDEX IF EXISTS ix_forum_post_status_category_created_at'))
+    create_indexes('ix_forum_post_status_created_at_id', 'ix_forum_post_status_category_created_at_id')
+
+@migration('0005_counselor_slots')
+def backfill_counselor_slots():
+    connection = db.session.connection()
+    for counselor_id, availability in db.session.execute(db.select(Counselor.id, Counselor.availability)):
+        sync_counselor_slots(connection, counselor_id, availability)
+
+@migration('0006_chat_message_crisis_flag')
+def add_chat_message_crisis_flag():
+    add_column_if_missing('chat_message', 'crisis_flag', 'BOOLEAN NOT NULL DEFAULT 0')
+    # AI replies used to store '[]' when nothing matched, so IS NOT NULL selected all of them
+    db.session.execute(db.text("UPDATE chat_message SET crisis_keywords = NULL WHERE crisis_keywords = '[]'"))
+    db.session.execute(db.text("UPDATE chat_message SET crisis_flag = 1 WHERE crisis_keywords IS NOT NULL"))
+    db.session.execute(db.text('DROP INDEX IF EXISTS ix_chat_message_crisis_timestamp'))
+    create_indexes('ix_chat_message_crisis_flag_timestamp')
+
+@migration('0007_chat_history_indexes')
+def add_chat_history_indexes():
+    # History and session lists page on (timestamp, id); replace the indexes without id
+    db.session.execute(db.text('DROP INDEX IF EXISTS ix_chat_message_session_timestamp'))
+    db.session.execute(db.text('DROP INDEX IF EXISTS ix_chat_session_user_started_at'))
+    create_indexes('ix_chat_message_session_timestamp_id', 'ix_chat_session_user_started_at_id')
+
+@migration('0008_chat_session_archived_at')
+def add_chat_session_archived_at():
+    add_column_if_missing('chat_session', 'archived_at', 'DATETIME')
+
+@migration('0009_element_tables')
+def backfill_element_tables():
+    # Rows that are not a JSON array (never written by the app) are reset rather than failing the decode
+    for model, attribute in ELEMENT_TABLES:
+        table, column = model.__tablename__, getattr(model, attribute).name
+        db.session.execute(db.text(
+            f'UPDATE "{table}" SET "{column}" = NULL WHERE "{column}" IS NOT NULL '
+            f'AND (NOT json_valid("{column}") OR json_type("{column}") != \'array\')'
+        ))
+    for (model, attribute), (owner_column, element_column) in ELEMENT_TABLES.items():
+        rebuild_element_table(model, attribute, owner_column, element_column)
+    db.session.execute(db.text('ANALYZE'))
+
+@migration('0010_chat_session_aggregates')
+def add_chat_session_aggregates():
+    add_column_if_missing('chat_session', 'topic_counts', 'TEXT')
+    add_column_if_missing('chat_session', 'message_count', 'INTEGER DEFAULT 0')
+    rebuild_session_aggregates()
+
+@app.cli.command('analytics-rebuild')
+def analytics_rebuild_command():
+    """Recompute the analytics rollups from the raw tables."""
+    print(f"Rebuilt {rebuild_analytics()} analytics rows")
+
+@app.cli.command('analytics-check')
+def analytics_check_command():
+    """Verify the analytics rollups against the raw tables."""
+    mismatches = check_analytics()
+    for (metric_type, metric_name), expected, actual in mismatches:
+        print(f"{metric_type}/{metric_name}: raw={expected} rollup={actual}")
+    if mismatches:
+        raise SystemExit(1)
+    print("Analytics rollups match the raw tables")
 
 # AI Chat Response System
+KEYWORD_LEXICONS = {
+    'crisis': 'crisis_keywords',
+    'anxiety': 'anxiety_keywords',
+    'depression': 'depression_keywords',
+    'stress': 'stress_keywords',
+    'positive': 'positive_words',
+    'negative': 'negative_words'
+}
+
+CHAT_TOPICS = ['anxiety', 'depression', 'stress']
+
 class MentalHealthChatBot:
     def __init__(self):
         self.crisis_keywords = [
@@ -187,24 +803,44 @@ class MentalHealthChatBot:
             'deadlines', 'workload', 'burnout', 'exhausted'
         ]
 
+        self.positive_words = ['good', 'better', 'happy', 'great', 'fine', 'okay', 'well']
+        self.negative_words = ['bad', 'worse', 'terrible', 'awful', 'horrible', 'sad', 'angry']
+
+        self._compile_matcher()
+
+    def _compile_matcher(self):
+        self.matcher = KeywordMatcher({
+            category: getattr(self, attr) for category, attr in KEYWORD_LEXICONS.items()
+        })
+
+    def configure_keywords(self, **lexicons):
+        """Replace one or more keyword lists at runtime and recompile the matcher."""
+        for category, keywords in lexicons.items():
+            if category not in KEYWORD_LEXICONS:
+                raise ValueError(f'Unknown keyword category: {category}')
+            if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+                raise ValueError('Keyword lists must be arrays of strings')
+        # An empty crisis list would silently switch crisis detection off
+        if 'crisis' in lexicons and not any(keyword.strip() for keyword in lexicons['crisis']):
+            raise ValueError('The crisis keyword list cannot be empty')
+        for category, keywords in lexicons.items():
+            setattr(self, KEYWORD_LEXICONS[category], list(keywords))
+        self._compile_matcher()
+
+    def analyze(self, message):
+        # Single scan of the message for every keyword category
+        return self.matcher.categorize(message)
+
     def detect_crisis(self, message):
-        message_lower = message.lower()
-        detected_keywords = []
-        
-        for keyword in self.crisis_keywords:
-            if keyword in message_lower:
-                detected_keywords.append(keyword)
-        
+        detected_keywords = self.analyze(message)['crisis']
         return len(detected_keywords) > 0, detected_keywords
 
-    def analyze_sentiment(self, message):
+    def analyze_sentiment(self, message, matches=None):
         # Simple sentiment analysis
-        positive_words = ['good', 'better', 'happy', 'great', 'fine', 'okay', 'well']
-        negative_words = ['bad', 'worse', 'terrible', 'awful', 'horrible', 'sad', 'angry']
-        
-        message_lower = message.lower()
-        positive_count = sum(1 for word in positive_words if word in message_lower)
-        negative_count = sum(1 for word in negative_words if word in message_lower)
+        if matches is None:
+            matches = self.analyze(message)
+        positive_count = len(matches['positive'])
+        negative_count = len(matches['negative'])
         
         if negative_count > positive_count:
             return 'negative'
@@ -212,10 +848,23 @@ class MentalHealthChatBot:
             return 'positive'
         return 'neutral'
 
+    def classify(self, message):
+        matches = self.analyze(message)
+        return {
+            'crisis_detected': len(matches['crisis']) > 0,
+            'crisis_keywords': matches['crisis'],
+            'sentiment': self.analyze_sentiment(message, matches),
+            'topics': [topic for topic in CHAT_TOPICS if matches[topic]]
+        }
+
+    def classify_batch(self, messages):
+        return [self.classify(message) for message in messages]
+
     def get_response(self, message, user_id=None):
-        message_lower = message.lower()
-        is_crisis, crisis_keywords = self.detect_crisis(message)
-        sentiment = self.analyze_sentiment(message)
+        matches = self.analyze(message)
+        crisis_keywords = matches['crisis']
+        is_crisis = len(crisis_keywords) > 0
+        sentiment = self.analyze_sentiment(message, matches)
         
         response_data = {
             'message': '',
@@ -224,6 +873,7 @@ class MentalHealthChatBot:
             'crisis_detected': is_crisis,
             'crisis_keywords': crisis_keywords,
             'sentiment': sentiment,
+            'topics': [topic for topic in CHAT_TOPICS if matches[topic]],
             'follow_up_questions': []
         }
         
@@ -236,7 +886,7 @@ class MentalHealthChatBot:
                     {'type': 'emergency', 'name': 'Emergency Services', 'number': '112'}
                 ]
             })
-        elif any(keyword in message_lower for keyword in self.anxiety_keywords):
+        elif matches['anxiety']:
             response_data.update({
                 'message': "I can hear that you're feeling anxious. Let's try a grounding technique: Name 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste. This can help bring you back to the present moment.",
                 'type': 'support',
@@ -250,7 +900,7 @@ class MentalHealthChatBot:
                     "Would you like to book a session with a counselor?"
                 ]
             })
-        elif any(keyword in message_lower for keyword in self.depression_keywords):
+        elif matches['depression']:
             response_data.update({
                 'message': "I understand you're going through a difficult time. Depression can make everything feel overwhelming, but you're not alone. Small steps matter - even reaching out here shows your strength.",
                 'type': 'support',
@@ -264,7 +914,7 @@ class MentalHealthChatBot:
                     "Would you like help connecting with a counselor?"
                 ]
             })
-        elif any(keyword in message_lower for keyword in self.stress_keywords):
+        elif matches['stress']:
             response_data.update({
                 'message': "Academic stress is very common among students in J&K. You're not alone in feeling this way. Let's work on some strategies to manage this stress effectively.",
                 'type': 'support',
@@ -294,6 +944,1919 @@ class MentalHealthChatBot:
 # Initialize chatbot
 chatbot = MentalHealthChatBot()
 
+# Per-session aggregates. Every exchange updates its session in the same
+# transaction with one UPDATE that does the arithmetic in SQL, so batched
+# and concurrent writers never read-modify-write: message_count, a count
+# per CHAT_TOPICS entry, and sentiment_score as an exponentially weighted
+# average of the user messages' sentiment.
+SENTIMENT_SCORES = {'positive': 1.0, 'neutral': 0.0, 'negative': -1.0}
+
+app.config['SESSION_SENTIMENT_ALPHA'] = float(os.environ.get('MITRA_SESSION_SENTIMENT_ALPHA', 0.3))
+
+def session_aggregate_params(session_id, response_data, messages=2):
+    """Parameters of session_aggregate_update() for one exchange."""
+    params = {
+        'b_session_id': session_id,
+        'b_messages': messages,
+        'b_sentiment': SENTIMENT_SCORES.get(response_data['sentiment'], 0.0)
+    }
+    params.update({f'b_{topic}': int(topic in response_data['topics']) for topic in CHAT_TOPICS})
+    return params
+
+def session_aggregate_update():
+    """UPDATE applying one exchange to its session; execute with session_aggregate_params() rows, in order."""
+    table = ChatSession.__table__
+    counts = db.func.coalesce(table.c.topic_counts, db.literal('{}', db.Text))
+    increments = []
+    for topic in CHAT_TOPICS:
+        current = db.func.coalesce(db.func.json_extract(table.c.topic_counts, f'$.{topic}'), 0)
+        increments += [f'$.{topic}', current + db.bindparam(f'b_{topic}')]
+    new_counts = db.func.json_set(counts, *increments)
+    entries = db.func.json_each(new_counts).table_valued('key', 'value')
+    
+    score = db.func.coalesce(table.c.sentiment_score, 0.0)
+    alpha = db.literal(app.config['SESSION_SENTIMENT_ALPHA'])
+    return db.update(table).where(table.c.id == db.bindparam('b_session_id')).values(
+        message_count=db.func.coalesce(table.c.message_count, 0) + db.bindparam('b_messages'),
+        sentiment_score=db.case(
+            (db.func.coalesce(table.c.message_count, 0) == 0, db.bindparam('b_sentiment')),
+            else_=score + alpha * (db.bindparam('b_sentiment') - score)
+        ),
+        topic_counts=new_counts,
+        topics=db.select(db.func.json_group_array(entries.c.key)).where(entries.c.value > 0).scalar_subquery()
+    )
+
+def session_aggregates(messages, topics):
+    """Aggregates of one session from its messages, oldest first, as session_aggregate_update() leaves them.
+
+    ``messages`` have sender_type and sentiment attributes; ``topics``
+    holds the matched CHAT_TOPICS of each user message, in order.
+    """
+    alpha = app.config['SESSION_SENTIMENT_ALPHA']
+    counts = {topic: 0 for topic in CHAT_TOPICS}
+    for matched in topics:
+        for topic in matched:
+            counts[topic] += 1
+    score = None
+    for m in messages:
+        # The AI reply carries the sentiment of the user message it answers
+        if m.sender_type == 'ai':
+            value = SENTIMENT_SCORES.get(m.sentiment, 0.0)
+            score = value if score is None else score + alpha * (value - score)
+    if not messages:
+        return {'message_count': 0, 'sentiment_score': 0.0, 'topic_counts': None, 'topics': None}
+    return {
+        'message_count': len(messages),
+        'sentiment_score': score if score is not None else 0.0,
+        'topic_counts': counts,
+        'topics': [topic for topic in CHAT_TOPICS if counts[topic]]
+    }
+
+def rebuild_session_aggregates(batch_size=500, progress=None):
+    """Recompute every session's aggregates from its hot and archived messages.
+
+    User messages are re-classified with the current keyword lists, so this
+    also brings sessions up to date after chat-rescore. Sessions are walked
+    in (started_at, id) order and updated one batch per transaction; an
+    exchange written to a session while its batch is being computed is
+    overwritten, so run it when chat traffic is low.
+    """
+    stats = {'sessions': 0, 'messages': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    archive = chat_archive()
+    after = None
+    while True:
+        sessions = keyset_page(
+            db.session.query(ChatSession.id, ChatSession.started_at, ChatSession.archived_at),
+            ChatSession.started_at, ChatSession.id, batch_size, after, oldest_first=True
+        ).all()
+        if not sessions:
+            break
+        after = (sessions[-1].started_at, sessions[-1].id)
+        
+        messages = {s.id: {} for s in sessions}
+        for s in sessions:
+            if s.archived_at:
+                messages[s.id].update((m['id'], SimpleNamespace(**m)) for m in archive.messages(s.id, s.started_at))
+        for m in db.session.query(
+            ChatMessage.id, ChatMessage.session_id, ChatMessage.sender_type, ChatMessage.message,
+            ChatMessage.sentiment, ChatMessage.timestamp
+        ).filter(ChatMessage.session_id.in_(list(messages))):
+            messages[m.session_id][m.id] = m
+        
+        updates = []
+        for session_id, rows in messages.items():
+            rows = sorted(rows.values(), key=lambda m: (m.timestamp, m.id))
+            prompts = [m.message for m in rows if m.sender_type == 'user']
+            topics = [result['topics'] for result in chatbot.classify_batch(prompts)]
+            updates.append({'id': session_id, **session_aggregates(rows, topics)})
+            stats['messages'] += len(rows)
+        db.session.execute(db.update(ChatSession), updates)
+        db.session.commit()
+        
+        stats['sessions'] += len(sessions)
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+        if len(sessions) < batch_size:
+            break
+    
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+@app.cli.command('chat-aggregates-rebuild')
+@click.option('--batch-size', default=500, show_default=True, help='Sessions recomputed per transaction.')
+def chat_aggregates_rebuild_command(batch_size):
+    """Recompute session sentiment, topic counts and message counts from the stored messages."""
+    def progress(stats):
+        print(f"{stats['sessions']} sessions, {stats['messages']} messages, {stats['seconds']:.1f}s")
+    
+    stats = rebuild_session_aggregates(batch_size, progress)
+    print(f"Rebuilt aggregates of {stats['sessions']} sessions in {stats['seconds']:.1f}s")
+
+# Write-behind persistence for chat traffic
+def chat_exchange_rows(user_id, session_id, message, response_data):
+    """Rows for one chat exchange as ``(session_id, {'sessions', 'messages', 'aggregates', 'metrics'})``.
+
+    A new session is added when ``session_id`` is empty; ``aggregates``
+    holds the session_aggregate_update() parameters and ``metrics`` lists
+    the ``(metric_type, metric_name)`` rollups to increment.
+    """
+    now = datetime.utcnow()
+    item = {'sessions': [], 'messages': [], 'aggregates': [], 'metrics': []}
+    
+    if not session_id:
+        session_id = str(uuid.uuid4())
+        item['sessions'].append({'id': session_id, 'user_id': user_id, 'started_at': now})
+        item['metrics'].append(('chat', 'sessions'))
+    
+    item['messages'].append({
+        'id': str(uuid.uuid4()),
+        'session_id': session_id,
+        'sender_type': 'user',
+        'sender_id': user_id,
+        'message': message,
+        'message_type': 'text',
+        'timestamp': now,
+        'crisis_keywords': None,
+        'crisis_flag': False,
+        'sentiment': None
+    })
+    item['messages'].append({
+        'id': str(uuid.uuid4()),
+        'session_id': session_id,
+        'sender_type': 'ai',
+        'sender_id': None,
+        'message': response_data['message'],
+        'message_type': response_data['type'],
+        # Strictly after the user message so (timestamp, id) ordering keeps the pair in order
+        'timestamp': now + timedelta(microseconds=1),
+        **crisis_columns(response_data['crisis_keywords']),
+        'sentiment': response_data['sentiment']
+    })
+    item['aggregates'].append(session_aggregate_params(session_id, response_data))
+    return session_id, item
+
+class ChatWriteBehind:
+    """Queues non-crisis chat exchanges and commits them in batches.
+
+    A background thread drains the bounded queue every ``flush_interval``
+    seconds or as soon as ``batch_size`` exchanges are waiting, and writes
+    each batch in one transaction. It is the only writer while it runs, so
+    exchanges are written in the order they were queued, which the
+    session aggregates depend on. When the queue is full the caller waits
+    for room, so memory stays bounded.
+
+    Callers already have their reply, so a batch is never discarded: while
+    the database stays busy it is retried with backoff, and after any other
+    error the exchanges are written one at a time. One that still fails is
+    appended to the spill file (see chat_write_spill_path()) for
+    ``chat-write-replay``. ``flush`` waits only for the exchanges queued
+    before it was called; crisis messages call it before committing so
+    they land after the session's earlier messages.
+    """
+
+    def __init__(self, app, enabled, batch_size, flush_interval, max_queue):
+        self.app = app
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._hurry = threading.Event()
+        self._thread = None
+        # Queue entries are (sequence, item); flush waits for _written to reach _queued
+        self._queued = 0
+        self._written = 0
+        self._queue_lock = threading.Lock()
+        self._written_condition = threading.Condition()
+    
+    def enqueue(self, user_id, session_id, message, response_data, block=True):
+        """Queue one exchange and return its session id.
+
+        When the queue is full the caller waits for room, or with
+        ``block=False`` gets queue.Full and nothing is queued.
+        """
+        session_id, item = chat_exchange_rows(user_id, session_id, message, response_data)
+        
+        self._ensure_started()
+        # Numbered and queued under one lock so sequence order is queue order
+        if not self._queue_lock.acquire(blocking=block):
+            raise queue.Full
+        try:
+            entry = (self._queued + 1, item)
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                if not block:
+                    raise
+                # Backpressure: wait for the writer rather than grow the queue
+                self._hurry.set()
+                self.queue.put(entry)
+            self._queued = entry[0]
+        finally:
+            self._queue_lock.release()
+        return session_id
+    
+    def flush(self, timeout=None):
+        """Wait until everything queued before the call is written; False if ``timeout`` ran out first."""
+        if not self.enabled:
+            return True
+        target = self._queued
+        if self._thread is not None and self._thread.is_alive():
+            self._hurry.set()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            with self._written_condition:
+                while self._written < target and self._thread.is_alive():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._written_condition.wait(remaining)
+            if self._written >= target:
+                return True
+        # No writer thread (not started yet, or stopped): write on this thread
+        with self._write_lock:
+            while self._written < target:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    break
+                self._write(batch)
+        return True
+    
+    def stop(self):
+        self._stopping.set()
+        self._hurry.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+    
+    def replay_spill(self):
+        """Write the exchanges in the spill file; returns (written, already present, spilled again)."""
+        with self.app.app_context():
+            path = chat_write_spill_path()
+        replaying = f'{path}.replaying'
+        if not os.path.exists(replaying):
+            # An interrupted replay leaves its file behind; finish that one first
+            if not os.path.exists(path):
+                return 0, 0, 0
+            os.replace(path, replaying)
+        
+        written = present = failed = 0
+        with open(replaying) as f:
+            for line in f:
+                item = json.loads(line)
+                for row in item['sessions']:
+                    row['started_at'] = datetime.fromisoformat(row['started_at'])
+                for row in item['messages']:
+                    row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+                item['metrics'] = [tuple(key) for key in item['metrics']]
+                with self.app.app_context():
+                    exists = db.session.get(ChatMessage, item['messages'][0]['id']) is not None
+                    db.session.rollback()
+                if exists:
+                    present += 1
+                    continue
+                try:
+                    self._write_now([item])
+                    written += 1
+                except Exception:
+                    self.app.logger.exception('Failed to replay a spilled chat exchange')
+                    self._spill([item])
+                    failed += 1
+        os.remove(replaying)
+        return written, present, failed
+    
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='chat-write-behind', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+    
+    def _take(self, limit, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Give a short burst time to accumulate into one group commit, unless someone is waiting
+            if self.queue.qsize() < self.batch_size - 1:
+                self._hurry.wait(self.flush_interval)
+            with self._write_lock:
+                self._write(self._take(self.batch_size, first))
+            if self.queue.empty() and not self._stopping.is_set():
+                self._hurry.clear()
+    
+    def _write(self, batch):
+        self._write_items([item for _, item in batch])
+        with self._written_condition:
+            self._written = batch[-1][0]
+            self._written_condition.notify_all()
+    
+    def _write_items(self, items):
+        delay = BUSY_RETRY_DELAY
+        while True:
+            try:
+                self._write_now(items)
+                return
+            except (DatabaseBusy, WriteLockTimeout):
+                # Holding the batch keeps later exchanges in order; a full queue holds callers back meanwhile
+                if self._stopping.is_set():
+                    break
+                self.app.logger.warning('Database busy; retrying %d queued chat exchanges in %.2fs', len(items), delay)
+                time.sleep(delay * (1 + random.random()))
+                delay = min(delay * 2, CHAT_WRITE_MAX_RETRY_DELAY)
+            except Exception:
+                self.app.logger.exception('Failed to write %d queued chat exchanges', len(items))
+                if len(items) > 1:
+                    # One at a time, so a bad exchange does not take the rest of the batch with it
+                    for item in items:
+                        self._write_items([item])
+                    return
+                break
+        self._spill(items)
+    
+    def _spill(self, items):
+        with self.app.app_context():
+            path = chat_write_spill_path()
+        with open(path, 'a') as f:
+            for item in items:
+                f.write(json.dumps(item, default=datetime.isoformat) + '\n')
+        self.app.logger.error('Saved %d unwritten chat exchanges to %s; run chat-write-replay', len(items), path)
+    
+    def _write_now(self, items):
+        sessions = [row for item in items for row in item['sessions']]
+        messages = [row for item in items for row in item['messages']]
+        aggregates = [row for item in items for row in item['aggregates']]
+        metrics = {}
+        for item in items:
+            for key in item['metrics']:
+                metrics[key] = metrics.get(key, 0) + 1
+        
+        def insert():
+            if sessions:
+                db.session.execute(db.insert(ChatSession), sessions)
+            db.session.execute(db.insert(ChatMessage), messages)
+            db.session.execute(session_aggregate_update(), aggregates)
+            for (metric_type, metric_name), delta in metrics.items():
+                record_metric(metric_type, metric_name, delta)
+            db.session.commit()
+        
+        with self.app.app_context():
+            try:
+                run_with_busy_retry(insert)
+            except Exception:
+                db.session.rollback()
+                raise
+
+app.config['CHAT_WRITE_BEHIND'] = os.environ.get('MITRA_CHAT_WRITE_BEHIND', '0') == '1'
+app.config['CHAT_WRITE_BATCH_SIZE'] = int(os.environ.get('MITRA_CHAT_WRITE_BATCH_SIZE', 200))
+app.config['CHAT_WRITE_FLUSH_INTERVAL'] = float(os.environ.get('MITRA_CHAT_WRITE_FLUSH_INTERVAL', 0.05))
+app.config['CHAT_WRITE_QUEUE_SIZE'] = int(os.environ.get('MITRA_CHAT_WRITE_QUEUE_SIZE', 5000))
+app.config['CHAT_WRITE_SPILL_PATH'] = os.environ.get('MITRA_CHAT_WRITE_SPILL_PATH')
+CHAT_WRITE_MAX_RETRY_DELAY = 5.0
+
+def data_file_path(name):
+    """Path of a file the app keeps beside its data: next to the SQLite file, else in the instance folder."""
+    database_file = db.engine.url.database
+    if database_file in (None, '', ':memory:'):
+        return os.path.join(app.instance_path, name)
+    return os.path.join(os.path.dirname(os.path.abspath(database_file)), name)
+
+def chat_write_spill_path():
+    return app.config['CHAT_WRITE_SPILL_PATH'] or data_file_path('chat-write-spill.jsonl')
+
+chat_writer = ChatWriteBehind(
+    app,
+    enabled=app.config['CHAT_WRITE_BEHIND'],
+    batch_size=app.config['CHAT_WRITE_BATCH_SIZE'],
+    flush_interval=app.config['CHAT_WRITE_FLUSH_INTERVAL'],
+    max_queue=app.config['CHAT_WRITE_QUEUE_SIZE']
+)
+
+@app.cli.command('chat-write-replay')
+def chat_write_replay_command():
+    """Write chat exchanges the write-behind queue could not commit."""
+    written, present, failed = chat_writer.replay_spill()
+    print(f"Replayed {written} chat exchanges ({present} were already written, {failed} failed again)")
+    if failed:
+        raise SystemExit(1)
+
+# Live crisis alerts. Crisis exchanges are published to an in-process
+# broker after they commit, and admin/counselor dashboards receive them
+# over Server-Sent Events. Event ids are (timestamp, message id) cursors,
+# so a reconnecting client's Last-Event-ID is replayed from the database.
+class CrisisAlertBroker:
+    """Fan-out of crisis alerts to any number of waiting subscribers.
+
+    Published events go into a bounded ring buffer with increasing
+    sequence numbers; subscribers block on one shared condition and read
+    whatever is newer than the last sequence they saw, so an idle
+    subscriber costs a waiting thread and nothing per event until it wakes.
+    Subscribers on an asyncio event loop use ``wait_async``; they share one
+    asyncio.Event per loop, which ``publish`` sets from any thread.
+    """
+
+    def __init__(self, backlog):
+        self._events = deque(maxlen=backlog)
+        self._event_ids = set()
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._loop_events = {}
+        self.subscribers = 0
+    
+    @property
+    def sequence(self):
+        with self._condition:
+            return self._sequence
+    
+    def publish(self, event_id, data):
+        """Publish an event; an id still in the backlog is ignored, so republishing is harmless."""
+        with self._condition:
+            if event_id in self._event_ids:
+                return
+            if len(self._events) == self._events.maxlen:
+                self._event_ids.discard(self._events[0][1])
+            self._sequence += 1
+            self._events.append((self._sequence, event_id, data))
+            self._event_ids.add(event_id)
+            self._condition.notify_all()
+            for loop in list(self._loop_events):
+                try:
+                    loop.call_soon_threadsafe(self._wake_loop, loop)
+                except RuntimeError:
+                    # The loop has closed (server shut down); nothing on it is waiting any more
+                    del self._loop_events[loop]
+    
+    def wait(self, after, timeout):
+        """Return ``(sequence, events)`` published after ``after``, waiting up to ``timeout`` seconds."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > after, timeout)
+            return self._sequence, self._events_after(after)
+    
+    async def wait_async(self, after, timeout):
+        """Coroutine version of ``wait`` for subscribers running on an event loop."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._condition:
+                if self._sequence > after:
+                    return self._sequence, self._events_after(after)
+                wakeup = self._loop_events.setdefault(loop, asyncio.Event())
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return after, []
+            try:
+                await asyncio.wait_for(wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _wake_loop(self, loop):
+        with self._condition:
+            wakeup = self._loop_events.pop(loop, None)
+        if wakeup is not None:
+            wakeup.set()
+    
+    def _events_after(self, after):
+        return [(event_id, data) for sequence, event_id, data in self._events if sequence > after]
+    
+    def subscribe(self):
+        with self._condition:
+            self.subscribers += 1
+    
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+app.config['CRISIS_ALERT_BACKLOG'] = int(os.environ.get('MITRA_CRISIS_ALERT_BACKLOG', 1000))
+app.config['CRISIS_ALERT_HEARTBEAT'] = float(os.environ.get('MITRA_CRISIS_ALERT_HEARTBEAT', 15))
+CRISIS_ALERT_REPLAY_LIMIT = 500
+
+crisis_alerts = CrisisAlertBroker(app.config['CRISIS_ALERT_BACKLOG'])
+
+def crisis_message_filter():
+    # Matches the ix_chat_message_crisis_flag_timestamp partial index
+    return ChatMessage.crisis_flag == True
+
+def crisis_alert_data(msg, user):
+    return {
+        'message_id': msg.id,
+        'session_id': msg.session_id,
+        'user_name': user.name if user else 'Anonymous',
+        'user_email': user.email if user else 'Anonymous',
+        'message': msg.message,
+        'crisis_keywords': msg.crisis_keywords or [],
+        'timestamp': msg.timestamp.isoformat(),
+        'sentiment': msg.sentiment
+    }
+
+def publish_crisis_alert(msg, user):
+    crisis_alerts.publish(encode_cursor(msg.timestamp, msg.id), crisis_alert_data(msg, user))
+
+def crisis_alert_replay_query(after, limit=CRISIS_ALERT_REPLAY_LIMIT):
+    return db.select(ChatMessage, User).outerjoin(
+        ChatSession, ChatMessage.session_id == ChatSession.id
+    ).outerjoin(
+        User, ChatSession.user_id == User.id
+    ).where(crisis_message_filter()).where(
+        db.tuple_(ChatMessage.timestamp, ChatMessage.id) > after
+    ).order_by(ChatMessage.timestamp, ChatMessage.id).limit(limit)
+
+def crisis_alert_events(rows):
+    return [(encode_cursor(msg.timestamp, msg.id), crisis_alert_data(msg, user)) for msg, user in rows]
+
+def crisis_alert_replay(after, limit=CRISIS_ALERT_REPLAY_LIMIT):
+    """Crisis alerts after the ``(timestamp, id)`` cursor ``after``, oldest first."""
+    return crisis_alert_events(db.session.execute(crisis_alert_replay_query(after, limit)))
+
+class CrisisAlertRelay:
+    """Feeds crisis alerts committed by other worker processes into the local broker.
+
+    A background thread polls the crisis index every ``interval`` seconds
+    for alerts from the last ``lookback`` seconds and publishes the ones it
+    has not seen before. The broker ignores ids it already holds, so alerts
+    raised in this process and published directly are not repeated.
+    """
+
+    def __init__(self, app, broker, interval, lookback):
+        self.app = app
+        self.broker = broker
+        self.interval = interval
+        self.lookback = lookback
+        self._start_lock = threading.Lock()
+        self._thread = None
+    
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='crisis-alert-relay', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        seen = None
+        while True:
+            since = datetime.utcnow() - timedelta(seconds=self.lookback)
+            try:
+                with self.app.app_context():
+                    events = crisis_alert_replay((since, ''), limit=None)
+            except Exception:
+                self.app.logger.exception('Failed to poll crisis alerts from other workers')
+                events = None
+            if events is not None:
+                # The first poll only records what already happened before this worker started
+                if seen is not None:
+                    for event_id, data in events:
+                        if event_id not in seen:
+                            self.broker.publish(event_id, data)
+                seen = {event_id for event_id, _ in events}
+            time.sleep(self.interval)
+
+app.config['CRISIS_ALERT_POLL_INTERVAL'] = float(os.environ.get('MITRA_CRISIS_ALERT_POLL_INTERVAL', 1))
+CRISIS_ALERT_RELAY_LOOKBACK = 60
+
+crisis_relay = CrisisAlertRelay(
+    app, crisis_alerts, app.config['CRISIS_ALERT_POLL_INTERVAL'], CRISIS_ALERT_RELAY_LOOKBACK
+)
+
+def sse_event(event_id, data):
+    return f'id: {event_id}\nevent: crisis\ndata: {app.json.dumps(data)}\n\n'
+
+# Offline re-scoring of stored chat messages
+_worker_chatbot = None
+
+def _init_classifier_worker(lexicons):
+    global _worker_chatbot
+    _worker_chatbot = MentalHealthChatBot()
+    _worker_chatbot.configure_keywords(**lexicons)
+
+def _classify_in_worker(messages):
+    return _worker_chatbot.classify_batch(messages)
+
+def rescore_chat_messages(chunk_size=5000, workers=0, progress=None):
+    """Re-classify every AI reply from the user message that prompted it.
+
+    Replies are read in rowid order one chunk at a time, so memory stays
+    bounded, and only rows whose crisis_keywords or sentiment changed are
+    written back with one bulk UPDATE per chunk.
+    """
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_classifier_worker,
+                                   initargs=(chatbot.matcher.lexicons,))
+    stats = {'scanned': 0, 'updated': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    last_rowid = 0
+    try:
+        while True:
+            rows = db.session.execute(db.text("""
+                SELECT ai.rowid, ai.id, ai.crisis_keywords, ai.crisis_flag, ai.sentiment,
+                       (SELECT u.message FROM chat_message u
+                        WHERE u.session_id = ai.session_id AND u.sender_type = 'user' AND u.rowid < ai.rowid
+                        ORDER BY u.rowid DESC LIMIT 1) AS prompt
+                FROM chat_message ai
+                WHERE ai.sender_type = 'ai' AND ai.rowid > :last_rowid
+                ORDER BY ai.rowid
+                LIMIT :chunk_size
+            """).columns(crisis_keywords=JSONText), {'last_rowid': last_rowid, 'chunk_size': chunk_size}).all()
+            if not rows:
+                break
+            last_rowid = rows[-1].rowid
+            
+            scored = [row for row in rows if row.prompt is not None]
+            prompts = [row.prompt for row in scored]
+            if pool is not None:
+                step = max(1, len(prompts) // workers)
+                parts = pool.map(_classify_in_worker, [prompts[i:i + step] for i in range(0, len(prompts), step)])
+                results = [result for part in parts for result in part]
+            else:
+                results = chatbot.classify_batch(prompts)
+            
+            updates = []
+            for row, result in zip(scored, results):
+                crisis = crisis_columns(result['crisis_keywords'])
+                if (row.crisis_keywords != crisis['crisis_keywords'] or bool(row.crisis_flag) != crisis['crisis_flag']
+                        or row.sentiment != result['sentiment']):
+                    updates.append({'id': row.id, **crisis, 'sentiment': result['sentiment']})
+            if updates:
+                db.session.execute(db.update(ChatMessage), updates)
+            db.session.commit()
+            
+            stats['scanned'] += len(rows)
+            stats['updated'] += len(updates)
+            stats['seconds'] = time.perf_counter() - started
+            if progress:
+                progress(stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+@app.cli.command('chat-rescore')
+@click.option('--chunk-size', default=5000, show_default=True, help='Messages read and updated per transaction.')
+@click.option('--workers', default=0, show_default=True, help='Classifier processes; 0 or 1 classifies in-process.')
+@click.option('--keywords', type=click.File(), help='JSON object of keyword lists to use, e.g. {"crisis": [...]}.')
+def chat_rescore_command(chunk_size, workers, keywords):
+    """Re-classify stored chat messages with the current keyword lists."""
+    if keywords:
+        try:
+            lexicons = json.load(keywords)
+            if not isinstance(lexicons, dict):
+                raise ValueError('Keywords must be a JSON object of keyword lists')
+            chatbot.configure_keywords(**lexicons)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--keywords')
+    
+    def progress(stats):
+        rate = stats['scanned'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"{stats['scanned']} scanned, {stats['updated']} updated, {rate:.0f} msg/s")
+    
+    stats = rescore_chat_messages(chunk_size, workers, progress)
+    rate = stats['scanned'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"Done: {stats['scanned']} messages in {stats['seconds']:.1f}s ({rate:.0f} msg/s), {stats['updated']} updated")
+
+# Chat archive. Messages of sessions idle for CHAT_ARCHIVE_AFTER_DAYS move
+# out of chat_message into one SQLite file per month (of the session's
+# start), so the hot table and its indexes only hold recent traffic. The
+# session row stays, with archived_at set; history reads merge the archive
+# back in. Admin search, analytics topic counts and re-scoring cover the
+# hot table only.
+ARCHIVE_MESSAGE_FIELDS = ['id', 'sender_type', 'sender_id', 'message', 'message_type', 'timestamp',
+                          'crisis_keywords', 'crisis_flag', 'sentiment']
+
+class ChatArchive:
+    """Per-month SQLite files holding the messages of archived chat sessions.
+
+    Each file has one row per session: its messages as a zlib-compressed
+    JSON array of ARCHIVE_MESSAGE_FIELDS rows, plus the counts the session
+    list shows, so listing sessions never decompresses anything.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS archived_session (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            message_count INTEGER NOT NULL,
+            user_message_count INTEGER NOT NULL,
+            crisis_message_count INTEGER NOT NULL,
+            last_message_at TEXT,
+            messages BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+    
+    def path(self, month):
+        return os.path.join(self.directory, f'chat-{month}.db')
+    
+    def _connect(self, month, create=False):
+        path = self.path(month)
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(path)
+        if create:
+            connection.executescript(self.SCHEMA)
+        return connection
+    
+    @staticmethod
+    def month(started_at):
+        return started_at.strftime('%Y-%m')
+    
+    def store(self, month, sessions):
+        """Write ``{session_id: (user_id, messages)}`` to the month's file, merging with rows already there."""
+        with closing(self._connect(month, create=True)) as connection, connection:
+            placeholders = ', '.join('?' * len(sessions))
+            for session_id, blob in connection.execute(
+                f'SELECT session_id, messages FROM archived_session WHERE session_id IN ({placeholders})', list(sessions)
+            ).fetchall():
+                user_id, messages = sessions[session_id]
+                merged = {m[0]: m for m in json.loads(zlib.decompress(blob))}
+                merged.update((m[0], m) for m in messages)
+                sessions[session_id] = (user_id, sorted(merged.values(), key=lambda m: (m[5], m[0])))
+            
+            connection.executemany('INSERT OR REPLACE INTO archived_session VALUES (?, ?, ?, ?, ?, ?, ?)', [(
+                session_id,
+                user_id,
+                len(messages),
+                sum(1 for m in messages if m[1] == 'user'),
+                sum(1 for m in messages if m[7]),
+                messages[-1][5],
+                zlib.compress(json.dumps(messages, separators=(',', ':')).encode(), 6)
+            ) for session_id, (user_id, messages) in sessions.items()])
+    
+    def messages(self, session_id, started_at):
+        """Archived messages of one session as dicts, oldest first; empty if it has none."""
+        connection = self._connect(self.month(started_at))
+        if connection is None:
+            return []
+        with closing(connection):
+            row = connection.execute('SELECT messages FROM archived_session WHERE session_id = ?', (session_id,)).fetchone()
+        if row is None:
+            return []
+        messages = [dict(zip(ARCHIVE_MESSAGE_FIELDS, m)) for m in json.loads(zlib.decompress(row[0]))]
+        for m in messages:
+            m['timestamp'] = datetime.fromisoformat(m['timestamp'])
+        return messages
+    
+    def summaries(self, sessions):
+        """``{session_id: (message_count, user_message_count, crisis_message_count, last_message_at)}``.
+
+        ``sessions`` is a list of ``(session_id, started_at)`` pairs.
+        """
+        by_month = {}
+        for session_id, started_at in sessions:
+            by_month.setdefault(self.month(started_at), []).append(session_id)
+        result = {}
+        for month, session_ids in by_month.items():
+            connection = self._connect(month)
+            if connection is None:
+                continue
+            with closing(connection):
+                placeholders = ', '.join('?' * len(session_ids))
+                for session_id, count, user_count, crisis_count, last_at in connection.execute(
+                    f'SELECT session_id, message_count, user_message_count, crisis_message_count, last_message_at '
+                    f'FROM archived_session WHERE session_id IN ({placeholders})', session_ids
+                ):
+                    result[session_id] = (count, user_count, crisis_count, datetime.fromisoformat(last_at))
+        return result
+
+app.config['CHAT_ARCHIVE_DIR'] = os.environ.get('MITRA_CHAT_ARCHIVE_DIR')
+app.config['CHAT_ARCHIVE_AFTER_DAYS'] = int(os.environ.get('MITRA_CHAT_ARCHIVE_AFTER_DAYS', 180))
+
+def chat_archive():
+    return ChatArchive(app.config['CHAT_ARCHIVE_DIR'] or data_file_path('chat-archive'))
+
+def archive_chat_sessions(older_than_days, batch_size=200, pause=0.0, max_sessions=None, progress=None):
+    """Move the messages of sessions idle for ``older_than_days`` into the chat archive.
+
+    Sessions are walked in (started_at, id) order, ``batch_size`` at a time.
+    Each batch is written to the archive files first and then deleted from
+    chat_message in one transaction, so an interrupted run loses nothing and
+    re-archiving a session only merges. The position is saved in a
+    checkpoint file after every batch and the next run resumes from it; a
+    run that reaches the end removes it. ``pause`` sleeps between batches
+    to leave the database to request traffic.
+    """
+    archive = chat_archive()
+    os.makedirs(archive.directory, exist_ok=True)
+    checkpoint = os.path.join(archive.directory, 'checkpoint')
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    after = None
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            after = decode_cursor(f.read().strip())
+    stats = {'scanned': 0, 'sessions': 0, 'messages': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    finished = False
+    
+    while max_sessions is None or stats['scanned'] < max_sessions:
+        query = db.session.query(ChatSession.id, ChatSession.user_id, ChatSession.started_at).filter(
+            ChatSession.started_at < cutoff
+        )
+        sessions = keyset_page(query, ChatSession.started_at, ChatSession.id, batch_size, after, oldest_first=True).all()
+        if not sessions:
+            finished = True
+            break
+        after = (sessions[-1].started_at, sessions[-1].id)
+        
+        messages = {}
+        last_message_at = {}
+        columns = [getattr(ChatMessage, field) for field in ARCHIVE_MESSAGE_FIELDS]
+        for m in db.session.query(ChatMessage.session_id, *columns).filter(
+            ChatMessage.session_id.in_([s.id for s in sessions])
+        ).order_by(ChatMessage.session_id, ChatMessage.timestamp, ChatMessage.id):
+            messages.setdefault(m.session_id, []).append(
+                [m.id, m.sender_type, m.sender_id, m.message, m.message_type, m.timestamp.isoformat(),
+                 m.crisis_keywords, bool(m.crisis_flag), m.sentiment]
+            )
+            last_message_at[m.session_id] = m.timestamp
+        # Only sessions with nothing newer than the cutoff; the rest are still in use
+        idle = [s for s in sessions if s.id in messages and last_message_at[s.id] < cutoff]
+        db.session.rollback()  # end the read transaction before the slow archive writes
+        
+        if idle:
+            by_month = {}
+            for s in idle:
+                by_month.setdefault(ChatArchive.month(s.started_at), {})[s.id] = (s.user_id, messages[s.id])
+            for month, month_sessions in by_month.items():
+                archive.store(month, month_sessions)
+            
+            def remove_hot_rows():
+                now = datetime.utcnow()
+                db.session.execute(db.delete(ChatMessage).where(
+                    ChatMessage.session_id.in_([s.id for s in idle]), ChatMessage.timestamp < cutoff
+                ))
+                db.session.execute(db.update(ChatSession), [{'id': s.id, 'archived_at': now} for s in idle])
+                db.session.commit()
+            run_with_busy_retry(remove_hot_rows)
+        
+        with open(checkpoint, 'w') as f:
+            f.write(encode_cursor(*after))
+        stats['scanned'] += len(sessions)
+        stats['sessions'] += len(idle)
+        stats['messages'] += sum(len(messages[s.id]) for s in idle)
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+        if len(sessions) < batch_size:
+            finished = True
+            break
+        if pause:
+            time.sleep(pause)
+    
+    if finished and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def chat_history_rows(session, limit, after, oldest_first):
+    """One page of a session's history, hot and archived, as rows with CHAT_HISTORY_FIELDS attributes."""
+    query = db.session.query(
+        ChatMessage.id, ChatMessage.sender_type, ChatMessage.message, ChatMessage.message_type,
+        ChatMessage.timestamp, ChatMessage.crisis_flag, ChatMessage.sentiment
+    ).filter(ChatMessage.session_id == session.id)
+    if session.archived_at is None:
+        return keyset_page(query, ChatMessage.timestamp, ChatMessage.id, limit, after, oldest_first=oldest_first).all()
+    
+    rows = {m['id']: SimpleNamespace(**m) for m in chat_archive().messages(session.id, session.started_at)}
+    for m in query:
+        rows[m.id] = m
+    rows = sorted(rows.values(), key=lambda m: (m.timestamp, m.id), reverse=not oldest_first)
+    if after:
+        rows = [m for m in rows if ((m.timestamp, m.id) > after) == oldest_first and (m.timestamp, m.id) != after]
+    return rows[:limit]
+
+@app.cli.command('chat-archive')
+@click.option('--older-than-days', type=int, help='Archive sessions idle this long (default MITRA_CHAT_ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', default=200, show_default=True, help='Sessions archived per transaction.')
+@click.option('--pause', default=0.1, show_default=True, help='Seconds to sleep between batches.')
+@click.option('--max-sessions', type=int, help='Stop after scanning this many sessions; the next run resumes.')
+def chat_archive_command(older_than_days, batch_size, pause, max_sessions):
+    """Move messages of idle chat sessions to the per-month archive files."""
+    if older_than_days is None:
+        older_than_days = app.config['CHAT_ARCHIVE_AFTER_DAYS']
+    
+    def progress(stats):
+        print(f"{stats['scanned']} sessions scanned, {stats['sessions']} archived ({stats['messages']} messages), "
+              f"{stats['seconds']:.1f}s")
+    
+    stats = archive_chat_sessions(older_than_days, batch_size, pause, max_sessions, progress)
+    print(f"Done: archived {stats['messages']} messages from {stats['sessions']} sessions "
+          f"in {stats['seconds']:.1f}s to {chat_archive().directory}")
+
+# Keyset pagination helpers
+ADMIN_USERS_PAGE_SIZE = 50
+ADMIN_USERS_MAX_PAGE_SIZE = 500
+FORUM_PAGE_SIZE = 50
+FORUM_MAX_PAGE_SIZE = 100
+CHAT_HISTORY_PAGE_SIZE = 100
+CHAT_HISTORY_MAX_PAGE_SIZE = 500
+CHAT_SESSIONS_PAGE_SIZE = 20
+CHAT_SESSIONS_MAX_PAGE_SIZE = 100
+
+def encode_cursor(created_at, row_id):
+    raw = f'{created_at.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return the ``(created_at, id)`` pair encoded in ``cursor``; raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+def keyset_page(query, created_column, id_column, limit, after=None, oldest_first=False):
+    # Newest first by default; (created_at, id) keeps the order total when timestamps tie
+    if oldest_first:
+        if after:
+            query = query.filter(db.tuple_(created_column, id_column) > after)
+        return query.order_by(created_column, id_column).limit(limit)
+    if after:
+        query = query.filter(db.tuple_(created_column, id_column) < after)
+    return query.order_by(created_column.desc(), id_column.desc()).limit(limit)
+
+def parse_page_args(default_limit, max_limit):
+    """Return ``(limit, after)`` from the request's limit/cursor; raises ValueError."""
+    limit = min(int(request.args.get('limit', default_limit)), max_limit)
+    if limit < 1:
+        raise ValueError('Invalid limit')
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+def user_page_query(limit, after=None):
+    return keyset_page(User.query, User.created_at, User.id, limit, after)
+
+# Table-driven screening scoring. Each questionnaire maps inclusive upper
+# score bounds to risk levels; a batch is summed with one bincount and
+# classified with one searchsorted per screening type.
+SCREENING_CUTOFFS = {
+    'phq9': ([4, 9, 14, 19], ['minimal', 'mild', 'moderate', 'moderately_severe', 'severe']),
+    'gad7': ([4, 9, 14], ['minimal', 'mild', 'moderate', 'severe']),
+    'ghq': ([3], ['low', 'high'])
+}
+SCREENING_SCORE_COLUMNS = {'phq9': 'phq9_score', 'gad7': 'gad7_score', 'ghq': 'ghq_score'}
+SCREENING_BULK_MAX = 5000
+
+def valid_screening_responses(responses):
+    return isinstance(responses, dict) and all(
+        isinstance(value, int) and not isinstance(value, bool) for value in responses.values()
+    )
+
+def score_screenings(screening_type, batch):
+    """Return ``(total_scores, risk_levels)`` for a list of response dicts.
+
+    Unknown screening types are scored with the GHQ cutoffs, as the
+    single-submission endpoint always has.
+    """
+    cutoffs, levels = SCREENING_CUTOFFS.get(screening_type, SCREENING_CUTOFFS['ghq'])
+    counts = np.fromiter((len(responses) for responses in batch), dtype=np.int64, count=len(batch))
+    values = np.fromiter((value for responses in batch for value in responses.values()),
+                         dtype=np.int64, count=int(counts.sum()))
+    rows = np.repeat(np.arange(len(batch)), counts)
+    totals = np.zeros(len(batch), dtype=np.int64)
+    np.add.at(totals, rows, values)
+    indexes = np.searchsorted(np.asarray(cutoffs), totals, side='left')
+    return totals.tolist(), [levels[i] for i in indexes.tolist()]
+
+def screening_result(total_score, risk_level):
+    recommendations = []
+    if risk_level in ['moderate', 'moderately_severe', 'severe', 'high']:
+        recommendations.extend([
+            "Consider booking a session with a counselor",
+            "Join our peer support community",
+            "Practice daily mindfulness exercises"
+        ])
+    
+    if risk_level in ['moderately_severe', 'severe']:
+        recommendations.append("Urgent: Please contact mental health services immediately")
+    
+    return {
+        'total_score': total_score,
+        'risk_level': risk_level,
+        'recommendations': recommendations,
+        'need_immediate_help': risk_level in ['severe', 'high']
+    }
+
+def save_screenings(submissions):
+    """Score and store ``(user_id, screening_type, responses)`` submissions in order.
+
+    Screening rows are inserted with one executemany and each user is
+    updated once with the state the submissions would leave sequentially.
+    Returns the per-submission results; raises LookupError for unknown users.
+    """
+    by_type = {}
+    for index, (_, screening_type, responses) in enumerate(submissions):
+        by_type.setdefault(screening_type, []).append(index)
+    scores = [None] * len(submissions)
+    for screening_type, indexes in by_type.items():
+        totals, levels = score_screenings(screening_type, [submissions[i][2] for i in indexes])
+        for i, total, level in zip(indexes, totals, levels):
+            scores[i] = (total, level)
+
+    user_ids = {user_id for user_id, _, _ in submissions}
+    risk_levels = dict(db.session.execute(db.select(User.id, User.risk_level).where(User.id.in_(user_ids))).all())
+    missing = user_ids - risk_levels.keys()
+    if missing:
+        raise LookupError(sorted(missing))
+
+    now = datetime.utcnow()
+    rows = []
+    updates = {}
+    for (user_id, screening_type, responses), (total, level) in zip(submissions, scores):
+        rows.append({
+            'user_id': user_id,
+            'screening_type': screening_type,
+            'responses': responses,
+            'total_score': total,
+            'risk_level': level,
+            'completed_at': now
+        })
+        update = updates.setdefault(user_id, {'id': user_id})
+        if screening_type in SCREENING_SCORE_COLUMNS:
+            update[SCREENING_SCORE_COLUMNS[screening_type]] = total
+        update['risk_level'] = level
+        update['last_screening'] = now
+
+    db.session.execute(db.insert(ScreeningResponse), rows)
+    for update in updates.values():
+        record_risk_change(risk_levels[update['id']], update['risk_level'])
+    # Bulk UPDATE by primary key, grouped by the set of columns each row sets
+    db.session.execute(db.update(User), list(updates.values()))
+    for screening_type, indexes in by_type.items():
+        record_metric('screening', screening_type, len(indexes))
+    return [screening_result(total, level) for total, level in scores]
+
+# Counselor free-slot search and booking conflict checks. Availability
+# windows come from CounselorSlot; booked time is read per counselor from
+# ix_appointment_counselor_scheduled and subtracted from each window.
+APPOINTMENT_DEFAULT_DURATION = 60
+APPOINTMENT_MAX_DURATION = 180
+SLOT_SEARCH_MAX_DAYS = 120
+SLOT_SEARCH_DEFAULT_LIMIT = 20
+SLOT_SEARCH_MAX_LIMIT = 500
+
+# Check-then-insert for bookings must not interleave between request threads
+# (and, with MITRA_MULTIPROCESS, between processes: see book_appointment)
+booking_lock = threading.Lock()
+
+def parse_local_datetime(value):
+    # Appointment times are stored as naive wall-clock times
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+def booked_intervals(counselor_ids, start, end):
+    """Return ``{counselor_id: [(start, end), ...]}`` of active appointments overlapping the range."""
+    rows = db.session.execute(
+        db.select(Appointment.counselor_id, Appointment.scheduled_datetime, Appointment.duration)
+        .where(Appointment.counselor_id.in_(counselor_ids))
+        .where(Appointment.scheduled_datetime > start - timedelta(minutes=APPOINTMENT_MAX_DURATION))
+        .where(Appointment.scheduled_datetime < end)
+        .where(Appointment.status != 'cancelled')
+        .order_by(Appointment.counselor_id, Appointment.scheduled_datetime)
+    )
+    intervals = {}
+    for counselor_id, scheduled, duration in rows:
+        finish = scheduled + timedelta(minutes=duration or APPOINTMENT_DEFAULT_DURATION)
+        if finish > start:
+            intervals.setdefault(counselor_id, []).append((scheduled, finish))
+    return intervals
+
+def availability_windows(counselor_ids):
+    """Return ``{counselor_id: {weekday: [(start_minute, end_minute), ...]}}``.
+
+    Each day's windows are sorted, with overlapping or touching windows
+    merged, which free_slots and counselor_conflict rely on.
+    """
+    windows = {}
+    rows = db.session.execute(
+        db.select(CounselorSlot.counselor_id, CounselorSlot.weekday, CounselorSlot.start_minute, CounselorSlot.end_minute)
+        .where(CounselorSlot.counselor_id.in_(counselor_ids))
+        .order_by(CounselorSlot.counselor_id, CounselorSlot.weekday, CounselorSlot.start_minute)
+    )
+    for counselor_id, weekday, start, end in rows:
+        day = windows.setdefault(counselor_id, {}).setdefault(weekday, [])
+        if day and start <= day[-1][1]:
+            day[-1] = (day[-1][0], max(day[-1][1], end))
+        else:
+            day.append((start, end))
+    return windows
+
+def free_slots(windows, busy, start, end, duration):
+    """Cut each availability window between ``start`` and ``end`` into free ``duration``-minute slots.
+
+    ``busy`` must be sorted by start time; slots are aligned to the window
+    start and skip past any booked interval they would overlap.
+    """
+    length = timedelta(minutes=duration)
+    slots = []
+    busy_index = 0
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        for window_start, window_end in windows.get(day.weekday(), ()):
+            slot = day + timedelta(minutes=window_start)
+            window_close = day + timedelta(minutes=window_end)
+            while slot + length <= window_close:
+                while busy_index < len(busy) and busy[busy_index][1] <= slot:
+                    busy_index += 1
+                if busy_index < len(busy) and busy[busy_index][0] < slot + length:
+                    # Resume after the booking, keeping slots on the window's grid
+                    skip = busy[busy_index][1] - slot
+                    slot += length * -(-skip // length)
+                    continue
+                if slot >= start and slot + length <= end:
+                    slots.append(slot)
+                slot += length
+        day += timedelta(days=1)
+    return slots
+
+def counselor_conflict(counselor_id, start, duration):
+    """Return an error message if the booking is outside availability or overlaps another one."""
+    finish = start + timedelta(minutes=duration)
+    start_minute = start.hour * 60 + start.minute
+    end_minute = start_minute + duration
+    windows = availability_windows([counselor_id]).get(counselor_id, {}).get(start.weekday(), [])
+    if finish.date() != start.date() or not any(s <= start_minute and end_minute <= e for s, e in windows):
+        return "Requested time is outside the counselor's availability"
+    if booked_intervals([counselor_id], start, finish):
+        return 'Counselor already has an appointment at this time'
+    return None
+
+# Password hashing off the request threads
+class HashingOverloaded(Exception):
+    pass
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool.
+
+    hashlib releases the GIL while it derives keys, so ``workers`` threads
+    hash in parallel while request threads only wait on the result. At most
+    ``max_pending`` hashes may be queued or running; past that, callers wait
+    up to ``wait_timeout`` seconds for a slot and then get
+    HashingOverloaded, which the auth routes turn into a 503. With
+    ``workers=0`` hashing runs inline on the calling thread.
+    """
+
+    def __init__(self, method, workers, max_pending, wait_timeout):
+        self.method = method
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash') if workers else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._method_prefix = None
+    
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HashingOverloaded()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+    
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash):
+        # Compare the stored "method:params" prefix with what we would generate now
+        if self._method_prefix is None:
+            self._method_prefix = self.hash('').split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('MITRA_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('MITRA_PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('MITRA_PASSWORD_HASH_MAX_PENDING', 64))
+app.config['PASSWORD_HASH_WAIT_TIMEOUT'] = float(os.environ.get('MITRA_PASSWORD_HASH_WAIT_TIMEOUT', 2))
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    wait_timeout=app.config['PASSWORD_HASH_WAIT_TIMEOUT']
+)
+
+@app.errorhandler(HashingOverloaded)
+def hashing_overloaded(error):
+    response = jsonify({'error': 'Too many sign-in requests, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+# Response cache for read-mostly endpoints
+class ResponseCache:
+    """In-process cache of serialized JSON responses with TTL and LRU eviction.
+
+    Entries are tagged with the tables they were built from; committing a
+    write to one of those tables drops every entry carrying its tag.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def set(self, key, tags, body, ttl=None):
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'tags': frozenset(tags),
+            'expires_at': time.monotonic() + (self.ttl if ttl is None else ttl)
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+    
+    def invalidate(self, tags):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry['tags'] & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+# Multi-process deployment. Several worker processes (gunicorn -w N) can
+# share one database file: write transactions take a lock file so only one
+# worker writes at a time, writes that still hit SQLITE_BUSY are retried
+# with backoff, and the response cache lives in an SQLite file next to the
+# database so every worker sees the same entries and invalidations.
+class WriteLockTimeout(Exception):
+    pass
+
+class DatabaseBusy(Exception):
+    pass
+
+class WriteLock:
+    """Exclusive lock held by one thread of one process at a time.
+
+    Threads queue on a threading.Lock and the holder then takes an flock on
+    ``path``. The lock file is opened once per process, because forked
+    children that inherit the descriptor would share its flock.
+    """
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+        self._file = None
+        self._pid = None
+    
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise WriteLockTimeout(self.path)
+        try:
+            if self._pid != os.getpid():
+                self._file = open(self.path, 'a')
+                self._pid = os.getpid()
+            delay = 0.001
+            while True:
+                try:
+                    fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise WriteLockTimeout(self.path)
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.02)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+    
+    def release(self):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+class SharedResponseCache:
+    """ResponseCache kept in an SQLite file so every worker process shares it.
+
+    Same interface as ResponseCache. Entries expire by wall-clock time, and
+    when the cache is full the entries closest to expiry are evicted, so a
+    hit is a single read. Hit and miss counters are per process. A cache
+    file that stays locked counts as a miss and never fails the request.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT NOT NULL, expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_response_cache_expires_at ON response_cache (expires_at);
+        CREATE TABLE IF NOT EXISTS response_cache_tag (
+            tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')  # the cache can always be rebuilt
+            connection.executescript(self.SCHEMA)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+    
+    def _transaction(self, work):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+    
+    def get(self, key):
+        try:
+            row = self._connection().execute(
+                'SELECT body, etag, expires_at FROM response_cache WHERE key = ?', (json.dumps(key),)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        hit = row is not None and row[2] > time.time()
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return {'body': row[0], 'etag': row[1]} if hit else None
+    
+    def set(self, key, tags, body, ttl=None):
+        key = json.dumps(key)
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'expires_at': time.time() + (self.ttl if ttl is None else ttl)
+        }
+        
+        def store(connection):
+            connection.execute('INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?)',
+                               (key, body, entry['etag'], entry['expires_at']))
+            connection.execute('DELETE FROM response_cache_tag WHERE key = ?', (key,))
+            connection.executemany('INSERT INTO response_cache_tag VALUES (?, ?)', [(tag, key) for tag in tags])
+            excess = connection.execute('SELECT count(*) FROM response_cache').fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute('DELETE FROM response_cache WHERE key IN '
+                                   '(SELECT key FROM response_cache ORDER BY expires_at LIMIT ?)', (excess,))
+                connection.execute('DELETE FROM response_cache_tag WHERE key NOT IN (SELECT key FROM response_cache)')
+        
+        try:
+            self._transaction(store)
+        except sqlite3.Error:
+            pass
+        return entry
+    
+    def invalidate(self, tags):
+        tags = list(tags)
+        placeholders = ', '.join('?' * len(tags))
+        
+        def drop(connection):
+            deleted = connection.execute(
+                f'DELETE FROM response_cache WHERE key IN '
+                f'(SELECT key FROM response_cache_tag WHERE tag IN ({placeholders}))', tags
+            ).rowcount
+            connection.execute(f'DELETE FROM response_cache_tag WHERE tag IN ({placeholders})', tags)
+            return deleted
+        
+        try:
+            deleted = self._transaction(drop)
+        except sqlite3.Error:
+            app.logger.exception('Failed to invalidate shared cache tags %s', tags)
+            return
+        with self._lock:
+            self.invalidations += deleted
+    
+    def stats(self):
+        try:
+            entries = self._connection().execute('SELECT count(*) FROM response_cache').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+def is_busy_error(error):
+    return 'database is locked' in str(error.orig) or 'database is busy' in str(error.orig)
+
+def run_with_busy_retry(work, *args, **kwargs):
+    """Call ``work``, rolling back and retrying with exponential backoff while SQLite reports busy."""
+    delay = BUSY_RETRY_DELAY
+    for attempt in range(app.config['BUSY_RETRIES'] + 1):
+        try:
+            return work(*args, **kwargs)
+        except OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            db.session.rollback()
+            if attempt == app.config['BUSY_RETRIES']:
+                raise DatabaseBusy() from e
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
+
+def retry_on_busy(view):
+    """Re-run a writing view when SQLite reports the database as locked."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return run_with_busy_retry(view, *args, **kwargs)
+    return wrapper
+
+@app.errorhandler(DatabaseBusy)
+@app.errorhandler(WriteLockTimeout)
+def database_busy(error):
+    response = jsonify({'error': 'The database is busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+app.config['MULTIPROCESS'] = os.environ.get('MITRA_MULTIPROCESS', '0') == '1'
+app.config['WRITE_LOCK_TIMEOUT'] = float(os.environ.get('MITRA_WRITE_LOCK_TIMEOUT', 10))
+app.config['BUSY_RETRIES'] = int(os.environ.get('MITRA_BUSY_RETRIES', 3))
+app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('MITRA_RESPONSE_CACHE_TTL', 300))
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('MITRA_RESPONSE_CACHE_SIZE', 256))
+app.config['ANALYTICS_CACHE_TTL'] = float(os.environ.get('MITRA_ANALYTICS_CACHE_TTL', 0))
+BUSY_RETRY_DELAY = 0.05
+
+write_lock = None
+if app.config['MULTIPROCESS']:
+    with app.app_context():
+        database_url = db.engine.url
+    database_file = database_url.database
+    if database_url.get_backend_name() != 'sqlite' or database_file in (None, '', ':memory:'):
+        raise RuntimeError('MITRA_MULTIPROCESS needs DATABASE_URL to point at an SQLite file')
+    if fcntl is None:
+        raise RuntimeError('MITRA_MULTIPROCESS needs fcntl file locks (Linux or macOS)')
+    app.config.setdefault('SHARED_CACHE_PATH', os.environ.get('MITRA_SHARED_CACHE_PATH', f'{database_file}.cache'))
+    write_lock = WriteLock(f'{database_file}.lock', app.config['WRITE_LOCK_TIMEOUT'])
+    response_cache = SharedResponseCache(
+        app.config['SHARED_CACHE_PATH'], app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL']
+    )
+else:
+    response_cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+
+def take_write_lock(session):
+    if not session.info.get('holds_write_lock'):
+        write_lock.acquire()
+        session.info['holds_write_lock'] = True
+
+def lock_before_flush(session, flush_context, instances):
+    take_write_lock(session)
+
+def lock_before_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        take_write_lock(orm_execute_state.session)
+
+def release_write_lock(session, transaction):
+    if transaction.parent is None and session.info.pop('holds_write_lock', False):
+        write_lock.release()
+
+if write_lock is not None:
+    # Held from a transaction's first write until it commits or rolls back
+    event.listen(db.session, 'before_flush', lock_before_flush)
+    event.listen(db.session, 'do_orm_execute', lock_before_bulk_write)
+    event.listen(db.session, 'after_transaction_end', release_write_lock)
+
+CACHE_TAGS = {
+    Resource: 'resource',
+    Counselor: 'counselor'
+}
+
+def cached_response(*tags, ttl=None):
+    """Serve a GET view from ``response_cache``, keyed by path and query string.
+
+    Responses carry an ETag so clients revalidating with If-None-Match get
+    a 304 without a body. ``ttl`` overrides the cache's lifetime for this
+    view; 0 turns caching off.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if ttl == 0:
+                return view(*args, **kwargs)
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = response_cache.get(key)
+            if entry is None:
+                response = view(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.set(key, tags, response.get_data(), ttl)
+            
+            response = Response(entry['body'], mimetype='application/json')
+            response.set_etag(entry['etag'])
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+@event.listens_for(db.session, 'after_flush')
+def collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tag = CACHE_TAGS.get(type(obj))
+        if tag:
+            tags.add(tag)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def collect_bulk_cache_tags(orm_execute_state):
+    # Bulk insert/update/delete statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        tag = CACHE_TAGS.get(mapper.class_) if mapper is not None else None
+        if tag:
+            orm_execute_state.session.info.setdefault('cache_tags', set()).add(tag)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_cache_tags(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        response_cache.invalidate(tags)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_cache_tags(session):
+    session.info.pop('cache_tags', None)
+
+# JSON serialization. Responses are encoded with orjson when it is
+# installed and the stdlib encoder otherwise; both produce the same
+# documents (sorted keys, Flask's conversions for dates, decimals and
+# UUIDs), orjson just leaves non-ASCII text unescaped. Large arrays are
+# streamed in chunks so the whole document is never held as one string.
+class MitraJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is available."""
+
+    ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                      | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+    def __init__(self, app):
+        super().__init__(app)
+        encoder = app.config['JSON_ENCODER']
+        if encoder not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError(f'MITRA_JSON_ENCODER must be auto, orjson or stdlib, not {encoder!r}')
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError('MITRA_JSON_ENCODER=orjson but the orjson package is not installed')
+        self.use_orjson = orjson is not None and encoder != 'stdlib'
+    
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS).decode()
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        if not self.use_orjson or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+app.config['JSON_ENCODER'] = os.environ.get('MITRA_JSON_ENCODER', 'auto')
+app.config['JSON_STREAM_MIN_ITEMS'] = int(os.environ.get('MITRA_JSON_STREAM_MIN_ITEMS', 1000))
+
+app.json = MitraJSONProvider(app)
+
+JSON_STREAM_CHUNK = 500
+
+def has_large_array(value):
+    if isinstance(value, list):
+        return len(value) >= app.config['JSON_STREAM_MIN_ITEMS']
+    if isinstance(value, dict):
+        return any(has_large_array(v) for v in value.values())
+    return False
+
+def iter_json(value):
+    """Yield the JSON text of value in pieces, JSON_STREAM_CHUNK items of each large array at a time."""
+    if isinstance(value, dict) and has_large_array(value):
+        yield '{'
+        for i, key in enumerate(sorted(value)):
+            yield (',' if i else '') + app.json.dumps(key) + ':'
+            yield from iter_json(value[key])
+        yield '}'
+    elif isinstance(value, list) and has_large_array(value):
+        yield '['
+        for start in range(0, len(value), JSON_STREAM_CHUNK):
+            yield (',' if start else '') + app.json.dumps(value[start:start + JSON_STREAM_CHUNK])[1:-1]
+        yield ']'
+    else:
+        yield app.json.dumps(value)
+
+def json_response(value):
+    """jsonify(value), streamed in chunks when it holds an array of JSON_STREAM_MIN_ITEMS or more."""
+    if not has_large_array(value):
+        return jsonify(value)
+    return Response(iter_json(value), mimetype='application/json')
+
+# Serializers shared by the routes that return the same models
+def admin_user_data(user):
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'college': user.college,
+        'course': user.course,
+        'year': user.year,
+        'age': user.age,
+        'gender': user.gender,
+        'phq9_score': user.phq9_score,
+        'gad7_score': user.gad7_score,
+        'risk_level': user.risk_level,
+        'is_counselor': user.is_counselor,
+        'is_admin': user.is_admin,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+        'last_active': user.last_active.isoformat() if user.last_active else None
+    }
+
+def counselor_data(counselor, admin=False):
+    """Public counselor profile; the admin view shows is_available instead of the weekly availability."""
+    data = {
+        'id': counselor.id,
+        'name': counselor.name,
+        'specialization': counselor.specialization,
+        'languages': counselor.languages or [],
+        'experience_years': counselor.experience_years,
+        'rating': counselor.rating,
+        'total_sessions': counselor.total_sessions,
+        'bio': counselor.bio
+    }
+    if admin:
+        data['is_available'] = counselor.is_available
+    else:
+        data['availability'] = counselor.availability or []
+    return data
+
+def resource_data(resource, summary=False):
+    """Resource as listed to students; the summary used by /admin leaves out the content fields."""
+    data = {
+        'id': resource.id,
+        'title': resource.title,
+        'content_type': resource.content_type,
+        'category': resource.category,
+        'language': resource.language,
+        'view_count': resource.view_count,
+        'rating': resource.rating,
+        'is_featured': resource.is_featured
+    }
+    if not summary:
+        data.update({
+            'description': resource.description,
+            'url': resource.url,
+            'duration': resource.duration,
+            'difficulty_level': resource.difficulty_level,
+            'tags': resource.tags or []
+        })
+    return data
+
+def chat_session_data(session, user):
+    return {
+        'id': session.id,
+        'user_name': user.name if user else 'Anonymous',
+        'user_email': user.email if user else 'Anonymous',
+        'started_at': session.started_at.isoformat(),
+        'status': session.status,
+        'crisis_detected': session.crisis_detected,
+        'sentiment_score': session.sentiment_score,
+        'message_count': session.message_count or 0,
+        'topics': session.topics or [],
+        'topic_counts': session.topic_counts or {}
+    }
+
+def screening_data(screening, user):
+    return {
+        'id': screening.id,
+        'user_name': user.name if user else 'Unknown',
+        'user_email': user.email if user else 'Unknown',
+        'screening_type': screening.screening_type,
+        'total_score': screening.total_score,
+        'risk_level': screening.risk_level,
+        'completed_at': screening.completed_at.isoformat()
+    }
+
+# Opt-in request profiling. Each request records wall time, SQL statement
+# count and time, JSON serialization time and payload size; they are sent
+# back in a Server-Timing header and aggregated per endpoint for
+# /api/metrics. A sample of requests also runs under cProfile, and the
+# stats of the slow ones are kept for /api/metrics/profiles.
+class RequestMetrics:
+    """Per-endpoint latency histograms and totals for profiled requests."""
+
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, max_profiles):
+        self._endpoints = {}
+        self._profiles = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+    
+    def observe(self, endpoint, wall_ms, sql_count, sql_ms, serialize_ms, size):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'count': 0, 'wall_ms': 0.0, 'max_wall_ms': 0.0, 'sql_statements': 0, 'sql_ms': 0.0,
+                    'serialize_ms': 0.0, 'bytes': 0, 'buckets': [0] * (len(self.BUCKETS_MS) + 1)
+                }
+            stats['count'] += 1
+            stats['wall_ms'] += wall_ms
+            stats['max_wall_ms'] = max(stats['max_wall_ms'], wall_ms)
+            stats['sql_statements'] += sql_count
+            stats['sql_ms'] += sql_ms
+            stats['serialize_ms'] += serialize_ms
+            stats['bytes'] += size or 0
+            stats['buckets'][bisect_left(self.BUCKETS_MS, wall_ms)] += 1
+    
+    def add_profile(self, endpoint, wall_ms, profiler):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(30)
+        with self._lock:
+            self._profiles.append({
+                'endpoint': endpoint,
+                'wall_ms': wall_ms,
+                'recorded_at': datetime.utcnow().isoformat(),
+                'stats': output.getvalue()
+            })
+    
+    def snapshot(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoints.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.BUCKETS_MS + ('+Inf',), stats['buckets']):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                endpoints[endpoint] = dict(stats, buckets=buckets)
+            return endpoints
+    
+    def profiles(self):
+        with self._lock:
+            return list(self._profiles)
+
+class TimedJSONProvider(MitraJSONProvider):
+    """JSON provider that adds the time spent building jsonify responses to the request's profile."""
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        response = super().response(*args, **kwargs)
+        if has_request_context() and 'profile' in g:
+            g.profile['serialize'] += time.perf_counter() - start
+        return response
+
+app.config['PROFILING'] = os.environ.get('MITRA_PROFILING', '0') == '1'
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('MITRA_PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_SLOW_MS'] = float(os.environ.get('MITRA_PROFILE_SLOW_MS', 200))
+app.config['PROFILE_KEEP'] = int(os.environ.get('MITRA_PROFILE_KEEP', 20))
+
+request_metrics = RequestMetrics(app.config['PROFILE_KEEP'])
+
+def start_sql_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+def stop_sql_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile' in g and conn.info.get('profile_query_start'):
+        g.profile['sql'] += time.perf_counter() - conn.info['profile_query_start'].pop()
+        g.profile['queries'] += 1
+
+def start_request_profile():
+    g.profile = {'start': time.perf_counter(), 'sql': 0.0, 'queries': 0, 'serialize': 0.0, 'profiler': None}
+    if random.random() < app.config['PROFILE_SAMPLE_RATE']:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this interpreter
+            return
+        g.profile['profiler'] = profiler
+
+def finish_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    wall_ms = (time.perf_counter() - profile['start']) * 1000
+    sql_ms = profile['sql'] * 1000
+    serialize_ms = profile['serialize'] * 1000
+    size = None if response.is_streamed else response.calculate_content_length()
+    endpoint = f'{request.method} {request.url_rule.rule if request.url_rule else "<unmatched>"}'
+
+    timings = [
+        f'app;dur={wall_ms:.2f}',
+        f'db;dur={sql_ms:.2f};desc="{profile["queries"]} queries"',
+        f'serialize;dur={serialize_ms:.2f}'
+    ]
+    if size is not None:
+        timings.append(f'payload;desc="{size} bytes"')
+    response.headers['Server-Timing'] = ', '.join(timings)
+    request_metrics.observe(endpoint, wall_ms, profile['queries'], sql_ms, serialize_ms, size)
+
+    profiler = profile['profiler']
+    if profiler is not None:
+        profiler.disable()
+        if wall_ms >= app.config['PROFILE_SLOW_MS']:
+            request_metrics.add_profile(endpoint, wall_ms, profiler)
+    return response
+
+if app.config['PROFILING']:
+    app.json = TimedJSONProvider(app)
+    event.listen(Engine, 'before_cursor_execute', start_sql_timer)
+    event.listen(Engine, 'after_cursor_execute', stop_sql_timer)
+    app.before_request(start_request_profile)
+    app.after_request(finish_request_profile)
+
 # Routes
 @app.route('/', methods=['GET'])
 def root():
@@ -316,138 +2879,89 @@ def root():
 
 @app.route('/admin', methods=['GET'])
 def admin_dashboard():
-    # Get comprehensive admin data
-    total_users = User.query.count()
-    total_sessions = ChatSession.query.count()
-    crisis_sessions = ChatSession.query.filter_by(crisis_detected=True).count()
-    total_appointments = Appointment.query.count()
-    
-    # Recent activity
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    new_users_week = User.query.filter(User.created_at >= week_ago).count()
-    
-    # Get all users with their details
-    users = User.query.all()
-    user_data = []
-    for user in users:
-        user_data.append({
-            'id': user.id,
-            'name': user.name,
-            'email': user.email,
-            'college': user.college,
-            'course': user.course,
-            'year': user.year,
-            'age': user.age,
-            'gender': user.gender,
-            'phq9_score': user.phq9_score,
-            'gad7_score': user.gad7_score,
-            'risk_level': user.risk_level,
-            'is_counselor': user.is_counselor,
-            'is_admin': user.is_admin,
-            'created_at': user.created_at.isoformat() if user.created_at else None,
-            'last_active': user.last_active.isoformat() if user.last_active else None
-        })
+    # Overview totals come from the precomputed analytics rollups
+    snapshot = analytics_snapshot()
+    
+    # First page of users; the full list is paged through /api/admin/users
+    users = user_page_query(ADMIN_USERS_PAGE_SIZE + 1).all()
+    user_data = [admin_user_data(user) for user in users[:ADMIN_USERS_PAGE_SIZE]]
+    users_next_cursor = None
+    if len(users) > ADMIN_USERS_PAGE_SIZE:
+        last = users[ADMIN_USERS_PAGE_SIZE - 1]
+        users_next_cursor = encode_cursor(last.created_at, last.id)
     
-    # Get counselors
     counselors = Counselor.query.all()
-    counselor_data = []
-    for c in counselors:
-        counselor_data.append({
-            'id': c.id,
-            'name': c.name,
-            'specialization': c.specialization,
-            'experience_years': c.experience_years,
-            'languages': json.loads(c.languages or '[]'),
-            'rating': c.rating,
-            'total_sessions': c.total_sessions,
-            'bio': c.bio,
-            'is_available': c.is_available
-        })
     
     # Get recent chat sessions with crisis detection
-    recent_sessions = ChatSession.query.order_by(ChatSession.started_at.desc()).limit(20).all()
-    session_data = []
-    for session in recent_sessions:
-        user = User.query.get(session.user_id) if session.user_id else None
-        session_data.append({
-            'id': session.id,
-            'user_name': user.name if user else 'Anonymous',
-            'user_email': user.email if user else 'Anonymous',
-            'started_at': session.started_at.isoformat(),
-            'status': session.status,
-            'crisis_detected': session.crisis_detected,
-            'sentiment_score': session.sentiment_score
-        })
+    recent_sessions = db.session.query(ChatSession, User).outerjoin(
+        User, ChatSession.user_id == User.id
+    ).order_by(ChatSession.started_at.desc()).limit(20).all()
     
     # Get crisis messages
-    crisis_messages = ChatMessage.query.filter(ChatMessage.crisis_keywords.isnot(None)).limit(50).all()
-    crisis_data = []
-    for msg in crisis_messages:
-        session = ChatSession.query.get(msg.session_id)
-        user = User.query.get(session.user_id) if session and session.user_id else None
-        crisis_data.append({
-            'message_id': msg.id,
-            'user_name': user.name if user else 'Anonymous',
-            'user_email': user.email if user else 'Anonymous',
-            'message': msg.message,
-            'crisis_keywords': json.loads(msg.crisis_keywords or '[]'),
-            'timestamp': msg.timestamp.isoformat(),
-            'sentiment': msg.sentiment
-        })
+    crisis_messages = db.session.query(ChatMessage, User).outerjoin(
+        ChatSession, ChatMessage.session_id == ChatSession.id
+    ).outerjoin(
+        User, ChatSession.user_id == User.id
+    ).filter(crisis_message_filter()).order_by(ChatMessage.timestamp.desc()).limit(50).all()
     
-    # Get resources
     resources = Resource.query.all()
-    resource_data = []
-    for r in resources:
-        resource_data.append({
-            'id': r.id,
-            'title': r.title,
-            'content_type': r.content_type,
-            'category': r.category,
-            'language': r.language,
-            'view_count': r.view_count,
-            'rating': r.rating,
-            'is_featured': r.is_featured
-        })
     
     # Get screening responses
-    screenings = ScreeningResponse.query.order_by(ScreeningResponse.completed_at.desc()).limit(50).all()
-    screening_data = []
-    for s in screenings:
-        user = User.query.get(s.user_id)
-        screening_data.append({
-            'id': s.id,
-            'user_name': user.name if user else 'Unknown',
-            'user_email': user.email if user else 'Unknown',
-            'screening_type': s.screening_type,
-            'total_score': s.total_score,
-            'risk_level': s.risk_level,
-            'completed_at': s.completed_at.isoformat()
-        })
+    screenings = db.session.query(ScreeningResponse, User).outerjoin(
+        User, ScreeningResponse.user_id == User.id
+    ).order_by(ScreeningResponse.completed_at.desc()).limit(50).all()
     
-    return jsonify({
+    return json_response({
         'admin_dashboard': {
-            'overview': {
-                'total_users': total_users,
-                'total_sessions': total_sessions,
-                'crisis_sessions': crisis_sessions,
-                'total_appointments': total_appointments,
-                'new_users_week': new_users_week
-            },
+            'overview': snapshot['overview'],
             'users': user_data,
-            'counselors': counselor_data,
-            'recent_sessions': session_data,
-            'crisis_alerts': crisis_data,
-            'resources': resource_data,
-            'recent_screenings': screening_data
+            'users_next_cursor': users_next_cursor,
+            'counselors': [counselor_data(c, admin=True) for c in counselors],
+            'recent_sessions': [chat_session_data(session, user) for session, user in recent_sessions],
+            'crisis_alerts': [crisis_alert_data(msg, user) for msg, user in crisis_messages],
+            'resources': [resource_data(r, summary=True) for r in resources],
+            'recent_screenings': [screening_data(s, user) for s, user in screenings]
         }
     })
 
+@app.route('/api/admin/users', methods=['GET'])
+def get_admin_users():
+    try:
+        limit, after = parse_page_args(ADMIN_USERS_PAGE_SIZE, ADMIN_USERS_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    if request.args.get('format') == 'ndjson':
+        # Full export: walk the keyset one page at a time so memory stays bounded
+        def generate(after):
+            while True:
+                users = user_page_query(ADMIN_USERS_MAX_PAGE_SIZE, after).all()
+                for user in users:
+                    yield app.json.dumps(admin_user_data(user)) + '\n'
+                if len(users) < ADMIN_USERS_MAX_PAGE_SIZE:
+                    break
+                after = (users[-1].created_at, users[-1].id)
+                db.session.expunge_all()
+        
+        return Response(stream_with_context(generate(after)), mimetype='application/x-ndjson')
+    
+    users = user_page_query(limit + 1, after).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+    
+    return jsonify({
+        'users': [admin_user_data(user) for user in users],
+        'next_cursor': next_cursor
+    })
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'MITRA Backend is running'})
 
 @app.route('/api/auth/register', methods=['POST'])
+@retry_on_busy
 def register():
     data = request.json
     
@@ -458,7 +2972,7 @@ def register():
     # Create new user
     user = User(
         email=data['email'],
-        password_hash=generate_password_hash(data['password']),
+        password_hash=password_hasher.hash(data['password']),
         name=data['name'],
         age=data.get('age'),
         gender=data.get('gender'),
@@ -470,6 +2984,9 @@ def register():
     )
     
     db.session.add(user)
+    db.session.flush()
+    record_metric('users', 'registrations')
+    record_risk_change(None, user.risk_level)
     db.session.commit()
     
     return jsonify({
@@ -479,11 +2996,15 @@ def register():
     })
 
 @app.route('/api/auth/login', methods=['POST'])
+@retry_on_busy
 def login():
     data = request.json
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and check_password_hash(user.password_hash, data['password']):
+    if user and password_hasher.verify(user.password_hash, data['password']):
+        # Transparently move old hashes to the configured method
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(data['password'])
         user.last_active = datetime.utcnow()
         db.session.commit()
         
@@ -497,12 +3018,11 @@ def login():
     
     return jsonify({'error': 'Invalid credentials'}), 401
 
-@app.route('/api/chat/send', methods=['POST'])
-def send_chat_message():
-    data = request.json
-    user_id = data.get('user_id')
-    message = data['message']
-    session_id = data.get('session_id')
+def save_chat_exchange(user_id, session_id, message, response_data):
+    """Persist one user message and the AI reply in a synchronous commit."""
+    # Land any queued writes first so this session and its earlier messages exist
+    if not chat_writer.flush(timeout=app.config['WRITE_LOCK_TIMEOUT']):
+        raise DatabaseBusy()
     
     # Create new session if not provided
     if not session_id:
@@ -510,6 +3030,7 @@ def send_chat_message():
         db.session.add(session)
         db.session.flush()
         session_id = session.id
+        record_metric('chat', 'sessions')
     
     # Save user message
     user_message = ChatMessage(
@@ -520,68 +3041,227 @@ def send_chat_message():
     )
     db.session.add(user_message)
     
-    # Get AI response
-    response_data = chatbot.get_response(message, user_id)
-    
     # Save AI message
     ai_message = ChatMessage(
         session_id=session_id,
         sender_type='ai',
         message=response_data['message'],
         message_type=response_data['type'],
-        crisis_keywords=json.dumps(response_data['crisis_keywords']),
+        **crisis_columns(response_data['crisis_keywords']),
         sentiment=response_data['sentiment']
     )
     db.session.add(ai_message)
+    db.session.execute(session_aggregate_update(), [session_aggregate_params(session_id, response_data)])
     
     # Update session if crisis detected
     if response_data['crisis_detected']:
         session = ChatSession.query.get(session_id)
+        if not session.crisis_detected:
+            record_metric('chat', 'crisis_sessions')
         session.crisis_detected = True
         session.status = 'escalated'
     
     db.session.commit()
     
-    return jsonify({
+    if response_data['crisis_detected']:
+        publish_crisis_alert(ai_message, db.session.get(User, session.user_id) if session.user_id else None)
+    return session_id
+
+def chat_reply_data(session_id, response_data):
+    return {
         'session_id': session_id,
         'response': response_data['message'],
         'type': response_data['type'],
         'resources': response_data['resources'],
         'follow_up_questions': response_data['follow_up_questions'],
         'crisis_detected': response_data['crisis_detected']
+    }
+
+@app.route('/api/chat/send', methods=['POST'])
+@retry_on_busy
+def send_chat_message():
+    data = request.json
+    user_id = data.get('user_id')
+    message = data['message']
+    session_id = data.get('session_id')
+    
+    # Get AI response
+    response_data = chatbot.get_response(message, user_id)
+    
+    if chat_writer.enabled and not response_data['crisis_detected']:
+        # Non-crisis exchanges are group-committed by the background writer
+        session_id = chat_writer.enqueue(user_id, session_id, message, response_data)
+    else:
+        session_id = save_chat_exchange(user_id, session_id, message, response_data)
+    
+    return jsonify(chat_reply_data(session_id, response_data))
+
+CHAT_HISTORY_FIELDS = ['id', 'sender_type', 'message', 'message_type', 'timestamp', 'crisis', 'sentiment']
+
+@app.route('/api/chat/sessions/<session_id>/messages', methods=['GET'])
+def get_chat_messages(session_id):
+    try:
+        limit, after = parse_page_args(CHAT_HISTORY_PAGE_SIZE, CHAT_HISTORY_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'order must be asc or desc'}), 400
+    session = db.session.get(ChatSession, session_id)
+    if not session:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    messages = chat_history_rows(session, limit + 1, after, oldest_first=order == 'asc')
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].timestamp, messages[-1].id)
+    
+    # Rows as arrays in CHAT_HISTORY_FIELDS order; long sessions repeat no keys
+    return jsonify({
+        'session_id': session_id,
+        'fields': CHAT_HISTORY_FIELDS,
+        'messages': [[m.id, m.sender_type, m.message, m.message_type, m.timestamp.isoformat(), m.crisis_flag, m.sentiment]
+                     for m in messages],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/chat/users/<user_id>/sessions', methods=['GET'])
+def get_user_chat_sessions(user_id):
+    try:
+        limit, after = parse_page_args(CHAT_SESSIONS_PAGE_SIZE, CHAT_SESSIONS_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    
+    sessions = db.session.query(ChatSession).filter(ChatSession.user_id == user_id)
+    if request.args.get('topic'):
+        sessions = sessions.filter(ChatSession.topics.has_element(request.args['topic']))
+    
+    # One page of sessions, then every count for the page in a single grouped join
+    page = keyset_page(sessions, ChatSession.started_at, ChatSession.id, limit + 1, after).subquery()
+    rows = db.session.query(
+        page.c.id, page.c.started_at, page.c.ended_at, page.c.status, page.c.crisis_detected,
+        page.c.sentiment_score, page.c.topics, page.c.archived_at,
+        db.func.count(ChatMessage.id).label('message_count'),
+        db.func.coalesce(db.func.sum(db.case((ChatMessage.sender_type == 'user', 1), else_=0)), 0).label('user_messages'),
+        db.func.coalesce(db.func.sum(db.case((ChatMessage.crisis_flag == True, 1), else_=0)), 0).label('crisis_messages'),
+        db.func.max(ChatMessage.timestamp).label('last_message_at')
+    ).outerjoin(ChatMessage, ChatMessage.session_id == page.c.id).group_by(page.c.id).order_by(
+        page.c.started_at.desc(), page.c.id.desc()
+    ).all()
+    
+    # Archived sessions add the counts kept with their archive rows
+    archived = chat_archive().summaries([(row.id, row.started_at) for row in rows[:limit] if row.archived_at])
+    
+    result = []
+    for row in rows[:limit]:
+        count, user_count, crisis_count, last_at = archived.get(row.id, (0, 0, 0, None))
+        last_message_at = max(filter(None, [row.last_message_at, last_at]), default=None)
+        result.append({
+            'id': row.id,
+            'started_at': row.started_at.isoformat(),
+            'ended_at': row.ended_at.isoformat() if row.ended_at else None,
+            'status': row.status,
+            'crisis_detected': row.crisis_detected,
+            'sentiment_score': row.sentiment_score,
+            'topics': row.topics or [],
+            'message_count': row.message_count + count,
+            'user_message_count': row.user_messages + user_count,
+            'crisis_message_count': row.crisis_messages + crisis_count,
+            'last_message_at': last_message_at.isoformat() if last_message_at else None
+        })
+    
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(rows[limit - 1].started_at, rows[limit - 1].id)
+    return jsonify({
+        'sessions': result,
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/counselors', methods=['GET'])
+@cached_response('counselor')
 def get_counselors():
-    counselors = Counselor.query.filter_by(is_available=True).all()
+    query = Counselor.query.filter_by(is_available=True)
+    if request.args.get('language'):
+        query = query.filter(element_filter(Counselor, 'languages', request.args['language']))
+    counselors = query.all()
     
+    return json_response([counselor_data(c) for c in counselors])
+
+@app.route('/api/counselors/slots', methods=['GET'])
+def get_counselor_slots():
+    try:
+        start = parse_local_datetime(request.args['from'])
+        end = parse_local_datetime(request.args['to']) if 'to' in request.args else start + timedelta(days=7)
+        duration = int(request.args.get('duration', APPOINTMENT_DEFAULT_DURATION))
+        limit = min(int(request.args.get('limit', SLOT_SEARCH_DEFAULT_LIMIT)), SLOT_SEARCH_MAX_LIMIT)
+    except KeyError:
+        return jsonify({'error': 'Query parameter from is required'}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid from, to, duration or limit'}), 400
+    if not start < end <= start + timedelta(days=SLOT_SEARCH_MAX_DAYS):
+        return jsonify({'error': f'to must be after from and at most {SLOT_SEARCH_MAX_DAYS} days later'}), 400
+    if not 0 < duration <= APPOINTMENT_MAX_DURATION or limit < 1:
+        return jsonify({'error': 'Invalid from, to, duration or limit'}), 400
+
+    query = db.select(Counselor.id, Counselor.name, Counselor.specialization).where(Counselor.is_available == True)
+    counselor_ids = request.args.getlist('counselor_id')
+    if counselor_ids:
+        query = query.where(Counselor.id.in_(counselor_ids))
+    if request.args.get('language'):
+        query = query.where(element_filter(Counselor, 'languages', request.args['language']))
+    if request.args.get('specialization'):
+        query = query.where(Counselor.specialization.contains(request.args['specialization']))
+    counselors = db.session.execute(query.order_by(Counselor.rating.desc(), Counselor.id).limit(limit)).all()
+
+    ids = [c.id for c in counselors]
+    windows = availability_windows(ids)
+    busy = booked_intervals(ids, start, end)
     return jsonify([{
-        'id': c.id,
+        'counselor_id': c.id,
         'name': c.name,
         'specialization': c.specialization,
-        'languages': json.loads(c.languages or '[]'),
-        'experience_years': c.experience_years,
-        'rating': c.rating,
-        'total_sessions': c.total_sessions,
-        'bio': c.bio,
-        'availability': json.loads(c.availability or '[]')
+        'slots': [slot.isoformat() for slot in free_slots(windows.get(c.id, {}), busy.get(c.id, []), start, end, duration)]
     } for c in counselors])
 
 @app.route('/api/appointments/book', methods=['POST'])
+@retry_on_busy
 def book_appointment():
     data = request.json
+    try:
+        scheduled = parse_local_datetime(data['scheduled_datetime'])
+        duration = int(data.get('duration', APPOINTMENT_DEFAULT_DURATION))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        # Missing fields and wrong JSON types (null, numbers, lists) are rejected like unparseable text
+        return jsonify({'error': 'Invalid scheduled_datetime or duration'}), 400
+    if not 0 < duration <= APPOINTMENT_MAX_DURATION:
+        return jsonify({'error': 'Invalid scheduled_datetime or duration'}), 400
+    if not db.session.get(Counselor, data['counselor_id']):
+        return jsonify({'error': 'Counselor not found'}), 404
     
-    appointment = Appointment(
-        student_id=data['student_id'],
-        counselor_id=data['counselor_id'],
-        scheduled_datetime=datetime.fromisoformat(data['scheduled_datetime'].replace('Z', '+00:00')),
-        type=data.get('type', 'individual'),
-        mode=data.get('mode', 'video'),
-        notes=data.get('notes', '')
-    )
-    
-    db.session.add(appointment)
-    db.session.commit()
+    with booking_lock:
+        if write_lock is not None:
+            # Workers in other processes book too; hold their writes off from the check until this commit
+            take_write_lock(db.session)
+        conflict = counselor_conflict(data['counselor_id'], scheduled, duration)
+        if conflict:
+            db.session.rollback()
+            return jsonify({'error': conflict}), 409
+
+        appointment = Appointment(
+            student_id=data['student_id'],
+            counselor_id=data['counselor_id'],
+            scheduled_datetime=scheduled,
+            duration=duration,
+            type=data.get('type', 'individual'),
+            mode=data.get('mode', 'video'),
+            notes=data.get('notes', '')
+        )
+        
+        db.session.add(appointment)
+        record_metric('appointments', 'booked')
+        db.session.commit()
     
     return jsonify({
         'message': 'Appointment booked successfully',
@@ -608,63 +3288,69 @@ def get_appointments(user_id):
     } for apt, counselor in appointments])
 
 @app.route('/api/resources', methods=['GET'])
+@cached_response('resource')
 def get_resources():
     category = request.args.get('category')
     language = request.args.get('language', 'en')
+    tag = request.args.get('tag')
     
     query = Resource.query
     if category:
         query = query.filter_by(category=category)
+    if tag:
+        query = query.filter(element_filter(Resource, 'tags', tag))
     query = query.filter_by(language=language)
     
     resources = query.order_by(Resource.created_at.desc()).all()
     
-    return jsonify([{
-        'id': r.id,
-        'title': r.title,
-        'description': r.description,
-        'content_type': r.content_type,
-        'category': r.category,
-        'language': r.language,
-        'url': r.url,
-        'duration': r.duration,
-        'difficulty_level': r.difficulty_level,
-        'rating': r.rating,
-        'view_count': r.view_count,
-        'is_featured': r.is_featured,
-        'tags': json.loads(r.tags or '[]')
-    } for r in resources])
+    return json_response([resource_data(r) for r in resources])
 
 @app.route('/api/forum/posts', methods=['GET'])
 def get_forum_posts():
     category = request.args.get('category')
+    tag = request.args.get('tag')
+    try:
+        limit, after = parse_page_args(FORUM_PAGE_SIZE, FORUM_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
     
-    query = ForumPost.query.filter_by(status='active')
+    # List columns only (preview instead of content), author name in the same query
+    query = db.session.query(
+        ForumPost.id, ForumPost.title, ForumPost.preview, ForumPost.category, ForumPost.is_anonymous,
+        ForumPost.upvotes, ForumPost.downvotes, ForumPost.reply_count, ForumPost.view_count,
+        ForumPost.created_at, ForumPost.tags, User.name.label('author_name')
+    ).outerjoin(User, ForumPost.author_id == User.id).filter(ForumPost.status == 'active')
     if category:
-        query = query.filter_by(category=category)
+        query = query.filter(ForumPost.category == category)
+    if tag:
+        query = query.filter(element_filter(ForumPost, 'tags', tag))
     
-    posts = query.order_by(ForumPost.created_at.desc()).all()
+    posts = keyset_page(query, ForumPost.created_at, ForumPost.id, limit + 1, after).all()
     
     result = []
-    for post in posts:
-        author = User.query.get(post.author_id)
+    for post in posts[:limit]:
         result.append({
             'id': post.id,
             'title': post.title,
-            'content': post.content[:500] + '...' if len(post.content) > 500 else post.content,
+            'content': post.preview,
             'category': post.category,
-            'author_name': 'Anonymous' if post.is_anonymous else author.name,
+            'author_name': 'Anonymous' if post.is_anonymous else post.author_name,
             'upvotes': post.upvotes,
             'downvotes': post.downvotes,
             'reply_count': post.reply_count,
             'view_count': post.view_count,
             'created_at': post.created_at.isoformat(),
-            'tags': json.loads(post.tags or '[]')
+            'tags': post.tags or []
         })
     
-    return jsonify(result)
+    response = jsonify(result)
+    if len(posts) > limit:
+        last = posts[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(last.created_at, last.id)
+    return response
 
 @app.route('/api/forum/posts', methods=['POST'])
+@retry_on_busy
 def create_forum_post():
     data = request.json
     
@@ -673,7 +3359,7 @@ def create_forum_post():
         title=data['title'],
         content=data['content'],
         category=data.get('category'),
-        tags=json.dumps(data.get('tags', [])),
+        tags=data.get('tags', []),
         is_anonymous=data.get('is_anonymous', True)
     )
     
@@ -686,136 +3372,200 @@ def create_forum_post():
     })
 
 @app.route('/api/screening/<screening_type>', methods=['POST'])
+@retry_on_busy
 def submit_screening(screening_type):
     data = request.json
-    user_id = data['user_id']
-    responses = data['responses']
-    
-    # Calculate scores based on screening type
-    total_score = sum(responses.values())
-    
-    # Determine risk level based on standard cutoffs
-    if screening_type == 'phq9':
-        if total_score <= 4:
-            risk_level = 'minimal'
-        elif total_score <= 9:
-            risk_level = 'mild'
-        elif total_score <= 14:
-            risk_level = 'moderate'
-        elif total_score <= 19:
-            risk_level = 'moderately_severe'
-        else:
-            risk_level = 'severe'
-    elif screening_type == 'gad7':
-        if total_score <= 4:
-            risk_level = 'minimal'
-        elif total_score <= 9:
-            risk_level = 'mild'
-        elif total_score <= 14:
-            risk_level = 'moderate'
-        else:
-            risk_level = 'severe'
-    else:  # ghq
-        if total_score <= 3:
-            risk_level = 'low'
-        else:
-            risk_level = 'high'
-    
-    # Save screening response
-    screening = ScreeningResponse(
-        user_id=user_id,
-        screening_type=screening_type,
-        responses=json.dumps(responses),
-        total_score=total_score,
-        risk_level=risk_level
-    )
-    
-    db.session.add(screening)
-    
-    # Update user profile
-    user = User.query.get(user_id)
-    if screening_type == 'phq9':
-        user.phq9_score = total_score
-    elif screening_type == 'gad7':
-        user.gad7_score = total_score
-    elif screening_type == 'ghq':
-        user.ghq_score = total_score
-    
-    user.risk_level = risk_level
-    user.last_screening = datetime.utcnow()
+    if not valid_screening_responses(data.get('responses')):
+        return jsonify({'error': 'responses must map question ids to integer scores'}), 400
     
+    try:
+        result, = save_screenings([(data['user_id'], screening_type, data['responses'])])
+    except LookupError:
+        return jsonify({'error': 'User not found'}), 404
     db.session.commit()
     
-    # Generate recommendations
-    recommendations = []
-    if risk_level in ['moderate', 'moderately_severe', 'severe', 'high']:
-        recommendations.extend([
-            "Consider booking a session with a counselor",
-            "Join our peer support community",
-            "Practice daily mindfulness exercises"
-        ])
+    return jsonify(result)
+
+@app.route('/api/screening/bulk', methods=['POST'])
+@retry_on_busy
+def submit_screenings_bulk():
+    submissions = (request.json or {}).get('submissions')
+    if not isinstance(submissions, list) or not all(
+            isinstance(s, dict) and isinstance(s.get('user_id'), str) and isinstance(s.get('screening_type'), str)
+            and valid_screening_responses(s.get('responses')) for s in submissions):
+        return jsonify({'error': 'submissions must be an array of {user_id, screening_type, responses}'}), 400
+    if len(submissions) > SCREENING_BULK_MAX:
+        return jsonify({'error': f'At most {SCREENING_BULK_MAX} submissions per request'}), 400
+    if not submissions:
+        return jsonify({'results': []})
     
-    if risk_level in ['moderately_severe', 'severe']:
-        recommendations.append("Urgent: Please contact mental health services immediately")
+    try:
+        results = save_screenings([(s['user_id'], s['screening_type'], s['responses']) for s in submissions])
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Unknown user_id', 'user_ids': e.args[0]}), 400
+    db.session.commit()
     
-    return jsonify({
-        'total_score': total_score,
-        'risk_level': risk_level,
-        'recommendations': recommendations,
-        'need_immediate_help': risk_level in ['severe', 'high']
-    })
+    return json_response({'results': results})
 
 @app.route('/api/admin/analytics', methods=['GET'])
+@cached_response(ttl=app.config['ANALYTICS_CACHE_TTL'])
 def get_analytics():
-    # Get various metrics for admin dashboard
-    total_users = User.query.count()
-    total_sessions = ChatSession.query.count()
-    crisis_sessions = ChatSession.query.filter_by(crisis_detected=True).count()
-    total_appointments = Appointment.query.count()
-    
-    # Recent activity (last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    new_users_week = User.query.filter(User.created_at >= week_ago).count()
-    
-    # Risk level distribution
-    risk_levels = db.session.query(User.risk_level, db.func.count(User.risk_level)).group_by(User.risk_level).all()
-    
-    # Most common issues (from chat analysis)
-    anxiety_sessions = ChatMessage.query.filter(
-        ChatMessage.message.contains('anxious') | 
-        ChatMessage.message.contains('anxiety')
-    ).count()
-    
-    depression_sessions = ChatMessage.query.filter(
-        ChatMessage.message.contains('depressed') | 
-        ChatMessage.message.contains('depression')
-    ).count()
+    # Totals, recent activity and risk distribution from the analytics rollups
+    snapshot = analytics_snapshot()
+    
+    # Most common issues (from the chat message full-text index)
+    anxiety_sessions = count_chat_messages_matching(CHAT_TOPIC_TERMS['anxiety'])
+    depression_sessions = count_chat_messages_matching(CHAT_TOPIC_TERMS['depression'])
     
     return jsonify({
-        'overview': {
-            'total_users': total_users,
-            'total_sessions': total_sessions,
-            'crisis_sessions': crisis_sessions,
-            'total_appointments': total_appointments,
-            'new_users_week': new_users_week
-        },
-        'risk_distribution': {level: count for level, count in risk_levels},
+        'overview': snapshot['overview'],
+        'risk_distribution': snapshot['risk_distribution'],
         'common_issues': {
             'anxiety': anxiety_sessions,
             'depression': depression_sessions
         }
     })
 
+@app.route('/api/admin/chat/search', methods=['GET'])
+def search_chat():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    try:
+        limit = min(int(request.args.get('limit', 50)), 200)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    results = search_chat_messages(query, limit)
+    
+    return jsonify([{
+        'message_id': msg.id,
+        'session_id': msg.session_id,
+        'sender_type': msg.sender_type,
+        'message': msg.message,
+        'timestamp': msg.timestamp.isoformat()
+    } for msg in results])
+
+CLASSIFY_MAX_BATCH = 1000
+
+@app.route('/api/admin/chat/classify', methods=['POST'])
+def classify_chat_messages():
+    messages = (request.json or {}).get('messages')
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return jsonify({'error': 'messages must be an array of strings'}), 400
+    if len(messages) > CLASSIFY_MAX_BATCH:
+        return jsonify({'error': f'At most {CLASSIFY_MAX_BATCH} messages per request'}), 400
+    
+    return json_response({'results': chatbot.classify_batch(messages)})
+
+@app.route('/api/admin/cache', methods=['GET'])
+def get_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/admin/crisis-alerts/stream', methods=['GET'])
+def stream_crisis_alerts():
+    # EventSource sends Last-Event-ID on reconnect; the query parameter is for the first connect
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        after = decode_cursor(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+    
+    if app.config['MULTIPROCESS']:
+        crisis_relay.ensure_started()
+    # Take the live position before replaying so nothing published meanwhile is lost
+    sequence = crisis_alerts.sequence
+    replay = crisis_alert_replay(after) if after else []
+    # Idle subscribers must not hold a pooled connection for the life of the stream
+    db.session.remove()
+    heartbeat = app.config['CRISIS_ALERT_HEARTBEAT']
+    
+    def generate(sequence):
+        replayed = set()
+        crisis_alerts.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            page = replay
+            while page:
+                for event_id, data in page:
+                    replayed.add(event_id)
+                    yield sse_event(event_id, data)
+                if len(page) < CRISIS_ALERT_REPLAY_LIMIT:
+                    break
+                # Missed more than one page: keep reading until caught up with the live position
+                with app.app_context():
+                    page = crisis_alert_replay(decode_cursor(page[-1][0]))
+            while True:
+                sequence, events = crisis_alerts.wait(sequence, heartbeat)
+                if not events:
+                    yield ': keepalive\n\n'
+                for event_id, data in events:
+                    if event_id not in replayed:
+                        yield sse_event(event_id, data)
+        finally:
+            crisis_alerts.unsubscribe()
+    
+    return Response(generate(sequence), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def get_request_metrics():
+    return jsonify({
+        'enabled': app.config['PROFILING'],
+        'bucket_bounds_ms': list(RequestMetrics.BUCKETS_MS),
+        'endpoints': request_metrics.snapshot()
+    })
+
+@app.route('/api/metrics/profiles', methods=['GET'])
+def get_request_profiles():
+    return jsonify(request_metrics.profiles())
+
+app.config['ADMIN_TOKEN'] = os.environ.get('MITRA_ADMIN_TOKEN')
+
+def admin_token_required(view):
+    """Require ``Authorization: Bearer <MITRA_ADMIN_TOKEN>``; without a configured token the route is disabled."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        if not token:
+            return jsonify({'error': 'Set MITRA_ADMIN_TOKEN to enable this endpoint'}), 403
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return jsonify({'error': 'Admin token required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/admin/chatbot/keywords', methods=['GET'])
+def get_chatbot_keywords():
+    return jsonify(chatbot.matcher.lexicons)
+
+@app.route('/api/admin/chatbot/keywords', methods=['PUT'])
+@admin_token_required
+def update_chatbot_keywords():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object of keyword lists'}), 400
+    
+    try:
+        chatbot.configure_keywords(**data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(chatbot.matcher.lexicons)
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        upgrade_database()
         
         # Create sample data if database is empty
         if User.query.count() == 0:
             # Create sample admin user
             admin = User(
                 email='admin@mitra.ac.in',
-                password_hash=generate_password_hash('admin123'),
+                password_hash=password_hasher.hash('admin123'),
                 name='MITRA Admin',
                 college='Kashmir University',
                 is_admin=True
@@ -824,7 +3574,7 @@ if __name__ == '__main__':
             # Create sample counselor user
             counselor_user = User(
                 email='dr.sharma@mitra.ac.in',
-                password_hash=generate_password_hash('counselor123'),
+                password_hash=password_hasher.hash('counselor123'),
                 name='Dr. Priya Sharma',
                 college='Kashmir University',
                 is_counselor=True
@@ -868,7 +3618,7 @@ if __name__ == '__main__':
             for student_data in students:
                 student = User(
                     email=student_data['email'],
-                    password_hash=generate_password_hash('password123'),
+                    password_hash=password_hasher.hash('password123'),
                     name=student_data['name'],
                     college=student_data['college'],
                     course=student_data['course'],
@@ -891,12 +3641,12 @@ if __name__ == '__main__':
                 specialization='Clinical Psychology, Anxiety Disorders, Student Counseling',
                 qualifications='PhD Clinical Psychology, M.Phil Counseling Psychology',
                 experience_years=8,
-                languages=json.dumps(['English', 'Hindi', 'Urdu', 'Kashmiri']),
-                availability=json.dumps([
+                languages=['English', 'Hindi', 'Urdu', 'Kashmiri'],
+                availability=[
                     'Monday 9:00-17:00', 'Tuesday 9:00-17:00', 
                     'Wednesday 9:00-17:00', 'Thursday 9:00-17:00', 
                     'Friday 9:00-15:00'
-                ]),
+                ],
                 bio='Specialized in student mental health with focus on anxiety, depression, and academic stress. Fluent in local languages and culturally sensitive approaches.',
                 phone='+91-9419-123456',
                 email='dr.sharma@mitra.ac.in'
@@ -906,7 +3656,7 @@ if __name__ == '__main__':
             # Add more counselors
             counselor2 = User(
                 email='dr.ahmed@mitra.ac.in',
-                password_hash=generate_password_hash('counselor123'),
+                password_hash=password_hasher.hash('counselor123'),
                 name='Dr. Mohd Ahmed',
                 college='Kashmir University',
                 is_counselor=True
@@ -920,11 +3670,11 @@ if __name__ == '__main__':
                 specialization='Trauma Counseling, PTSD, Crisis Intervention',
                 qualifications='MD Psychiatry, Trauma Specialist Certification',
                 experience_years=12,
-                languages=json.dumps(['English', 'Urdu', 'Kashmiri', 'Hindi']),
-                availability=json.dumps([
+                languages=['English', 'Urdu', 'Kashmiri', 'Hindi'],
+                availability=[
                     'Monday 10:00-18:00', 'Wednesday 10:00-18:00', 
                     'Friday 10:00-18:00', 'Saturday 9:00-13:00'
-                ]),
+                ],
                 bio='Expert in trauma and crisis counseling, particularly experienced with conflict-related stress and student mental health issues.',
                 phone='+91-9419-789012',
                 email='dr.ahmed@mitra.ac.in'
@@ -941,7 +3691,7 @@ if __name__ == '__main__':
                     'language': 'ur',
                     'url': '/resources/anxiety-urdu-guide',
                     'difficulty_level': 'beginner',
-                    'tags': json.dumps(['anxiety', 'urdu', 'breathing', 'relaxation'])
+                    'tags': ['anxiety', 'urdu', 'breathing', 'relaxation']
                 },
                 {
                     'title': 'Sleep Better Tonight - Hindi Audio',
@@ -952,7 +3702,7 @@ if __name__ == '__main__':
                     'url': '/resources/sleep-hindi-audio.mp3',
                     'duration': 900,  # 15 minutes
                     'difficulty_level': 'beginner',
-                    'tags': json.dumps(['sleep', 'hindi', 'meditation', 'relaxation'])
+                    'tags': ['sleep', 'hindi', 'meditation', 'relaxation']
                 },
                 {
                     'title': 'Study Stress Management for Kashmir Students',
@@ -963,7 +3713,7 @@ if __name__ == '__main__':
                     'url': '/resources/study-stress-kashmir.mp4',
                     'duration': 1200,  # 20 minutes
                     'difficulty_level': 'intermediate',
-                    'tags': json.dumps(['stress', 'academic', 'kashmir', 'students'])
+                    'tags': ['stress', 'academic', 'kashmir', 'students']
                 },
                 {
                     'title': 'Depression Support Guide (Kashmiri)',
@@ -973,12 +3723,13 @@ if __name__ == '__main__':
                     'language': 'ks',
                     'url': '/resources/depression-kashmiri-guide',
                     'difficulty_level': 'beginner',
-                    'tags': json.dumps(['depression', 'kashmiri', 'support', 'coping'])
+                    'tags': ['depression', 'kashmiri', 'support', 'coping']
                 }
             ]
             
-            for resource_data in resources_data:
-                resource = Resource(**resource_data, created_by=admin.id)
+            # Not resource_data: that name is the module's resource serializer
+            for sample in resources_data:
+                resource = Resource(**sample, created_by=admin.id)
                 db.session.add(resource)
             
             # Create sample forum posts
@@ -988,14 +3739,14 @@ if __name__ == '__main__':
                     'title': 'Dealing with Exam Anxiety',
                     'content': 'Hi everyone, I\'m struggling with severe anxiety before exams. My heart races and I can\'t concentrate. Any tips from fellow students?',
                     'category': 'academic_stress',
-                    'tags': json.dumps(['anxiety', 'exams', 'help'])
+                    'tags': ['anxiety', 'exams', 'help']
                 },
                 {
                     'author_id': student_users[1].id if len(student_users) > 1 else admin.id,
                     'title': 'Feeling Isolated After Moving to Srinagar',
                     'content': 'I moved from a small town to Srinagar for college and feeling very lonely. How do others cope with homesickness?',
                     'category': 'social_support',
-                    'tags': json.dumps(['loneliness', 'college', 'homesickness'])
+                    'tags': ['loneliness', 'college', 'homesickness']
                 }
             ]
             
@@ -1004,6 +3755,7 @@ if __name__ == '__main__':
                 db.session.add(post)
             
             db.session.commit()
+            rebuild_analytics()
             print("Sample data created successfully!")
     
     print("MITRA Backend starting on http://localhost:5000")
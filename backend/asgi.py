@@ -0,0 +1,276 @@
+# ASGI serving mode. /api/health, /api/chat/send and the crisis alert
+# stream run on the event loop with an aiosqlite engine, so an idle SSE
+# subscriber or a chat request waiting on SQLite does not hold a thread.
+# Every other route is the unchanged Flask app, run on a bounded thread
+# pool through a2wsgi.
+#
+#     pip install -r requirements-async.txt
+#     flask --app app db-upgrade
+#     uvicorn asgi:application --host 0.0.0.0 --port 5000
+import asyncio
+import os
+import queue
+import random
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import (
+    app, db, chatbot, chat_writer, crisis_alerts, crisis_relay, ChatMessage, ChatSession, User,
+    BUSY_RETRY_DELAY, CRISIS_ALERT_REPLAY_LIMIT, DatabaseBusy, WriteLockTimeout, chat_exchange_rows,
+    chat_reply_data, crisis_alert_data, crisis_alert_events, crisis_alert_replay_query, decode_cursor,
+    encode_cursor, is_busy_error, metric_upsert, session_aggregate_update, sse_event,
+    write_lock as process_write_lock
+)
+
+app.config['ASYNC_WSGI_THREADS'] = int(os.environ.get('MITRA_ASYNC_WSGI_THREADS', 10))
+
+with app.app_context():
+    database_url = db.engine.url
+if database_url.get_backend_name() != 'sqlite' or database_url.database in (None, '', ':memory:'):
+    raise RuntimeError('The ASGI server needs DATABASE_URL to point at an SQLite file')
+
+engine = create_async_engine(
+    database_url.set(drivername='sqlite+aiosqlite'),
+    **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# SQLite allows one writer at a time; queueing writers here instead of in
+# busy_timeout keeps a burst of chat requests from failing with "database is locked"
+write_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def exclusive_write():
+    """One writer at a time on this event loop and, with MITRA_MULTIPROCESS, across worker processes."""
+    async with write_lock:
+        if process_write_lock is None:
+            yield
+            return
+        await asyncio.to_thread(process_write_lock.acquire)
+        try:
+            yield
+        finally:
+            process_write_lock.release()
+
+@event.listens_for(engine.sync_engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+class BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+async def read_json(scope, receive):
+    headers = dict(scope['headers'])
+    content_type = headers.get(b'content-type', b'').split(b';')[0].strip()
+    if content_type != b'application/json' and not content_type.endswith(b'+json'):
+        raise BadRequest(415, 'Request body must be JSON')
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    try:
+        return app.json.loads(body)
+    except ValueError:
+        raise BadRequest(400, 'Request body is not valid JSON')
+
+def response_headers(content_type, extra=()):
+    # Same origin header flask_cors adds to the WSGI routes; none of these routes page with a cursor
+    return [
+        (b'content-type', content_type),
+        (b'access-control-allow-origin', b'*'),
+        *extra
+    ]
+
+async def send_json(send, data, status=200, headers=()):
+    body = (app.json.dumps(data) + '\n').encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': response_headers(b'application/json', [(b'content-length', str(len(body)).encode()), *headers])
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def save_chat_exchange(user_id, session_id, message, response_data):
+    """Async counterpart of app.save_chat_exchange."""
+    if chat_writer.enabled:
+        # Land queued writes first so this session and its earlier messages exist
+        if not await asyncio.to_thread(chat_writer.flush, app.config['WRITE_LOCK_TIMEOUT']):
+            raise DatabaseBusy()
+
+    session_id, rows = chat_exchange_rows(user_id, session_id, message, response_data)
+    delay = BUSY_RETRY_DELAY
+    for attempt in range(app.config['BUSY_RETRIES'] + 1):
+        try:
+            user = await write_chat_exchange(session_id, rows, response_data)
+            break
+        except OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            if attempt == app.config['BUSY_RETRIES']:
+                raise DatabaseBusy() from e
+            await asyncio.sleep(delay * (1 + random.random()))
+            delay *= 2
+
+    if response_data['crisis_detected']:
+        ai_message = SimpleNamespace(**rows['messages'][-1])
+        crisis_alerts.publish(encode_cursor(ai_message.timestamp, ai_message.id), crisis_alert_data(ai_message, user))
+    return session_id
+
+async def write_chat_exchange(session_id, rows, response_data):
+    """Insert the rows in one transaction; returns the session's user when a crisis was escalated."""
+    user = None
+    async with exclusive_write(), Session() as session, session.begin():
+        if rows['sessions']:
+            await session.execute(db.insert(ChatSession), rows['sessions'])
+        await session.execute(db.insert(ChatMessage), rows['messages'])
+        await session.execute(session_aggregate_update(), rows['aggregates'])
+        for metric_type, metric_name in rows['metrics']:
+            await session.execute(metric_upsert(metric_type, metric_name))
+
+        if response_data['crisis_detected']:
+            chat_session = await session.get(ChatSession, session_id)
+            if not chat_session.crisis_detected:
+                await session.execute(metric_upsert('chat', 'crisis_sessions'))
+            chat_session.crisis_detected = True
+            chat_session.status = 'escalated'
+            if chat_session.user_id:
+                user = await session.get(User, chat_session.user_id)
+    return user
+
+async def health_check(scope, receive, send):
+    await send_json(send, {'status': 'healthy', 'message': 'MITRA Backend is running'})
+
+async def send_chat_message(scope, receive, send):
+    try:
+        data = await read_json(scope, receive)
+        if not isinstance(data, dict) or 'message' not in data:
+            raise BadRequest(400, 'message is required')
+    except BadRequest as e:
+        await send_json(send, {'error': str(e)}, e.status)
+        return
+    user_id = data.get('user_id')
+    message = data['message']
+    session_id = data.get('session_id')
+
+    response_data = chatbot.get_response(message, user_id)
+
+    try:
+        if chat_writer.enabled and not response_data['crisis_detected']:
+            try:
+                session_id = chat_writer.enqueue(user_id, session_id, message, response_data, block=False)
+            except queue.Full:
+                # Wait for room off the event loop so streams and other requests keep running
+                session_id = await asyncio.to_thread(chat_writer.enqueue, user_id, session_id, message, response_data)
+        else:
+            session_id = await save_chat_exchange(user_id, session_id, message, response_data)
+    except (DatabaseBusy, WriteLockTimeout):
+        await send_json(send, {'error': 'The database is busy, please retry shortly'}, 503, [(b'retry-after', b'1')])
+        return
+
+    await send_json(send, chat_reply_data(session_id, response_data))
+
+async def crisis_alert_replay(after):
+    """Async counterpart of app.crisis_alert_replay."""
+    async with Session() as session:
+        return crisis_alert_events(await session.execute(crisis_alert_replay_query(after)))
+
+async def stream_crisis_alerts(scope, receive, send):
+    headers = dict(scope['headers'])
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or query.get('last_event_id', [None])[0]
+    try:
+        after = decode_cursor(last_event_id) if last_event_id else None
+    except ValueError:
+        await send_json(send, {'error': 'Invalid Last-Event-ID'}, 400)
+        return
+
+    if app.config['MULTIPROCESS']:
+        crisis_relay.ensure_started()
+    # Take the live position before replaying so nothing published meanwhile is lost
+    sequence = crisis_alerts.sequence
+    replay = await crisis_alert_replay(after) if after else []
+    heartbeat = app.config['CRISIS_ALERT_HEARTBEAT']
+
+    async def write(text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    async def stream(sequence):
+        replayed = set()
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': response_headers(b'text/event-stream; charset=utf-8', [
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no')
+            ])
+        })
+        await write('retry: 3000\n\n')
+        page = replay
+        while page:
+            for event_id, data in page:
+                replayed.add(event_id)
+                await write(sse_event(event_id, data))
+            if len(page) < CRISIS_ALERT_REPLAY_LIMIT:
+                break
+            # Missed more than one page: keep reading until caught up with the live position
+            page = await crisis_alert_replay(decode_cursor(page[-1][0]))
+        while True:
+            sequence, events = await crisis_alerts.wait_async(sequence, heartbeat)
+            if not events:
+                await write(': keepalive\n\n')
+            for event_id, data in events:
+                if event_id not in replayed:
+                    await write(sse_event(event_id, data))
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    crisis_alerts.subscribe()
+    tasks = [asyncio.ensure_future(stream(sequence)), asyncio.ensure_future(disconnected())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        crisis_alerts.unsubscribe()
+
+ROUTES = {
+    ('GET', '/api/health'): health_check,
+    ('POST', '/api/chat/send'): send_chat_message,
+    ('GET', '/api/admin/crisis-alerts/stream'): stream_crisis_alerts
+}
+
+wsgi_application = WSGIMiddleware(app, workers=app.config['ASYNC_WSGI_THREADS'])
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    route = ROUTES.get((scope['method'], scope['path'])) if scope['type'] == 'http' else None
+    if route is None:
+        await wsgi_application(scope, receive, send)
+    else:
+        await route(scope, receive, send)
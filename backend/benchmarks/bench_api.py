@@ -0,0 +1,254 @@
+"""Benchmark harness for the main API routes, with saved runs for comparison.
+
+Drives /api/chat/send, /admin, /api/admin/analytics, /api/forum/posts and
+/api/resources from concurrent clients. By default it uses the Flask
+test client against a database made by generate_data.py; with --url it
+sends HTTP requests to a running server instead. For every endpoint it
+reports throughput, latency percentiles and SQL statements per request.
+SQL figures come from the Server-Timing header, so a server under --url
+must run with MITRA_PROFILING=1 to report them.
+
+Usage (from backend/):
+    python benchmarks/generate_data.py --database /tmp/mitra-synthetic.db
+    python benchmarks/bench_api.py --database /tmp/mitra-synthetic.db --save before.json
+    python benchmarks/bench_api.py --database /tmp/mitra-synthetic.db --compare before.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import closing
+from datetime import datetime
+
+MESSAGES = [
+    "I have been feeling anxious about my exams", "I can't sleep before tests", "I feel so lonely in the hostel",
+    "I am stressed about placements", "Thank you, that helped a lot", "I feel hopeless about my future",
+    "How do I manage my time better?", "I feel a bit better now"
+]
+FORUM_CATEGORIES = [None, None, 'anxiety', 'academic_stress', 'sleep']
+RESOURCE_LANGUAGES = ['en', 'hi', 'ur', 'ks']
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def scenarios(user_ids):
+    """Map endpoint name to a function returning ``(method, path, json_body)`` for one request."""
+    def chat_send(rng):
+        return 'POST', '/api/chat/send', {'user_id': rng.choice(user_ids), 'message': rng.choice(MESSAGES)}
+
+    def forum_posts(rng):
+        category = rng.choice(FORUM_CATEGORIES)
+        return 'GET', '/api/forum/posts' + (f'?category={category}' if category else ''), None
+
+    def resources(rng):
+        return 'GET', f'/api/resources?language={rng.choice(RESOURCE_LANGUAGES)}', None
+
+    return {
+        'chat_send': chat_send,
+        'admin': lambda rng: ('GET', '/admin', None),
+        'admin_analytics': lambda rng: ('GET', '/api/admin/analytics', None),
+        'forum_posts': forum_posts,
+        'resources': resources
+    }
+
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        response = self.local.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Server-Timing', '')
+
+
+def copy_database(source, target):
+    # The backup API includes pages still in the source's -wal file; copying the file alone does not
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+    return target
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_endpoint(transport, make_request, requests, clients, warmup, seed):
+    for i in range(warmup):
+        transport.request(*make_request(random.Random(seed - i - 1)))
+
+    latencies = []
+    queries = []
+    sql_ms = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def client_loop():
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(remaining, None)
+            if i is None:
+                return
+            method, path, body = make_request(random.Random(seed + i))
+            start = time.perf_counter()
+            status, server_timing = transport.request(method, path, body)
+            elapsed = time.perf_counter() - start
+            match = SERVER_TIMING_DB.search(server_timing)
+            with lock:
+                if status >= 400:
+                    errors += 1
+                latencies.append(elapsed * 1000)
+                if match:
+                    sql_ms.append(float(match.group(1)))
+                    queries.append(int(match.group(2)))
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput': requests / duration,
+        'p50_ms': percentile(latencies, 0.50),
+        'p90_ms': percentile(latencies, 0.90),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+        'queries_per_request': sum(queries) / len(queries) if queries else None,
+        'sql_ms_per_request': sum(sql_ms) / len(sql_ms) if sql_ms else None
+    }
+
+
+def format_queries(value):
+    return f'{value:.1f}' if value is not None else '-'
+
+
+def change(current, baseline, lower_is_better=True):
+    if current is None or not baseline:
+        return '-'
+    delta = (current - baseline) / baseline * 100
+    marker = '' if abs(delta) < 5 else (' better' if (delta < 0) == lower_is_better else ' worse')
+    return f'{delta:+.0f}%{marker}'
+
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':<16} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'queries':>8} {'errors':>7}"
+    print(header)
+    for name, r in results['endpoints'].items():
+        print(f"{name:<16} {r['throughput']:>8.1f} {r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['max_ms']:>8.1f} {format_queries(r['queries_per_request']):>8} {r['errors']:>7}")
+    if baseline is None:
+        return
+
+    print(f"\nCompared with {baseline['meta']['label']} ({baseline['meta']['recorded_at']}):")
+    print(f"{'endpoint':<16} {'req/s':>14} {'p50':>14} {'p99':>14} {'queries':>14}")
+    for name, r in results['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            print(f'{name:<16} (not in baseline)')
+            continue
+        print(f"{name:<16} {change(r['throughput'], base['throughput'], lower_is_better=False):>14} "
+              f"{change(r['p50_ms'], base['p50_ms']):>14} {change(r['p99_ms'], base['p99_ms']):>14} "
+              f"{change(r['queries_per_request'], base['queries_per_request']):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--database', help='SQLite file to benchmark in-process with the Flask test client')
+    target.add_argument('--url', help='base URL of a running server, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--copy', action='store_true', help='benchmark a temporary copy so chat writes do not accumulate')
+    parser.add_argument('--endpoints', nargs='+', help='subset of endpoints to run')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', help='name stored with --save (default: the file name)')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier --save run to compare against')
+    args = parser.parse_args()
+
+    if args.database:
+        database = os.path.abspath(args.database)
+        if args.copy:
+            database = copy_database(database, os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db'))
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+        os.environ['MITRA_PROFILING'] = '1'
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from app import app, db, User
+        with app.app_context():
+            user_ids = db.session.execute(
+                db.select(User.id).where(User.is_counselor == False).limit(1000)
+            ).scalars().all()
+        transport = TestClientTransport(app)
+    else:
+        user_ids = [None]
+        transport = HttpTransport(args.url)
+
+    available = scenarios(user_ids)
+    selected = args.endpoints or list(available)
+    unknown = set(selected) - set(available)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))} (choose from {', '.join(available)})")
+
+    results = {
+        'meta': {
+            'label': args.label or (os.path.basename(args.save) if args.save else 'run'),
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'target': args.url or os.path.abspath(args.database),
+            'clients': args.clients,
+            'requests': args.requests
+        },
+        'endpoints': {}
+    }
+    for name in selected:
+        results['endpoints'][name] = run_endpoint(
+            transport, available[name], args.requests, args.clients, args.warmup, args.seed
+        )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nSaved results to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
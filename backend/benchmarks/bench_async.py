@@ -0,0 +1,180 @@
+"""Compare how many concurrent connections one process holds in sync and async mode.
+
+Starts the Flask threaded server (sync) and uvicorn with asgi:application
+(async) on a scratch database. For each number of idle crisis alert
+streams it opens that many SSE connections, then sends chat messages from
+--clients concurrent connections (a few of them crisis messages, which
+every stream receives) and reports chat throughput and latency,
+/api/health latency, and the server's thread count and resident memory.
+
+Usage (from backend/):
+    pip install -r requirements-async.txt
+    python benchmarks/bench_async.py --streams 0 250 1000 --clients 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGES = ["I have been feeling anxious about my exams", "I can't sleep before tests",
+            "I feel so lonely in the hostel", "I am stressed about placements"]
+SERVERS = {
+    'sync': lambda port: [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port)],
+    'async': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+                           '--log-level', 'warning', '--backlog', '4096']
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def create_database(users):
+    path = os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    sys.path.insert(0, BACKEND)
+    from app import app, db, upgrade_database, User
+    with app.app_context():
+        upgrade_database()
+        accounts = [User(email=f'async{i}@mitra.ac.in', password_hash='x', name=f'Async {i}') for i in range(users)]
+        db.session.add_all(accounts)
+        db.session.commit()
+        return path, [user.id for user in accounts]
+
+
+def process_stats(pid):
+    stats = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Threads', 'VmRSS'):
+                stats[key] = int(value.split()[0])
+    return stats['Threads'], stats['VmRSS'] / 1024
+
+
+async def request(port, method, path, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'
+                 f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def open_stream(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b'GET /api/admin/crisis-alerts/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n')
+    while b'retry:' not in await reader.readline():
+        pass
+    return reader, writer
+
+
+async def drain(reader):
+    received = 0
+    while await reader.readline():
+        received += 1
+    return received
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def measure(port, pid, streams, args, user_ids):
+    connections = []
+    for offset in range(0, streams, 100):
+        connections += await asyncio.gather(*(open_stream(port) for _ in range(min(100, streams - offset))))
+    readers = [asyncio.ensure_future(drain(reader)) for reader, _ in connections]
+    threads, rss = process_stats(pid)
+
+    health = []
+    for _ in range(20):
+        begin = time.perf_counter()
+        await request(port, 'GET', '/api/health')
+        health.append((time.perf_counter() - begin) * 1000)
+
+    rng = random.Random(args.seed)
+    bodies = [('{"user_id": "%s", "message": "%s"}' % (
+        rng.choice(user_ids), 'I want to die' if rng.random() < args.crisis else rng.choice(MESSAGES)
+    )).encode() for _ in range(args.requests)]
+    latencies, errors = [], 0
+    pending = iter(bodies)
+
+    async def client():
+        nonlocal errors
+        for body in pending:
+            begin = time.perf_counter()
+            try:
+                status = await request(port, 'POST', '/api/chat/send', body)
+            except OSError:
+                status = 599
+            latencies.append((time.perf_counter() - begin) * 1000)
+            errors += status != 200
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - begin
+    peak_threads, peak_rss = process_stats(pid)
+
+    for reader in readers:
+        reader.cancel()
+    for _, writer in connections:
+        writer.close()
+    await asyncio.sleep(1)
+    return {
+        'threads': max(threads, peak_threads), 'rss_mb': max(rss, peak_rss),
+        'health_p50': percentile(health, 0.5), 'chat_rps': len(bodies) / elapsed,
+        'chat_p50': percentile(latencies, 0.5), 'chat_p99': percentile(latencies, 0.99), 'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--streams', nargs='+', type=int, default=[0, 250, 1000])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--crisis', type=float, default=0.02, help='fraction of chat messages that are crisis alerts')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    database, user_ids = create_database(args.users)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+
+    print(f"{'mode':<6} {'streams':>8} {'threads':>8} {'RSS MB':>7} {'health ms':>10} "
+          f"{'chat req/s':>11} {'chat p50':>9} {'chat p99':>9} {'errors':>7}")
+    for mode in args.modes:
+        port = free_port()
+        server = subprocess.Popen(SERVERS[mode](port), cwd=BACKEND, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                try:
+                    asyncio.run(request(port, 'GET', '/api/health'))
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            for streams in args.streams:
+                r = asyncio.run(measure(port, server.pid, streams, args, user_ids))
+                print(f"{mode:<6} {streams:>8} {r['threads']:>8} {r['rss_mb']:>7.0f} {r['health_p50']:>10.1f} "
+                      f"{r['chat_rps']:>11.0f} {r['chat_p50']:>9.1f} {r['chat_p99']:>9.1f} {r['errors']:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
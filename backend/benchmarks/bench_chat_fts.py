@@ -0,0 +1,109 @@
+"""Benchmark chat topic counts and keyword search: LIKE scans vs the FTS5 index.
+
+Builds a scratch database with synthetic chat messages, applies the
+migrations (which backfill chat_message_fts), and times the queries
+/api/admin/analytics and /api/admin/chat/search run.
+
+Usage (from backend/):
+    python benchmarks/bench_chat_fts.py --messages 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--messages', type=int, default=1_000_000)
+parser.add_argument('--repeat', type=int, default=3)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, upgrade_database, ChatMessage, CHAT_TOPIC_TERMS, count_chat_messages_matching, search_chat_messages
+
+FILLER = ('today i was thinking about my classes and my friends at college and the weather in srinagar '
+          'it has been a long week with assignments lab work and family calls').split()
+TOPIC_WORDS = ['anxious', 'anxiety', 'depressed', 'depression', 'exam', 'panic', 'lonely', 'sleep']
+
+
+def synthetic_message(rng):
+    words = [rng.choice(FILLER) for _ in range(rng.randint(8, 40))]
+    if rng.random() < 0.15:
+        words.insert(rng.randrange(len(words)), rng.choice(TOPIC_WORDS))
+    return ' '.join(words)
+
+
+def seed(count, rng):
+    start = datetime(2024, 1, 1)
+    batch = 10_000
+    sessions = [str(uuid.uuid4()) for _ in range(max(1, count // 20))]
+    for offset in range(0, count, batch):
+        rows = [{
+            'id': str(uuid.uuid4()),
+            'session_id': rng.choice(sessions),
+            'sender_type': 'user' if i % 2 == 0 else 'ai',
+            'message': synthetic_message(rng),
+            'timestamp': start + timedelta(seconds=offset + i)
+        } for i in range(min(batch, count - offset))]
+        db.session.execute(db.insert(ChatMessage), rows)
+        db.session.commit()
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def like_count(terms):
+    condition = db.or_(*[ChatMessage.message.contains(term) for term in terms])
+    return ChatMessage.query.filter(condition).count()
+
+
+def like_search(text, limit):
+    query = ChatMessage.query
+    for word in text.split():
+        query = query.filter(ChatMessage.message.contains(word))
+    return query.limit(limit).all()
+
+
+def main():
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        begin = time.perf_counter()
+        seed(args.messages, rng)
+        print(f'Seeded {args.messages} messages in {time.perf_counter() - begin:.1f}s ({db_path})')
+
+        # Applying the FTS migration on a populated table is the backfill path
+        begin = time.perf_counter()
+        upgrade_database()
+        print(f'FTS backfill (migration) took {time.perf_counter() - begin:.1f}s')
+
+        print(f"\n{'query':<32} {'LIKE ms':>10} {'FTS ms':>10} {'speedup':>8}")
+        for topic, terms in CHAT_TOPIC_TERMS.items():
+            like_time, like_result = best_of(lambda: like_count(terms), args.repeat)
+            fts_time, fts_result = best_of(lambda: count_chat_messages_matching(terms), args.repeat)
+            label = f'count {topic} ({like_result}/{fts_result})'
+            print(f'{label:<32} {like_time * 1000:>10.1f} {fts_time * 1000:>10.1f} {like_time / fts_time:>7.1f}x')
+
+        for text in ('panic', 'lonely sleep'):
+            like_time, _ = best_of(lambda: like_search(text, 50), args.repeat)
+            fts_time, _ = best_of(lambda: search_chat_messages(text, 50), args.repeat)
+            label = f'search "{text}" limit 50'
+            print(f'{label:<32} {like_time * 1000:>10.1f} {fts_time * 1000:>10.1f} {like_time / fts_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
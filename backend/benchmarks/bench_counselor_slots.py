@@ -0,0 +1,120 @@
+"""Benchmark the counselor free-slot search and booking conflict check.
+
+Builds a scratch database with synthetic counselors and a semester of
+appointments, then times /api/counselors/slots for a week and for the
+whole semester, and /api/appointments/book for free and conflicting times.
+
+Usage (from backend/):
+    python benchmarks/bench_counselor_slots.py --counselors 300 --appointments 40000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--counselors', type=int, default=300)
+parser.add_argument('--appointments', type=int, default=40_000)
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, upgrade_database, Appointment, Counselor, User, WEEKDAYS
+
+SEMESTER_START = datetime(2025, 1, 6)
+SEMESTER_DAYS = 119
+LANGUAGES = ['English', 'Hindi', 'Urdu', 'Kashmiri', 'Dogri']
+SPECIALIZATIONS = ['Anxiety Disorders', 'Trauma Counseling', 'Student Counseling', 'Crisis Intervention']
+
+
+def seed(rng):
+    owner = User(email='bench@mitra.ac.in', password_hash='x', name='Bench')
+    db.session.add(owner)
+    db.session.flush()
+    counselors = []
+    for i in range(args.counselors):
+        days = rng.sample(WEEKDAYS[:6], rng.randint(3, 5))
+        counselors.append(Counselor(
+            user_id=owner.id,
+            name=f'Counselor {i}',
+            specialization=rng.choice(SPECIALIZATIONS),
+            languages=rng.sample(LANGUAGES, 2),
+            availability=[f'{day.title()} {rng.randint(8, 11)}:00-{rng.randint(14, 18)}:00' for day in days],
+            rating=round(rng.uniform(3.5, 5.0), 1)
+        ))
+    db.session.add_all(counselors)
+    db.session.commit()
+
+    rows = [{
+        'id': str(uuid.uuid4()),
+        'student_id': owner.id,
+        'counselor_id': rng.choice(counselors).id,
+        'scheduled_datetime': SEMESTER_START + timedelta(days=rng.randrange(SEMESTER_DAYS), hours=rng.randint(8, 17)),
+        'duration': 60,
+        'status': 'scheduled'
+    } for _ in range(args.appointments)]
+    db.session.execute(db.insert(Appointment), rows)
+    db.session.commit()
+    return owner.id, counselors
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def main():
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+        begin = time.perf_counter()
+        student_id, counselors = seed(rng)
+        print(f'Seeded {args.counselors} counselors and {args.appointments} appointments '
+              f'in {time.perf_counter() - begin:.1f}s ({db_path})')
+
+        week_end = SEMESTER_START + timedelta(days=7)
+        semester_end = SEMESTER_START + timedelta(days=SEMESTER_DAYS)
+        searches = [
+            ('week, 100 counselors', f'from={SEMESTER_START.isoformat()}&to={week_end.isoformat()}&limit=100'),
+            ('week, Urdu trauma', f'from={SEMESTER_START.isoformat()}&to={week_end.isoformat()}'
+                                  f'&language=Urdu&specialization=Trauma&limit=100'),
+            ('semester, 20 counselors', f'from={SEMESTER_START.isoformat()}&to={semester_end.isoformat()}&limit=20'),
+        ]
+        print(f"\n{'query':<28} {'ms':>8} {'counselors':>11} {'slots':>8}")
+        for label, params in searches:
+            elapsed, response = best_of(lambda: client.get(f'/api/counselors/slots?{params}'), args.repeat)
+            slots = sum(len(c['slots']) for c in response.json)
+            print(f'{label:<28} {elapsed * 1000:>8.1f} {len(response.json):>11} {slots:>8}')
+
+        counselor = counselors[0]
+        slots = client.get(f'/api/counselors/slots?from={SEMESTER_START.isoformat()}&to={semester_end.isoformat()}'
+                           f'&counselor_id={counselor.id}').json[0]['slots']
+        booking = {'student_id': student_id, 'counselor_id': counselor.id}
+        begin = time.perf_counter()
+        statuses = [client.post('/api/appointments/book', json=dict(booking, scheduled_datetime=slot)).status_code
+                    for slot in slots[:50]]
+        booked = time.perf_counter() - begin
+        begin = time.perf_counter()
+        conflicts = [client.post('/api/appointments/book', json=dict(booking, scheduled_datetime=slot)).status_code
+                     for slot in slots[:50]]
+        rejected = time.perf_counter() - begin
+        print(f'\nbook free slot: {booked / max(1, len(statuses)) * 1000:.2f} ms avg, statuses {sorted(set(statuses))}')
+        print(f'book conflict:  {rejected / max(1, len(conflicts)) * 1000:.2f} ms avg, statuses {sorted(set(conflicts))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Measure crisis alert delivery latency to many idle SSE subscribers.
+
+Opens --subscribers streams on /api/admin/crisis-alerts/stream, sends
+--alerts crisis messages through /api/chat/send, and reports how long
+each alert took from the start of the chat request until every
+subscriber had received it. For comparison it also times the /admin
+reload that dashboards used to poll.
+
+Usage (from backend/):
+    python benchmarks/bench_crisis_alerts.py --subscribers 200 --alerts 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--subscribers', type=int, default=200)
+parser.add_argument('--alerts', type=int, default=50)
+parser.add_argument('--interval', type=float, default=0.05, help='seconds between alerts')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db')}"
+os.environ.setdefault('MITRA_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, upgrade_database, crisis_alerts
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+    user_id = client.post('/api/auth/register', json={
+        'email': 'alerts@mitra.ac.in', 'password': 'password123', 'name': 'Alerts'
+    }).json['user_id']
+
+    received = {}
+    lock = threading.Lock()
+    ready = threading.Barrier(args.subscribers + 1)
+
+    def subscriber():
+        response = app.test_client().get('/api/admin/crisis-alerts/stream', buffered=False)
+        chunks = iter(response.response)
+        next(chunks)  # retry directive
+        ready.wait()
+        count = 0
+        while count < args.alerts:
+            chunk = next(chunks)
+            if chunk.startswith(b'id: '):
+                now = time.perf_counter()
+                with lock:
+                    received.setdefault(count, []).append(now)
+                count += 1
+        response.close()
+
+    threads = [threading.Thread(target=subscriber, daemon=True) for _ in range(args.subscribers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    print(f'{crisis_alerts.subscribers} subscribers connected')
+
+    sent = []
+    for i in range(args.alerts):
+        sent.append(time.perf_counter())
+        client.post('/api/chat/send', json={'user_id': user_id, 'message': f'I want to die {i}'})
+        time.sleep(args.interval)
+    for thread in threads:
+        thread.join(timeout=30)
+
+    first = sorted((min(received[i]) - sent[i]) * 1000 for i in received)
+    last = sorted((max(received[i]) - sent[i]) * 1000 for i in received)
+    deliveries = sum(len(times) for times in received.values())
+    print(f'deliveries: {deliveries}/{args.alerts * args.subscribers}')
+    print(f'first subscriber: p50 {percentile(first, 0.5):.1f} ms, p99 {percentile(first, 0.99):.1f} ms')
+    print(f'all subscribers:  p50 {percentile(last, 0.5):.1f} ms, p99 {percentile(last, 0.99):.1f} ms')
+
+    begin = time.perf_counter()
+    for _ in range(10):
+        client.get('/admin')
+    print(f'/admin reload (polling): {(time.perf_counter() - begin) / 10 * 1000:.1f} ms per request')
+
+
+if __name__ == '__main__':
+    main()
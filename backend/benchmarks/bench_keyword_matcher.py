@@ -0,0 +1,98 @@
+"""Benchmark the compiled KeywordMatcher against the per-keyword substring loop.
+
+Usage (from backend/):
+    python benchmarks/bench_keyword_matcher.py --terms 5000 --message-chars 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher
+
+CATEGORIES = ['crisis', 'anxiety', 'depression', 'stress', 'positive', 'negative']
+
+
+def naive_categorize(lexicons, message):
+    # The loop MentalHealthChatBot used before the matcher: one scan per keyword
+    message_lower = message.lower()
+    return {
+        category: [keyword for keyword in keywords if keyword in message_lower]
+        for category, keywords in lexicons.items()
+    }
+
+
+def random_word(rng, min_len=3, max_len=12):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+
+
+def build_lexicons(rng, terms):
+    lexicons = {category: [] for category in CATEGORIES}
+    seen = set()
+    while len(seen) < terms:
+        words = [random_word(rng) for _ in range(rng.randint(1, 3))]
+        keyword = ' '.join(words)
+        if keyword in seen:
+            continue
+        seen.add(keyword)
+        lexicons[rng.choice(CATEGORIES)].append(keyword)
+    return lexicons
+
+
+def build_message(rng, lexicons, chars, hit_rate):
+    keywords = [kw for keywords in lexicons.values() for kw in keywords]
+    parts = []
+    size = 0
+    while size < chars:
+        word = rng.choice(keywords) if rng.random() < hit_rate else random_word(rng)
+        parts.append(word)
+        size += len(word) + 1
+    return ' '.join(parts)
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--terms', type=int, nargs='+', default=[50, 500, 2000, 5000])
+    parser.add_argument('--message-chars', type=int, nargs='+', default=[200, 5000, 20000])
+    parser.add_argument('--hit-rate', type=float, default=0.02)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'terms':>6} {'chars':>7} {'loop ms':>10} {'matcher ms':>11} {'speedup':>8}")
+    for terms in args.terms:
+        lexicons = build_lexicons(rng, terms)
+        compile_start = time.perf_counter()
+        matcher = KeywordMatcher(lexicons)
+        compile_ms = (time.perf_counter() - compile_start) * 1000
+        for chars in args.message_chars:
+            message = build_message(rng, lexicons, chars, args.hit_rate)
+
+            expected = naive_categorize(lexicons, message)
+            actual = matcher.categorize(message)
+            if expected != actual:
+                raise SystemExit(f'Mismatch for terms={terms} chars={chars}')
+
+            loop = timeit(lambda: naive_categorize(lexicons, message), args.repeat)
+            compiled = timeit(lambda: matcher.categorize(message), args.repeat)
+            print(f'{terms:>6} {chars:>7} {loop * 1000:>10.3f} {compiled * 1000:>11.3f} '
+                  f'{loop / compiled:>7.1f}x')
+        print(f'{"":>6} compile time for {terms} terms: {compile_ms:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Login-storm benchmark: inline password hashing vs the bounded hashing pool.
+
+Registers a set of users, then fires concurrent /api/auth/login requests
+from many client threads and reports throughput, p50/p99 latency of
+successful logins and how many requests were shed with 503. Each
+configuration runs in its own process because the hasher is configured
+when the app module is imported.
+
+Usage (from backend/):
+    python benchmarks/bench_login_storm.py --clients 32 --logins 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    'inline': {'MITRA_PASSWORD_HASH_WORKERS': '0'},
+    'pool': {'MITRA_PASSWORD_HASH_WORKERS': str(os.cpu_count() or 1)}
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_storm(args):
+    sys.path.insert(0, BACKEND)
+    from app import app, upgrade_database
+
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+    users = 20
+    for i in range(users):
+        client.post('/api/auth/register', json={'email': f'storm{i}@mitra.ac.in', 'password': 'password123', 'name': f'S{i}'})
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = iter(range(args.logins))
+
+    def login_loop():
+        local = app.test_client()
+        while True:
+            with lock:
+                i = next(remaining, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            response = local.post('/api/auth/login', json={'email': f'storm{i % users}@mitra.ac.in', 'password': 'password123'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    print(json.dumps({
+        'logins_per_second': statuses.get(200, 0) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'statuses': statuses
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--method', default='pbkdf2:sha256:100000')
+    parser.add_argument('--max-pending', type=int, default=16)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_storm(args)
+        return
+
+    print(f"{'config':<8} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9}  statuses")
+    for name in args.configs:
+        db_dir = tempfile.mkdtemp(prefix='mitra-bench-')
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}",
+                   MITRA_PASSWORD_HASH_METHOD=args.method,
+                   MITRA_PASSWORD_HASH_MAX_PENDING=str(args.max_pending), **CONFIGS[name])
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', '--clients', str(args.clients), '--logins', str(args.logins)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:<8} {result['logins_per_second']:>9.1f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}  "
+              f"{result['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measure what JSON serialization costs each large-response route.
+
+For every route it fetches the response once, then times encoding that
+document with the stdlib encoder and with orjson (when installed), and
+times the whole request under each encoder. The share column is the
+encoder's part of the request time. The response cache is disabled so
+every request rebuilds its payload.
+
+Usage (from backend/):
+    python benchmarks/generate_data.py --database /tmp/mitra-synthetic.db
+    python benchmarks/bench_serialization.py --database /tmp/mitra-synthetic.db
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--database', required=True, help='SQLite file made by generate_data.py')
+parser.add_argument('--repeat', type=int, default=20)
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.database)}'
+os.environ['MITRA_RESPONSE_CACHE_TTL'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, orjson, ChatMessage
+
+ENCODERS = ['stdlib', 'orjson'] if orjson else ['stdlib']
+
+
+def routes():
+    with app.app_context():
+        session_id = db.session.execute(
+            db.select(ChatMessage.session_id).group_by(ChatMessage.session_id)
+            .order_by(db.func.count().desc()).limit(1)
+        ).scalar()
+    return {
+        'admin': '/admin',
+        'admin_users_500': '/api/admin/users?limit=500',
+        'counselors': '/api/counselors',
+        'resources': '/api/resources?language=en',
+        'chat_history_500': f'/api/chat/sessions/{session_id}/messages?limit=500',
+        'admin_analytics': '/api/admin/analytics'
+    }
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(args.repeat):
+        begin = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    client = app.test_client()
+    header = f"{'route':<18} {'bytes':>9}"
+    for encoder in ENCODERS:
+        header += f" {encoder + ' enc ms':>14} {'request ms':>11} {'share':>6}"
+    print(header)
+
+    for name, path in routes().items():
+        payload = json.loads(client.get(path).get_data())
+        size = len(client.get(path).get_data())
+        line = f'{name:<18} {size:>9}'
+        for encoder in ENCODERS:
+            app.json.use_orjson = encoder == 'orjson'
+            encode = median_ms(lambda: app.json.dumps(payload))
+            request = median_ms(lambda: client.get(path).get_data())
+            line += f' {encode:>14.2f} {request:>11.2f} {encode / request:>6.0%}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Concurrent read/write load test comparing SQLite storage profiles.
+
+For each profile a fresh file database is seeded, then writer threads post
+to /api/chat/send while reader threads load /admin and
+/api/admin/analytics through the Flask test client for a fixed duration.
+Each profile runs in its own process because the profile is read when the
+app module is imported.
+
+Usage (from backend/):
+    python benchmarks/bench_sqlite_profile.py --readers 4 --writers 4 --duration 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_profile(args):
+    sys.path.insert(0, BACKEND)
+    from app import app, upgrade_database
+
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+    for i in range(200):
+        client.post('/api/auth/register', json={'email': f'load{i}@mitra.ac.in', 'password': 'x', 'name': f'Student {i}'})
+        client.post('/api/chat/send', json={'message': 'I have been feeling anxious about exams'})
+
+    stop = threading.Event()
+    results = {'reads': 0, 'writes': 0, 'errors': 0, 'write_latency': []}
+    lock = threading.Lock()
+
+    def writer():
+        local = app.test_client()
+        session_id = None
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = local.post('/api/chat/send', json={'message': 'Exams are stressing me out', 'session_id': session_id})
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    results['writes'] += 1
+                    results['write_latency'].append(elapsed)
+                    session_id = response.json['session_id']
+                else:
+                    results['errors'] += 1
+
+    def reader():
+        local = app.test_client()
+        paths = ['/admin', '/api/admin/analytics']
+        i = 0
+        while not stop.is_set():
+            response = local.get(paths[i % len(paths)])
+            i += 1
+            with lock:
+                if response.status_code == 200:
+                    results['reads'] += 1
+                else:
+                    results['errors'] += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latency = sorted(results.pop('write_latency')) or [0.0]
+    results['write_p50_ms'] = latency[len(latency) // 2] * 1000
+    results['write_p99_ms'] = latency[min(len(latency) - 1, int(len(latency) * 0.99))] * 1000
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=['default', 'tuned'])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_profile(args)
+        return
+
+    print(f"{'profile':<10} {'reads/s':>9} {'writes/s':>9} {'write p50 ms':>13} {'write p99 ms':>13} {'errors':>7}")
+    for profile in args.profiles:
+        db_dir = tempfile.mkdtemp(prefix='mitra-bench-')
+        env = dict(os.environ, MITRA_SQLITE_PROFILE=profile,
+                   DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', '--readers', str(args.readers),
+             '--writers', str(args.writers), '--duration', str(args.duration)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:<10} {result['reads'] / args.duration:>9.1f} {result['writes'] / args.duration:>9.1f} "
+              f"{result['write_p50_ms']:>13.2f} {result['write_p99_ms']:>13.2f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
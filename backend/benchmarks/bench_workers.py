@@ -0,0 +1,132 @@
+"""Scaling benchmark for gunicorn worker processes sharing one SQLite file.
+
+Runs the app under gunicorn with 1, 2, 4 and 8 workers, once with
+independent workers (per-process cache, writers only coordinated by
+SQLite's busy timeout) and once with MITRA_MULTIPROCESS=1 (lock file for
+writers, shared response cache). Concurrent clients send a mix of cached
+reads (/api/resources, /api/counselors, /api/admin/analytics) and chat
+messages; each run reports throughput, latency and failed requests.
+
+Usage (from backend/):
+    pip install gunicorn
+    python benchmarks/bench_workers.py --database /tmp/mitra-synthetic.db --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGES = ["I have been feeling anxious about my exams", "I can't sleep before tests",
+            "I feel so lonely in the hostel", "I am stressed about placements"]
+READS = ['/api/resources?language=en', '/api/resources?language=hi', '/api/counselors', '/api/admin/analytics']
+MODES = {'independent': '0', 'multiprocess': '1'}
+
+
+def copy_database(source, target):
+    # The backup API includes pages still in the source's -wal file; copying the file alone does not
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+    return target
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def request(port, method, path, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'
+                 f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run_load(port, args):
+    rng = random.Random(args.seed)
+    plan = []
+    for _ in range(args.requests):
+        if rng.random() < args.write_fraction:
+            plan.append(('POST', '/api/chat/send', ('{"message": "%s"}' % rng.choice(MESSAGES)).encode()))
+        else:
+            plan.append(('GET', rng.choice(READS), b''))
+    pending = iter(plan)
+    latencies, failures = [], 0
+
+    async def client():
+        nonlocal failures
+        for method, path, body in pending:
+            begin = time.perf_counter()
+            try:
+                status = await request(port, method, path, body)
+            except OSError:
+                status = 599
+            latencies.append((time.perf_counter() - begin) * 1000)
+            failures += status >= 500
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - begin
+    return len(plan) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help='SQLite file made by generate_data.py (copied per run)')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--write-fraction', type=float, default=0.3)
+    parser.add_argument('--analytics-ttl', type=float, default=5, help='MITRA_ANALYTICS_CACHE_TTL for both modes')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f'{os.cpu_count()} CPUs')
+    print(f"{'mode':<13} {'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for mode in args.modes:
+        for workers in args.workers:
+            scratch = tempfile.mkdtemp(prefix='mitra-bench-')
+            database = copy_database(args.database, os.path.join(scratch, 'bench.db'))
+            port = free_port()
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', MITRA_MULTIPROCESS=MODES[mode],
+                       MITRA_ANALYTICS_CACHE_TTL=str(args.analytics_ttl))
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'gthread', '--threads', str(args.threads),
+                 '--backlog', '2048', '-b', f'127.0.0.1:{port}', 'app:app'],
+                cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                for _ in range(300):
+                    try:
+                        asyncio.run(request(port, 'GET', '/api/health'))
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                throughput, p50, p99, failures = asyncio.run(run_load(port, args))
+                print(f'{mode:<13} {workers:>7} {throughput:>8.1f} {p50:>8.1f} {p99:>8.1f} {failures:>7}')
+            finally:
+                server.terminate()
+                server.wait()
+                shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
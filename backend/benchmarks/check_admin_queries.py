@@ -0,0 +1,71 @@
+"""Check that GET /admin issues the same number of SQL statements at any data size.
+
+Seeds an in-memory database at two sizes, counts the statements the
+endpoint executes through SQLAlchemy engine events, and exits non-zero if
+the count grows with the data.
+
+Usage (from backend/):
+    python benchmarks/check_admin_queries.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app import app, db, upgrade_database, User, ChatSession, ChatMessage, ScreeningResponse
+
+
+def seed(count):
+    now = datetime.utcnow()
+    for i in range(count):
+        user = User(email=f'load{count}-{i}@mitra.ac.in', password_hash='x', name=f'Student {i}')
+        db.session.add(user)
+        db.session.flush()
+
+        session = ChatSession(user_id=user.id, started_at=now - timedelta(minutes=i), crisis_detected=True)
+        db.session.add(session)
+        db.session.flush()
+
+        db.session.add(ChatMessage(session_id=session.id, sender_type='ai', message='Please reach out',
+                                   crisis_keywords=['hopeless'], crisis_flag=True))
+        db.session.add(ScreeningResponse(user_id=user.id, screening_type='phq9', responses='{}',
+                                         total_score=12, risk_level='moderate'))
+    db.session.commit()
+
+
+def count_statements(client):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/admin')
+        assert response.status_code == 200, response.status_code
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def main():
+    client = app.test_client()
+    counts = {}
+    with app.app_context():
+        upgrade_database()
+        for size in (5, 100):
+            seed(size)
+            counts[size] = count_statements(client)
+            print(f'{User.query.count():>5} users -> {counts[size]} statements')
+
+    if len(set(counts.values())) != 1:
+        raise SystemExit('FAIL: /admin statement count grows with the number of rows')
+    print('OK: /admin statement count is constant')
+
+
+if __name__ == '__main__':
+    main()
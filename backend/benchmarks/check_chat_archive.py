@@ -0,0 +1,124 @@
+"""Check that archiving old chat sessions does not change what the API returns.
+
+Copies the database, fetches the message history (both orders, paged by
+cursor) and session lists of a sample of sessions that will be archived
+plus some that will not, runs the archive job in two interrupted passes,
+and fetches everything again. Exits non-zero if any response differs.
+Also reports the hot table row count and file sizes before and after.
+
+Usage (from backend/):
+    python benchmarks/generate_data.py --database /tmp/mitra-archive.db --scale 0.02 --days 365
+    python benchmarks/check_chat_archive.py --database /tmp/mitra-archive.db --older-than-days 180
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--database', required=True, help='SQLite file made by generate_data.py (copied first)')
+parser.add_argument('--older-than-days', type=int, default=180)
+parser.add_argument('--sample', type=int, default=200, help='sessions checked on each side of the cutoff')
+parser.add_argument('--page-size', type=int, default=7)
+args = parser.parse_args()
+
+scratch = tempfile.mkdtemp(prefix='mitra-archive-')
+database = os.path.join(scratch, 'check.db')
+# The backup API includes pages still in the source's -wal file; copying the file alone does not
+with closing(sqlite3.connect(args.database)) as source, closing(sqlite3.connect(database)) as target:
+    source.backup(target)
+os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+os.environ['MITRA_CHAT_ARCHIVE_DIR'] = os.path.join(scratch, 'chat-archive')
+os.environ['MITRA_RESPONSE_CACHE_TTL'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, upgrade_database, archive_chat_sessions, chat_archive, ChatMessage, ChatSession
+
+
+def sample_sessions():
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    old = db.session.query(ChatSession.id, ChatSession.user_id).filter(ChatSession.started_at < cutoff)
+    new = db.session.query(ChatSession.id, ChatSession.user_id).filter(ChatSession.started_at >= cutoff)
+    return (old.order_by(db.func.random()).limit(args.sample).all()
+            + new.order_by(db.func.random()).limit(args.sample).all())
+
+
+def fetch_all(client, path):
+    """Every page of a cursor-paginated endpoint, as a list of (body, next cursor)."""
+    pages = []
+    cursor = None
+    while True:
+        separator = '&' if '?' in path else '?'
+        response = client.get(path + (f'{separator}cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200, (path, response.status_code)
+        body = response.get_json()
+        cursor = body['next_cursor']
+        pages.append((body, cursor))
+        if not cursor:
+            return pages
+
+
+def snapshot(client, sessions):
+    responses = {}
+    for session_id, user_id in sessions:
+        for order in ('asc', 'desc'):
+            path = f'/api/chat/sessions/{session_id}/messages?order={order}&limit={args.page_size}'
+            responses[path] = fetch_all(client, path)
+        if user_id:
+            path = f'/api/chat/users/{user_id}/sessions?limit={args.page_size}'
+            responses[path] = fetch_all(client, path)
+    return responses
+
+
+def sizes():
+    archive = chat_archive().directory
+    archive_bytes = sum(os.path.getsize(os.path.join(archive, name)) for name in os.listdir(archive)) \
+        if os.path.isdir(archive) else 0
+    return db.session.query(ChatMessage).count(), os.path.getsize(database), archive_bytes
+
+
+def main():
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+        sessions = sample_sessions()
+        before = snapshot(client, sessions)
+        hot_before, db_before, _ = sizes()
+
+        # Stop half way through so the second pass has to resume from the checkpoint
+        total = db.session.query(ChatSession).count()
+        first = archive_chat_sessions(args.older_than_days, max_sessions=total // 2)
+        second = archive_chat_sessions(args.older_than_days)
+        third = archive_chat_sessions(args.older_than_days)
+        db.session.execute(db.text('VACUUM'))
+        hot_after, db_after, archive_bytes = sizes()
+
+        begin = time.perf_counter()
+        after = snapshot(client, sessions)
+        read_seconds = time.perf_counter() - begin
+
+    print(f"archived {first['sessions'] + second['sessions']} sessions, "
+          f"{first['messages'] + second['messages']} messages "
+          f"in {first['seconds'] + second['seconds']:.1f}s (rerun archived {third['messages']})")
+    print(f'chat_message rows: {hot_before} -> {hot_after}')
+    print(f'database file:     {db_before / 2**20:.1f} MB -> {db_after / 2**20:.1f} MB')
+    print(f'archive files:     {archive_bytes / 2**20:.1f} MB')
+    print(f'{len(after)} paginated responses re-read in {read_seconds:.1f}s')
+
+    mismatches = [path for path in before if before[path] != after[path]]
+    for path in mismatches[:10]:
+        print(f'MISMATCH {path}')
+    shutil.rmtree(scratch, ignore_errors=True)
+    if mismatches or third['messages']:
+        print(f'FAIL: {len(mismatches)} responses changed')
+        sys.exit(1)
+    print('OK: responses identical after archiving')
+
+
+if __name__ == '__main__':
+    main()
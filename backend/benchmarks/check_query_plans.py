@@ -0,0 +1,130 @@
+"""Check that the SELECTs issued by the API routes are served by indexes.
+
+Calls each route through the Flask test client against a seeded in-memory
+database, captures every SELECT it executes, and runs EXPLAIN QUERY PLAN
+on it. A full table scan or a temporary B-tree for ORDER BY on a table
+outside SMALL_TABLES fails the check; scanning or sorting the LIMITed page
+a co-routine (subquery) produces is allowed.
+
+Usage (from backend/):
+    python benchmarks/check_query_plans.py
+"""
+import os
+import sys
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app import app, db, upgrade_database, Counselor
+
+# Bounded, admin-curated tables that routes list in full
+SMALL_TABLES = {'counselor', 'resource', 'analytics', 'schema_migration'}
+
+
+def seed(client):
+    user_id = client.post('/api/auth/register', json={
+        'email': 'plan@mitra.ac.in', 'password': 'password123', 'name': 'Plan Check'
+    }).json['user_id']
+    session_id = client.post('/api/chat/send', json={
+        'user_id': user_id, 'message': 'I feel anxious about exams'
+    }).json['session_id']
+    client.post('/api/chat/send', json={'session_id': session_id, 'message': 'I feel hopeless'})
+    client.post('/api/forum/posts', json={
+        'author_id': user_id, 'title': 'Exams', 'content': 'Any tips?', 'category': 'academic_stress',
+        'tags': ['exams', 'anxiety']
+    })
+    client.post('/api/screening/phq9', json={'user_id': user_id, 'responses': {'q1': 2, 'q2': 3}})
+    db.session.add(Counselor(user_id=user_id, name='Dr Plan', languages=['Urdu'],
+                             availability=['Monday 9:00-17:00']))
+    db.session.commit()
+    return user_id, session_id
+
+
+def route_calls(user_id, session_id):
+    return [
+        ('GET', '/admin', None),
+        ('GET', '/api/admin/analytics', None),
+        ('GET', '/api/admin/users?limit=1', None),
+        ('GET', '/api/admin/chat/search?q=anxious', None),
+        ('GET', '/api/forum/posts', None),
+        ('GET', '/api/forum/posts?category=academic_stress', None),
+        ('GET', '/api/forum/posts?tag=exams', None),
+        ('GET', '/api/resources', None),
+        ('GET', '/api/resources?category=stress&language=en', None),
+        ('GET', '/api/resources?tag=anxiety', None),
+        ('GET', '/api/counselors', None),
+        ('GET', '/api/counselors?language=urdu', None),
+        ('GET', '/api/counselors/slots?from=2025-01-06&to=2025-03-01&language=Urdu', None),
+        ('GET', f'/api/appointments/{user_id}', None),
+        ('GET', f'/api/chat/sessions/{session_id}/messages?limit=1', None),
+        ('GET', f'/api/chat/sessions/{session_id}/messages?order=desc', None),
+        ('GET', f'/api/chat/users/{user_id}/sessions', None),
+        ('GET', f'/api/chat/users/{user_id}/sessions?topic=anxiety', None),
+        ('POST', '/api/auth/login', {'email': 'plan@mitra.ac.in', 'password': 'password123'}),
+        ('POST', '/api/chat/send', {'session_id': session_id, 'message': 'I want to die'}),
+        ('POST', '/api/screening/gad7', {'user_id': user_id, 'responses': {'q1': 1}}),
+    ]
+
+
+def capture_selects(client, method, url, body):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.open(url, method=method, json=body)
+        assert response.status_code < 400, (url, response.status_code)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def plan_problems(statement, parameters):
+    raw = db.engine.raw_connection()
+    try:
+        rows = raw.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    finally:
+        raw.close()
+    details = [row[-1] for row in rows]
+
+    coroutines = {d.split()[1] for d in details if d.startswith('CO-ROUTINE ')}
+    problems = []
+    for detail in details:
+        words = detail.split()
+        if detail.startswith('SCAN ') and 'USING' not in words and 'VIRTUAL' not in words:
+            table = words[1]
+            if table not in SMALL_TABLES | coroutines and not table.startswith('chat_message_fts'):
+                problems.append(detail)
+        # Sorting a small table, or a LIMITed page produced by a co-routine, is cheap
+        if 'TEMP B-TREE' in detail and 'ORDER BY' in detail and not any(
+                d.startswith((f'SCAN {table}', f'SEARCH {table} '))
+                for d in details for table in SMALL_TABLES | coroutines):
+            problems.append(detail)
+    return details, problems
+
+
+def main():
+    client = app.test_client()
+    failures = 0
+    with app.app_context():
+        upgrade_database()
+        user_id, session_id = seed(client)
+        for method, url, body in route_calls(user_id, session_id):
+            for statement, parameters in capture_selects(client, method, url, body):
+                details, problems = plan_problems(statement, parameters)
+                status = 'FAIL' if problems else 'ok'
+                failures += bool(problems)
+                print(f'[{status}] {method} {url}: ' + ' | '.join(details))
+
+    if failures:
+        raise SystemExit(f'FAIL: {failures} route queries are not served by an index')
+    print('OK: every route query uses an index')
+
+
+if __name__ == '__main__':
+    main()
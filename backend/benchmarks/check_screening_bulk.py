@@ -0,0 +1,104 @@
+"""Check that bulk screening submission matches the single-submission path.
+
+Registers two identical cohorts of students, submits the same random
+PHQ-9/GAD-7/GHQ forms for the first cohort one request at a time and for
+the second through /api/screening/bulk, then compares the per-form
+results, the users' stored scores and the analytics rollup deltas, and
+reports the time each path took.
+
+Usage (from backend/):
+    python benchmarks/check_screening_bulk.py --students 500 --forms 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--students', type=int, default=500)
+parser.add_argument('--forms', type=int, default=5000)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
+
+db_path = os.path.join(tempfile.mkdtemp(prefix='mitra-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+os.environ.setdefault('MITRA_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, upgrade_database, Analytics, User, SCREENING_BULK_MAX
+
+QUESTIONS = {'phq9': 9, 'gad7': 7, 'ghq': 12}
+
+
+def register(client, prefix):
+    return [client.post('/api/auth/register', json={
+        'email': f'{prefix}{i}@mitra.ac.in', 'password': 'password123', 'name': f'{prefix} {i}'
+    }).json['user_id'] for i in range(args.students)]
+
+
+def user_state(user_ids):
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))}
+    return [(users[i].phq9_score, users[i].gad7_score, users[i].ghq_score, users[i].risk_level) for i in user_ids]
+
+
+def rollups():
+    rows = db.session.query(Analytics.metric_type, Analytics.metric_name, db.func.sum(Analytics.value)).filter(
+        Analytics.metric_type.in_(['risk_level', 'screening'])
+    ).group_by(Analytics.metric_type, Analytics.metric_name)
+    return {(metric_type, metric_name): value for metric_type, metric_name, value in rows}
+
+
+def main():
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+        single_users = register(client, 'single')
+        bulk_users = register(client, 'bulk')
+
+        forms = []
+        for _ in range(args.forms):
+            screening_type = rng.choice(list(QUESTIONS))
+            responses = {f'q{q + 1}': rng.randint(0, 3) for q in range(QUESTIONS[screening_type])}
+            forms.append((rng.randrange(args.students), screening_type, responses))
+
+        before = rollups()
+        begin = time.perf_counter()
+        single_results = [client.post(f'/api/screening/{screening_type}', json={
+            'user_id': single_users[student], 'responses': responses
+        }).json for student, screening_type, responses in forms]
+        single_time = time.perf_counter() - begin
+        after_single = rollups()
+
+        begin = time.perf_counter()
+        bulk_results = []
+        for offset in range(0, len(forms), SCREENING_BULK_MAX):
+            response = client.post('/api/screening/bulk', json={'submissions': [{
+                'user_id': bulk_users[student], 'screening_type': screening_type, 'responses': responses
+            } for student, screening_type, responses in forms[offset:offset + SCREENING_BULK_MAX]]})
+            bulk_results.extend(response.json['results'])
+        bulk_time = time.perf_counter() - begin
+        after_bulk = rollups()
+
+        keys = set(before) | set(after_single) | set(after_bulk)
+        single_delta = {k: after_single.get(k, 0) - before.get(k, 0) for k in keys}
+        bulk_delta = {k: after_bulk.get(k, 0) - after_single.get(k, 0) for k in keys}
+        failures = []
+        if single_results != bulk_results:
+            failures.append('per-form results differ')
+        if user_state(single_users) != user_state(bulk_users):
+            failures.append('stored user scores differ')
+        if single_delta != bulk_delta:
+            failures.append('analytics rollup deltas differ')
+
+    print(f'single: {single_time:.2f}s ({len(forms) / single_time:.0f} forms/s)')
+    print(f'bulk:   {bulk_time:.2f}s ({len(forms) / bulk_time:.0f} forms/s)')
+    if failures:
+        raise SystemExit('FAIL: ' + ', '.join(failures))
+    print(f'OK: {len(forms)} forms scored identically by both paths')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Check that the per-session aggregates kept on every chat exchange match a full rebuild.
+
+Sends chat messages through the API, half with synchronous commits and
+half through the write-behind queue, snapshots each session's
+message_count, topic_counts, topics and sentiment_score, then recomputes
+them with rebuild_session_aggregates() (once more after archiving some of
+the sessions) and exits non-zero if any session differs.
+
+Usage (from backend/):
+    python benchmarks/check_session_aggregates.py --messages 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--messages', type=int, default=2000)
+parser.add_argument('--users', type=int, default=50)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
+
+scratch = tempfile.mkdtemp(prefix='mitra-aggregates-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'check.db')}"
+os.environ['MITRA_CHAT_ARCHIVE_DIR'] = os.path.join(scratch, 'chat-archive')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (app, db, upgrade_database, archive_chat_sessions, chat_writer, rebuild_session_aggregates,
+                 ChatMessage, ChatSession, User)
+
+MESSAGES = ["I have been feeling anxious about my exams", "I feel sad and lonely in the hostel",
+            "Exam pressure and deadlines are too much", "Today was a good day, I feel better",
+            "I am stressed and overwhelmed and can't sleep", "Things are okay I guess",
+            "I feel hopeless about everything", "My workload is terrible and I feel awful"]
+
+
+def snapshot():
+    return {row.id: (row.message_count, row.topic_counts, row.topics, row.sentiment_score)
+            for row in db.session.query(ChatSession.id, ChatSession.message_count, ChatSession.topic_counts,
+                                        ChatSession.topics, ChatSession.sentiment_score)}
+
+
+def differences(expected, actual):
+    changed = []
+    for session_id, (count, topic_counts, topics, score) in expected.items():
+        other = actual[session_id]
+        if (count, topic_counts, topics) != other[:3] or abs(score - other[3]) > 1e-9:
+            changed.append((session_id, expected[session_id], other))
+    return changed
+
+
+def main():
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    with app.app_context():
+        upgrade_database()
+        users = [User(email=f'aggregate{i}@mitra.ac.in', password_hash='x', name=f'Student {i}')
+                 for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        sessions = {user.id: None for user in users}
+
+        for i in range(args.messages):
+            chat_writer.enabled = i >= args.messages // 2
+            user_id = rng.choice(list(sessions))
+            if rng.random() < 0.1:
+                sessions[user_id] = None  # start a new session
+            response = client.post('/api/chat/send', json={
+                'user_id': user_id, 'session_id': sessions[user_id], 'message': rng.choice(MESSAGES)
+            })
+            assert response.status_code == 200, response.status_code
+            sessions[user_id] = response.json['session_id']
+        chat_writer.flush()
+        chat_writer.enabled = False
+
+        live = snapshot()
+        begin = time.perf_counter()
+        rebuild_session_aggregates(batch_size=50)
+        rebuild_seconds = time.perf_counter() - begin
+        rebuilt = snapshot()
+
+        # Age everything by 400 days so the archive job picks sessions up; archived
+        # sessions are then rebuilt from the archive files
+        for model, column in ((ChatMessage, 'timestamp'), (ChatSession, 'started_at')):
+            db.session.execute(db.update(model), [
+                {'id': row_id, column: moment - timedelta(days=400)}
+                for row_id, moment in db.session.query(model.id, getattr(model, column))
+            ])
+        db.session.commit()
+        archived = archive_chat_sessions(365, max_sessions=len(live) // 2)['sessions']
+        rebuild_session_aggregates(batch_size=50)
+        after_archive = snapshot()
+
+    print(f'{len(live)} sessions, {args.messages} exchanges; rebuild took {rebuild_seconds:.2f}s')
+    failures = differences(live, rebuilt) + differences(live, after_archive)
+    for session_id, expected, actual in failures[:10]:
+        print(f'MISMATCH {session_id}: live={expected} rebuilt={actual}')
+    shutil.rmtree(scratch, ignore_errors=True)
+    if failures or not archived:
+        raise SystemExit(f'FAIL: {len(failures)} sessions differ ({archived} archived)')
+    print(f'OK: live aggregates match the rebuild, including {archived} archived sessions')
+
+
+if __name__ == '__main__':
+    main()
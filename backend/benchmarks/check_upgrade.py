@@ -0,0 +1,108 @@
+"""Check that db-upgrade brings an existing database to the same schema as a new one.
+
+Copies the database (the repository's instance/mitra.db by default), runs
+`flask --app app db-upgrade` on the copy and on an empty file, and
+compares the two: tables, columns, indexes (with their definitions),
+triggers and applied migrations. Also checks that no rows in the copy
+are lost and that a second upgrade applies nothing. Exits non-zero
+on any difference.
+
+Usage (from backend/):
+    python benchmarks/check_upgrade.py
+    python benchmarks/check_upgrade.py --database /tmp/mitra-synthetic.db
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from contextlib import closing
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--database', default=os.path.join(BACKEND, 'instance', 'mitra.db'),
+                    help='existing SQLite file (copied first)')
+args = parser.parse_args()
+
+
+def copy_database(source, target):
+    # The backup API includes pages still in the source's -wal file; copying the file alone does not
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+    return target
+
+
+def upgrade(path):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db-upgrade'],
+                            cwd=BACKEND, env=env, capture_output=True, text=True)
+    if result.returncode:
+        print(result.stdout + result.stderr)
+        raise SystemExit(f'FAIL: db-upgrade exited with {result.returncode} on {path}')
+    return [line for line in result.stdout.splitlines() if line.startswith('Applied migration')]
+
+
+def schema(path):
+    with sqlite3.connect(path) as connection:
+        objects = {}
+        for kind, name, table, sql in connection.execute(
+            "SELECT type, name, tbl_name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+        ):
+            if kind == 'table':
+                columns = sorted(row[1] for row in connection.execute(f'PRAGMA table_info("{name}")'))
+                objects[(kind, name)] = tuple(columns)
+            else:
+                # Auto-generated indexes have no SQL; compare the rest by definition
+                objects[(kind, name)] = (table, sql)
+        migrations = {row[0] for row in connection.execute('SELECT id FROM schema_migration')}
+    return objects, migrations
+
+
+def row_counts(path):
+    with sqlite3.connect(path) as connection:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND name NOT LIKE '%_fts%'"
+        )]
+        return {table: connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def main():
+    scratch = tempfile.mkdtemp(prefix='mitra-upgrade-')
+    existing = copy_database(args.database, os.path.join(scratch, 'existing.db'))
+    fresh = os.path.join(scratch, 'fresh.db')
+
+    before = row_counts(existing)
+    applied = upgrade(existing)
+    rerun = upgrade(existing)
+    upgrade(fresh)
+    after = row_counts(existing)
+    (upgraded_objects, upgraded_migrations), (fresh_objects, fresh_migrations) = schema(existing), schema(fresh)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    failures = []
+    for key in sorted(set(upgraded_objects) | set(fresh_objects)):
+        if upgraded_objects.get(key) != fresh_objects.get(key):
+            failures.append(f'{key[0]} {key[1]}: upgraded={upgraded_objects.get(key)} new={fresh_objects.get(key)}')
+    if upgraded_migrations != fresh_migrations:
+        failures.append(f'migrations: upgraded={sorted(upgraded_migrations)} new={sorted(fresh_migrations)}')
+    for table, count in before.items():
+        # Backfills may add rows (analytics rollups), never remove them
+        if after.get(table, 0) < count:
+            failures.append(f'table {table}: {count} rows before the upgrade, {after.get(table)} after')
+    if rerun:
+        failures.append(f'second upgrade applied {rerun}')
+
+    print(f'{len(applied)} migrations applied to {args.database}; {len(fresh_objects)} schema objects compared')
+    for failure in failures:
+        print(f'MISMATCH {failure}')
+    if failures:
+        raise SystemExit(f'FAIL: {len(failures)} differences')
+    print('OK: the upgraded database matches a new one')
+
+
+if __name__ == '__main__':
+    main()
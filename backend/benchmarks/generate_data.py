@@ -0,0 +1,320 @@
+"""Generate a synthetic MITRA database at production-like volumes.
+
+Bulk-inserts users, counselors, resources, appointments, chat sessions
+with messages, forum posts and screenings into a new SQLite file, then
+applies the schema migrations (FTS backfill, indexes, ANALYZE) and
+rebuilds the analytics rollups. Output is reproducible for a given
+--seed and --end date. Every generated user can log in with the password
+"password123".
+
+Usage (from backend/):
+    python benchmarks/generate_data.py --database /tmp/mitra-synthetic.db
+    python benchmarks/generate_data.py --database /tmp/small.db --scale 0.01
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--database', required=True, help='path of the SQLite file to create')
+parser.add_argument('--force', action='store_true', help='replace the database if it exists')
+parser.add_argument('--scale', type=float, default=1.0, help='multiplier applied to every volume below')
+parser.add_argument('--users', type=int, default=100_000)
+parser.add_argument('--messages', type=int, default=5_000_000)
+parser.add_argument('--posts', type=int, default=50_000)
+parser.add_argument('--screenings', type=int, default=500_000)
+parser.add_argument('--counselors', type=int, default=50)
+parser.add_argument('--resources', type=int, default=200)
+parser.add_argument('--appointments', type=int, default=20_000)
+parser.add_argument('--days', type=int, default=180, help='span of activity ending at --end')
+parser.add_argument('--end', type=date.fromisoformat, default=date.today())
+parser.add_argument('--batch', type=int, default=20_000)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
+
+db_path = os.path.abspath(args.database)
+if os.path.exists(db_path):
+    if not args.force:
+        raise SystemExit(f'{db_path} exists; pass --force to replace it')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+from app import (app, db, upgrade_database, rebuild_analytics, chatbot, crisis_columns, score_screenings,
+                 SCREENING_SCORE_COLUMNS, Appointment, ChatMessage, ChatSession, Counselor, ForumPost, Resource,
+                 ScreeningResponse, User)
+
+COLLEGES = ['Kashmir University', 'NIT Srinagar', 'SKIMS Medical College', 'Islamic University of Science & Technology',
+            'Government College for Women', 'Cluster University Srinagar']
+COURSES = ['B.Tech', 'MBBS', 'B.Sc', 'B.A', 'M.Sc', 'MBA', 'B.Com', 'PhD']
+LANGUAGES = ['en', 'hi', 'ur', 'ks']
+COUNSELOR_LANGUAGES = ['English', 'Hindi', 'Urdu', 'Kashmiri']
+CATEGORIES = ['anxiety', 'depression', 'stress', 'sleep', 'academic_stress', 'social_support']
+SPECIALIZATIONS = ['Clinical Psychology', 'Anxiety Disorders', 'Trauma Counseling', 'Student Counseling',
+                   'Crisis Intervention', 'Substance Use']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+SCREENING_QUESTIONS = {'phq9': 9, 'gad7': 7, 'ghq': 12}
+
+USER_MESSAGES = [
+    "I have been feeling anxious about my exams", "I can't sleep before tests", "I feel so lonely in the hostel",
+    "My parents expect too much from me", "I am stressed about placements", "Nothing seems to make me happy anymore",
+    "I had a panic attack in class today", "I feel hopeless about my future", "Thank you, that helped a lot",
+    "I am worried about my family back home", "The internet shutdown makes it hard to study", "I feel great today",
+    "I don't have anyone to talk to", "I keep failing my assignments", "I feel tired all the time",
+    "How do I manage my time better?", "I want to die", "Everything feels overwhelming", "I feel a bit better now",
+    "I am nervous about my viva", "My roommate and I keep fighting", "I feel depressed most days"
+]
+FILLER = ('today i was thinking about my classes and my friends at college and the weather in srinagar '
+          'it has been a long week with assignments lab work and family calls').split()
+POST_TITLES = ['Exam stress tips?', 'Feeling isolated', 'How do you sleep before exams?', 'Placement anxiety',
+               'Missing home', 'Study group for finals', 'Dealing with pressure from family', 'Small wins this week']
+
+
+class Generator:
+    def __init__(self, rng):
+        self.rng = rng
+        self.end = datetime.combine(args.end, datetime.min.time()) + timedelta(days=1)
+        self.start = self.end - timedelta(days=args.days)
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def moment(self, fraction=None):
+        # Evenly spread by fraction (keeps later rows later) with a little jitter
+        fraction = self.rng.random() if fraction is None else fraction
+        span = (self.end - self.start).total_seconds()
+        offset = min(span - 1, max(0, fraction * span + self.rng.uniform(-600, 600)))
+        return self.start + timedelta(seconds=offset)
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choice(FILLER) for _ in range(self.rng.randint(low, high)))
+
+
+def scaled(value):
+    return max(1, int(value * args.scale))
+
+
+def insert_batches(model, rows):
+    """Insert rows from an iterator in executemany batches; returns the row count."""
+    table = model.__table__
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= args.batch:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+
+def generate_users(gen, count):
+    password_hash = generate_password_hash('password123', app.config['PASSWORD_HASH_METHOD'])
+    user_ids = [gen.uuid() for _ in range(count)]
+    staff_ids = [gen.uuid() for _ in range(args.counselors + 1)]
+
+    def rows():
+        for i, user_id in enumerate(user_ids):
+            created = gen.moment(i / count)
+            yield {
+                'id': user_id, 'email': f'student{i}@synthetic.mitra.ac.in', 'password_hash': password_hash,
+                'name': f'Student {i}', 'age': gen.rng.randint(17, 28), 'gender': gen.rng.choice(['male', 'female']),
+                'college': gen.rng.choice(COLLEGES), 'course': gen.rng.choice(COURSES),
+                'year': str(gen.rng.randint(1, 5)), 'created_at': created, 'last_active': gen.moment(),
+                'is_counselor': False, 'is_admin': False, 'risk_level': 'low'
+            }
+        for i, user_id in enumerate(staff_ids):
+            yield {
+                'id': user_id, 'email': f'staff{i}@synthetic.mitra.ac.in', 'password_hash': password_hash,
+                'name': f'Staff {i}', 'age': None, 'gender': None, 'college': COLLEGES[0], 'course': None,
+                'year': None, 'created_at': gen.start, 'last_active': gen.start,
+                'is_counselor': i > 0, 'is_admin': i == 0, 'risk_level': 'low'
+            }
+
+    insert_batches(User, rows())
+    return user_ids, staff_ids
+
+
+def generate_counselors(gen, staff_ids):
+    counselor_ids = []
+    counselors = []
+    for i, user_id in enumerate(staff_ids[1:]):
+        days = sorted(gen.rng.sample(WEEKDAYS, gen.rng.randint(3, 5)), key=WEEKDAYS.index)
+        counselor = Counselor(
+            id=gen.uuid(), user_id=user_id, name=f'Dr. Counselor {i}',
+            specialization=', '.join(gen.rng.sample(SPECIALIZATIONS, 2)),
+            qualifications='M.Phil Clinical Psychology', experience_years=gen.rng.randint(2, 25),
+            languages=gen.rng.sample(COUNSELOR_LANGUAGES, 2),
+            availability=[f'{day} {gen.rng.randint(8, 11)}:00-{gen.rng.randint(14, 18)}:00' for day in days],
+            rating=round(gen.rng.uniform(3.8, 5.0), 1), bio='Synthetic counselor profile',
+            email=f'staff{i + 1}@synthetic.mitra.ac.in'
+        )
+        counselors.append(counselor)
+        counselor_ids.append(counselor.id)
+    # ORM inserts so the counselor slot table is filled by its mapper events
+    db.session.add_all(counselors)
+    db.session.commit()
+    return counselor_ids
+
+
+def generate_resources(gen, count, admin_id):
+    return insert_batches(Resource, ({
+        'id': gen.uuid(), 'title': f'Resource {i}: {gen.rng.choice(CATEGORIES).replace("_", " ").title()}',
+        'description': gen.text(10, 30), 'content_type': gen.rng.choice(['video', 'audio', 'article', 'guide']),
+        'category': gen.rng.choice(CATEGORIES), 'language': gen.rng.choice(LANGUAGES),
+        'url': f'https://example.org/resources/{i}', 'duration': gen.rng.randint(120, 1800),
+        'tags': gen.rng.sample(CATEGORIES, 2), 'view_count': gen.rng.randint(0, 5000),
+        'rating': round(gen.rng.uniform(3, 5), 1), 'created_by': admin_id, 'created_at': gen.moment(),
+        'is_featured': gen.rng.random() < 0.05
+    } for i in range(count)))
+
+
+def generate_appointments(gen, count, user_ids, counselor_ids):
+    def rows():
+        for _ in range(count):
+            created = gen.moment()
+            scheduled = (created + timedelta(days=gen.rng.randint(1, 21))).replace(
+                hour=gen.rng.randint(9, 16), minute=0, second=0, microsecond=0)
+            yield {
+                'id': gen.uuid(), 'student_id': gen.rng.choice(user_ids), 'counselor_id': gen.rng.choice(counselor_ids),
+                'scheduled_datetime': scheduled, 'duration': 60, 'type': 'individual',
+                'mode': gen.rng.choice(['video', 'phone', 'in-person']),
+                'status': gen.rng.choice(['scheduled', 'completed', 'completed', 'cancelled']),
+                'notes': '', 'created_at': created, 'updated_at': created
+            }
+    return insert_batches(Appointment, rows())
+
+
+def chat_replies():
+    """Run the real chatbot once per message template and reuse the replies."""
+    return {message: chatbot.get_response(message) for message in USER_MESSAGES}
+
+
+def generate_chat(gen, count, user_ids):
+    replies = chat_replies()
+    sessions = []
+    state = {'messages': 0}
+
+    def message_rows():
+        index = 0
+        while state['messages'] < count:
+            session_id = gen.uuid()
+            user_id = gen.rng.choice(user_ids)
+            moment = started = gen.moment(index / max(1, count // 10))
+            index += 1
+            crisis = False
+            for _ in range(min(gen.rng.randint(1, 9), (count - state['messages'] + 1) // 2)):
+                template = gen.rng.choice(USER_MESSAGES)
+                message = f'{template} {gen.text(3, 20)}' if gen.rng.random() < 0.3 else template
+                reply = replies[template]
+                crisis = crisis or reply['crisis_detected']
+                yield {'id': gen.uuid(), 'session_id': session_id, 'sender_type': 'user', 'sender_id': user_id,
+                       'message': message, 'message_type': 'text', 'timestamp': moment,
+                       'crisis_keywords': None, 'crisis_flag': False, 'sentiment': None}
+                moment += timedelta(seconds=gen.rng.randint(2, 30))
+                yield {'id': gen.uuid(), 'session_id': session_id, 'sender_type': 'ai', 'sender_id': None,
+                       'message': reply['message'],
+                       'message_type': reply['type'], 'timestamp': moment,
+                       **crisis_columns(reply['crisis_keywords']), 'sentiment': reply['sentiment']}
+                moment += timedelta(seconds=gen.rng.randint(20, 300))
+                state['messages'] += 2
+            sessions.append({
+                'id': session_id, 'user_id': user_id, 'session_type': 'ai', 'started_at': started,
+                'status': 'escalated' if crisis else 'ended', 'crisis_detected': crisis
+            })
+
+    messages = insert_batches(ChatMessage, message_rows())
+    insert_batches(ChatSession, iter(sessions))
+    return len(sessions), messages
+
+
+def generate_posts(gen, count, user_ids):
+    return insert_batches(ForumPost, ({
+        'id': gen.uuid(), 'author_id': gen.rng.choice(user_ids), 'title': gen.rng.choice(POST_TITLES),
+        'content': gen.text(20, 200), 'category': gen.rng.choice(CATEGORIES),
+        'tags': gen.rng.sample(CATEGORIES, 2), 'upvotes': gen.rng.randint(0, 50),
+        'downvotes': gen.rng.randint(0, 5), 'view_count': gen.rng.randint(0, 2000),
+        'is_anonymous': gen.rng.random() < 0.7, 'status': 'active' if gen.rng.random() < 0.97 else 'hidden',
+        'created_at': created, 'updated_at': created
+    } for created in (gen.moment(i / count) for i in range(count))))
+
+
+def generate_screenings(gen, count, user_ids):
+    latest = {}
+
+    def rows():
+        for offset in range(0, count, args.batch):
+            batch = []
+            for i in range(offset, min(count, offset + args.batch)):
+                screening_type = gen.rng.choice(list(SCREENING_QUESTIONS))
+                responses = {f'q{q + 1}': gen.rng.choices([0, 1, 2, 3], [5, 3, 2, 1])[0]
+                             for q in range(SCREENING_QUESTIONS[screening_type])}
+                batch.append((gen.rng.choice(user_ids), screening_type, responses, gen.moment(i / count)))
+            for screening_type in SCREENING_QUESTIONS:
+                items = [item for item in batch if item[1] == screening_type]
+                if not items:
+                    continue
+                totals, levels = score_screenings(screening_type, [item[2] for item in items])
+                for (user_id, _, responses, completed), total, level in zip(items, totals, levels):
+                    # Rows are generated in time order, so the last one per user wins
+                    update = latest.setdefault(user_id, {'id': user_id})
+                    update[SCREENING_SCORE_COLUMNS[screening_type]] = total
+                    update['risk_level'] = level
+                    update['last_screening'] = completed
+                    yield {'id': gen.uuid(), 'user_id': user_id, 'screening_type': screening_type,
+                           'responses': responses, 'total_score': total, 'risk_level': level,
+                           'completed_at': completed}
+
+    inserted = insert_batches(ScreeningResponse, rows())
+    updates = list(latest.values())
+    for offset in range(0, len(updates), args.batch):
+        db.session.execute(db.update(User), updates[offset:offset + args.batch])
+    db.session.commit()
+    return inserted
+
+
+def step(label, fn, *fn_args):
+    begin = time.perf_counter()
+    result = fn(*fn_args)
+    print(f'{label:<24} {time.perf_counter() - begin:>8.1f}s')
+    return result
+
+
+def main():
+    gen = Generator(random.Random(args.seed))
+    begin = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        user_ids, staff_ids = step('users', generate_users, gen, scaled(args.users))
+        counselor_ids = step('counselors', generate_counselors, gen, staff_ids)
+        step('resources', generate_resources, gen, scaled(args.resources), staff_ids[0])
+        step('appointments', generate_appointments, gen, scaled(args.appointments), user_ids, counselor_ids)
+        step('chat sessions/messages', generate_chat, gen, scaled(args.messages), user_ids)
+        step('forum posts', generate_posts, gen, scaled(args.posts), user_ids)
+        step('screenings', generate_screenings, gen, scaled(args.screenings), user_ids)
+        # Migrations backfill the FTS index and run ANALYZE on the populated tables
+        step('migrations', upgrade_database)
+        step('analytics rollups', rebuild_analytics)
+        for model in (User, Counselor, Resource, Appointment, ChatSession, ChatMessage, ForumPost, ScreeningResponse):
+            print(f'{model.__tablename__:<24} {db.session.query(db.func.count()).select_from(model).scalar():>9} rows')
+        # Leave everything in the main file so it can be copied on its own
+        db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+    print(f'Generated {db_path} in {time.perf_counter() - begin:.1f}s '
+          f'({os.path.getsize(db_path) / 2 ** 20:.0f} MiB)')
+
+
+if __name__ == '__main__':
+    main()
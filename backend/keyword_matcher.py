@@ -0,0 +1,132 @@
+import re
+from typing import NamedTuple
+
+
+class KeywordHit(NamedTuple):
+    keyword: str
+    start: int
+    end: int
+    categories: tuple
+
+
+class KeywordMatcher:
+    """Matches many keyword lexicons against a message in a single pass.
+
+    All keywords are folded into one trie and compiled into a single regex,
+    so the C regex engine walks the message once instead of once per
+    keyword. Each search resumes one character after the previous hit's
+    start, which keeps overlapping keywords, and shorter keywords that are a
+    prefix of the longest match are recovered from the trie. The result has
+    the same "every keyword that occurs anywhere" semantics as checking
+    ``keyword in message.lower()`` for each keyword.
+
+    Offsets in ``scan`` results index into ``text.lower()``.
+    """
+
+    def __init__(self, lexicons, word_boundaries=False):
+        self.word_boundaries = word_boundaries
+        self._lexicons = {}
+        self._categories = {}
+        self._rank = {}
+
+        for category, keywords in lexicons.items():
+            ordered = []
+            ranks = {}
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if not keyword or keyword in ranks:
+                    continue
+                ranks[keyword] = len(ordered)
+                ordered.append(keyword)
+                self._categories.setdefault(keyword, []).append(category)
+            self._lexicons[category] = ordered
+            self._rank[category] = ranks
+
+        self._categories = {kw: tuple(cats) for kw, cats in self._categories.items()}
+        self._prefixes = {}
+        self._pattern = self._compile(sorted(self._categories))
+
+    @property
+    def lexicons(self):
+        return {category: list(keywords) for category, keywords in self._lexicons.items()}
+
+    def _compile(self, keywords):
+        if not keywords:
+            return None
+
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # Every keyword maps to the keywords that are its prefixes (itself included)
+        for keyword in keywords:
+            node = trie
+            found = []
+            for i, char in enumerate(keyword, 1):
+                node = node[char]
+                if '' in node:
+                    found.append(keyword[:i])
+            self._prefixes[keyword] = tuple(found)
+
+        body = self._trie_pattern(trie)
+        if self.word_boundaries:
+            body = r'(?<!\w)' + body + r'(?!\w)'
+        return re.compile(body)
+
+    def _trie_pattern(self, node):
+        branches = [re.escape(char) + self._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Greedy optional group: prefer the longest keyword at this offset
+            return '(?:' + pattern + ')?'
+        return pattern
+
+    def _matches(self, text):
+        """Yield ``(start, keyword)`` for every keyword occurrence in lowered ``text``."""
+        search = self._pattern.search
+        prefixes = self._prefixes
+        match = search(text)
+        while match:
+            start = match.start()
+            longest = match.group()
+            for keyword in prefixes[longest]:
+                if (self.word_boundaries and keyword != longest
+                        and not self._is_boundary(text, start + len(keyword))):
+                    continue
+                yield start, keyword
+            match = search(text, start + 1)
+
+    def _is_boundary(self, text, end):
+        return end >= len(text) or not (text[end].isalnum() or text[end] == '_')
+
+    def scan(self, text):
+        """Return every keyword occurrence in ``text`` ordered by offset."""
+        if self._pattern is None or not text:
+            return []
+        return [KeywordHit(keyword, start, start + len(keyword), self._categories[keyword])
+                for start, keyword in self._matches(text.lower())]
+
+    def categorize(self, text):
+        """Return the distinct keywords found in ``text`` for every category.
+
+        Keywords are listed in the order they appear in the category's
+        lexicon, matching what a per-keyword loop over the lexicon returns.
+        """
+        found = set()
+        if self._pattern is not None and text:
+            found = {keyword for _, keyword in self._matches(text.lower())}
+
+        result = {category: [] for category in self._lexicons}
+        for keyword in found:
+            for category in self._categories[keyword]:
+                result[category].append(keyword)
+        for category, keywords in result.items():
+            if len(keywords) > 1:
+                keywords.sort(key=self._rank[category].__getitem__)
+        return result